@@ -1,6 +1,3 @@
-import requests
-from bs4 import BeautifulSoup
-from lxml import etree
 import os
 from datetime import datetime, timedelta
 import json
@@ -9,18 +6,38 @@ import urllib.parse
 import sys
 from pypinyin import lazy_pinyin
 import asyncio
-import aiohttp
 from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 import threading
 from queue import Queue
 from tqdm import tqdm
 import logging
 import psutil
-import pickle
-from pathlib import Path
 import re
 import yaml
 from nav_generator import generate_nav_page
+from serp import get_serp_document, get_serp_document_async, set_fetch_cache, fetch_cache_stats, headers
+from serp import configure_archive, close_archive, is_replaying, get_transport
+from serp import create_parse_executor, get_retry_policy, set_retry_policy
+from serp import get_cached_document, SerpDocument
+from transport import AsyncTransport, RequestBudget, DEFAULT_REQUESTS_PER_MINUTE, RETRYABLE_ERRORS
+from retry import RetryPolicy, CircuitBreaker, DEFAULT_MAX_ATTEMPTS
+from loop_monitor import LoopLagMonitor
+from term_registry import TermRegistry, get_term_registry, set_term_registry, DEFAULT_REGISTRY_PATH
+from templates import Template, minify_stats
+from html_minify import minify_css
+from assets import publish_asset, asset_href, content_hash
+from build_clock import build_now, set_build_time, parse_build_time
+from output_manifest import OutputManifest, get_output_manifest, set_output_manifest, write_text, write_chunks, DEFAULT_MANIFEST_PATH
+from build_graph import BuildGraph, get_build_graph, set_build_graph, DEFAULT_GRAPH_PATH
+from structured_data import result_records, detail_page_json, stream_item_list
+from structured_data import set_json_encoder, fragment_cache_stats, ENCODERS
+from precompress import Precompressor, set_precompressor, get_precompressor
+from output_writer import OutputWriter, FSYNC_POLICIES, ensure_dir
+from site_bundle import pack_site
+from deploy_delta import export_delta, DEFAULT_STATE_PATH
+from site_layout import SiteLayout, LAYOUT_STRATEGIES, set_site_layout, get_site_layout
+from render_pool import RenderPool, set_render_pool, get_render_pool
 
 # 添加日志配置
 logging.basicConfig(
@@ -32,11 +49,6 @@ logging.basicConfig(
     ]
 )
 
-# 设置请求头，模拟浏览器访问
-headers = {
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-}
-
 def get_css_content():
     return '''
 body {
@@ -132,167 +144,116 @@ body {
 }
 '''
 
-def get_meta_tags(keyword, related_searches):
-    """生成增强的SEO相关meta标签"""
-    # 生成更丰富的关键组合
-    primary_keywords = [keyword] + related_searches[:5]
-    secondary_keywords = [f"{keyword}相关", f"{keyword}推荐", f"最新{keyword}", f"{keyword}排行"]
-    long_tail_keywords = [f"{keyword}有哪些", f"怎么选择{keyword}", f"{keyword}哪个好", f"{keyword}排名"]
-    
-    all_keywords = list(set(primary_keywords + secondary_keywords + long_tail_keywords))
-    keyword_str = ', '.join(all_keywords)
-    
-    # 生成更自然的描述
-    description = (
-        f"为您提供{keyword}的最新整理与分析。包含{len(related_searches)}个相关主题：" +
-        f"{', '.join(related_searches[:3])}等。" +
-        f"全方位解析{keyword}相关内容，助您快速了解{keyword}的核心信息。" +
-        f"定期更新，确保信息时效性。"
-    )
-    
-    # 添加更丰富的结构化数据
-    structured_data = {
-        "@context": "https://schema.org",
-        "@type": "WebPage",
-        "name": f"{keyword} - 最新整理与分析",
-        "description": description,
-        "datePublished": datetime.now().isoformat(),
-        "dateModified": datetime.now().isoformat(),
-        "about": {"@type": "Thing", "name": keyword},
-        "keywords": keyword_str,
-        "breadcrumb": {
-            "@type": "BreadcrumbList",
-            "itemListElement": [
-                {
-                    "@type": "ListItem",
-                    "position": 1,
-                    "name": "首页",
-                    "item": "/"
-                },
-                {
-                    "@type": "ListItem",
-                    "position": 2,
-                    "name": keyword,
-                    "item": f"/{keyword}.html"
-                }
-            ]
-        },
-        "mainEntity": {
-            "@type": "ItemList",
-            "itemListElement": [
-                {
-                    "@type": "ListItem",
-                    "position": i + 1,
-                    "name": term
-                } for i, term in enumerate(related_searches[:10])
-            ]
-        },
-        "publisher": {
-            "@type": "Organization",
-            "name": "Search Results Generator",
-            "url": "/"
-        }
-    }
+def get_detail_css():
+    """详细页面的样式（与get_css_content合并成站点共用的样式表）"""
+    return '''
+/* 文章页面特定样式 */
+.search-result {
+    margin-bottom: 30px;
+    padding: 20px;
+    background: #fff;
+    border-radius: 8px;
+    box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+}
+.content-body {
+    margin-top: 15px;
+    line-height: 1.8;
+    font-size: 16px;
+}
+.abstract {
+    color: #4d5156;
+    margin-bottom: 15px;
+    text-indent: 2em;
+}
+.source-link {
+    color: #006621;
+    font-size: 14px;
+    margin-top: 10px;
+    border-top: 1px solid #eee;
+    padding-top: 10px;
+}
+.detail-page h1 {
+    font-size: 24px;
+    color: #1a0dab;
+    margin-bottom: 20px;
+    padding-bottom: 10px;
+    border-bottom: 2px solid #eee;
+}
+.detail-page h2 {
+    font-size: 18px;
+    color: #1a0dab;
+    margin: 0 0 15px 0;
+}
+.article-meta {
+    color: #666;
+    font-size: 14px;
+    margin-bottom: 20px;
+}
+.breadcrumb {
+    margin-bottom: 20px;
+    color: #666;
+    font-size: 14px;
+}
 
-    return f'''
-    <!-- 核心 SEO Meta 标签 -->
-    <meta name="keywords" content="{keyword_str}">
-    <meta name="description" content="{description}">
-    <meta name="robots" content="index, follow, max-snippet:-1, max-image-preview:large, max-video-preview:-1">
-    
-    <!-- 增强的搜索引擎优化标签 -->
-    <meta name="baidu-site-verification" content="">
-    <meta name="google-site-verification" content="">
-    <meta name="360-site-verification" content="">
-    <meta name="sogou_site_verification" content="">
-    <meta name="msvalidate.01" content="">
-    
-    <!-- 社交媒体优化标签 -->
-    <meta property="og:title" content="{keyword} - 最新整理与分析">
-    <meta property="og:description" content="{description}">
-    <meta property="og:type" content="article">
-    <meta property="og:updated_time" content="{datetime.now().isoformat()}">
-    <meta property="article:published_time" content="{datetime.now().isoformat()}">
-    <meta property="article:modified_time" content="{datetime.now().isoformat()}">
-    <meta property="article:section" content="搜索聚合">
-    <meta property="article:tag" content="{keyword_str}">
-    
-    <!-- 移动设备优化 -->
-    <meta name="viewport" content="width=device-width, initial-scale=1.0, maximum-scale=5.0">
-    <meta name="mobile-web-app-capable" content="yes">
-    <meta name="apple-mobile-web-app-capable" content="yes">
-    <meta name="apple-mobile-web-app-status-bar-style" content="default">
-    <meta name="apple-mobile-web-app-title" content="{keyword}">
-    <meta name="format-detection" content="telephone=no,email=no,address=no">
-    
-    <!-- 内容属性标签 -->
-    <meta name="author" content="Search Results Generator">
-    <meta name="copyright" content="Search Results Generator">
-    <meta name="generator" content="Search Results Generator 1.0">
-    <meta name="revisit-after" content="1 days">
-    <meta name="rating" content="general">
-    
-    <!-- 浏览器兼容性标签 -->
-    <meta http-equiv="X-UA-Compatible" content="IE=edge,chrome=1">
-    <meta http-equiv="Cache-Control" content="no-transform">
-    <meta http-equiv="Cache-Control" content="no-siteapp">
-    
-    <!-- 链接规范化标签 -->
-    <link rel="canonical" href="{keyword}.html">
-    <link rel="alternate" media="only screen and (max-width: 640px)" href="{keyword}.html">
-    
-    <!-- DNS预解析 -->
-    <link rel="dns-prefetch" href="//www.baidu.com">
-    <link rel="dns-prefetch" href="//www.google.com">
-    
-    <!-- 页面主题色 -->
-    <meta name="theme-color" content="#ffffff">
-    <meta name="msapplication-navbutton-color" content="#ffffff">
-    <meta name="apple-mobile-web-app-status-bar-style" content="white">
-    
-    <!-- 增强的结构化数据 -->
-    <script type="application/ld+json">
-    {json.dumps(structured_data, ensure_ascii=False)}
-    </script>
-    
-    <!-- 添加FAQ结构化数据 -->
-    <script type="application/ld+json">
-    {{
-        "@context": "https://schema.org",
-        "@type": "FAQPage",
-        "mainEntity": [
-            {{
-                "@type": "Question",
-                "name": "什么是{keyword}？",
-                "acceptedAnswer": {{
-                    "@type": "Answer",
-                    "text": "{description}"
-                }}
-            }},
-            {{
-                "@type": "Question",
-                "name": "{keyword}有哪些相关内容？",
-                "acceptedAnswer": {{
-                    "@type": "Answer",
-                    "text": "相关内容包括：{', '.join(related_searches[:5])}等。"
-                }}
-            }}
-        ]
-    }}
-    </script>
-    
-    <!-- 性能优化标签 -->
-    <link rel="preconnect" href="//www.baidu.com">
-    <link rel="dns-prefetch" href="//www.baidu.com">
-    <link rel="preload" href="css/style.css" as="style">
-    <meta http-equiv="x-dns-prefetch-control" content="on">
-    
-    <!-- 安全相关标签 -->
-    <meta http-equiv="Content-Security-Policy" content="upgrade-insecure-requests">
-    <meta http-equiv="X-Content-Type-Options" content="nosniff">
-    <meta http-equiv="X-Frame-Options" content="SAMEORIGIN">
-    <meta name="referrer" content="no-referrer-when-downgrade">
-    '''
+/* 相关搜索样式 */
+.related-searches {
+    margin-top: 40px;
+    padding: 20px;
+    background: #fff;
+    border-radius: 8px;
+    box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+}
+.related-searches h3 {
+    color: #1a0dab;
+    font-size: 18px;
+    margin-bottom: 15px;
+    padding-bottom: 10px;
+    border-bottom: 1px solid #eee;
+}
+.related-terms {
+    display: flex;
+    flex-wrap: wrap;
+    gap: 10px;
+}
+.related-term {
+    background: #f8f9fa;
+    padding: 8px 15px;
+    border-radius: 20px;
+    color: #1a0dab;
+    text-decoration: none;
+    font-size: 14px;
+    transition: all 0.3s ease;
+}
+.related-term:hover {
+    background: #e8eaed;
+    transform: translateY(-1px);
+}
+'''
+
+_site_stylesheet = None
+
+def get_site_stylesheet():
+    """站点共用样式表的路径，首次调用时写入 assets/style.<哈希>.css（所有关键词目录共用一份）"""
+    global _site_stylesheet
+    if _site_stylesheet is None:
+        _site_stylesheet = publish_asset(minify_css(get_css_content() + get_detail_css()), 'style', '.css')
+        get_output_manifest().track(_site_stylesheet)
+    return _site_stylesheet
+
+_render_fingerprint = None
+
+def get_render_fingerprint():
+    """编译后的模板、样式表和目录布局的指纹，作为页面节点的输入：模板、样式或布局有变化时所有页面都要重新生成
+
+    布局决定详细页面所在的目录深度，页面中指向共用资源的相对链接随之不同
+    """
+    global _render_fingerprint
+    if _render_fingerprint is None:
+        templates = [INDEX_TEMPLATE, DETAIL_TEMPLATE, DETAIL_ITEM_TEMPLATE, RELATED_SEARCHES_TEMPLATE,
+                     RELATED_TERM_TEMPLATE, RESULT_ITEM_TEMPLATE]
+        compiled = repr([(template.name, template.parts) for template in templates])
+        _render_fingerprint = content_hash((compiled + get_site_stylesheet() + get_site_layout().strategy).encode('utf-8'))
+    return _render_fingerprint
 
 def get_html_template():
     return '''
@@ -356,7 +317,7 @@ def get_html_template():
         }},
         "mainEntity": {{
             "@type": "ItemList",
-            "itemListElement": {json_results},
+            "itemListElement": {json_results:raw},
             "numberOfItems": {result_count}
         }},
         "datePublished": "{timestamp}",
@@ -380,8 +341,8 @@ def get_html_template():
             {{
                 "@type": "ListItem",
                 "position": 2,
-                "name": "{keyword}",
-                "item": "?keyword={keyword}"
+                "name": "{keyword:json}",
+                "item": "?keyword={keyword:json}"
             }}
         ]
     }}
@@ -413,7 +374,7 @@ def get_html_template():
     }}
     </script>
     
-    <link rel="stylesheet" href="css/style.css">
+    <link rel="stylesheet" href="{stylesheet}">
     <link rel="canonical" href="index.html">
     <link rel="preconnect" href="https://fonts.googleapis.com">
     <link href="https://fonts.googleapis.com/css2?family=Noto+Sans+SC:wght@400;500;700&display=swap" rel="stylesheet">
@@ -628,7 +589,7 @@ def get_html_template():
         
         <!-- 搜索结果 -->
         <main class="results">
-            {search_results}
+            {search_results:raw}
         </main>
         
         <!-- 页脚 -->
@@ -641,93 +602,93 @@ def get_html_template():
 </html>
 '''
 
-def create_json_results(related_searches):
-    """创建结构化数据的搜索结果列表"""
-    json_items = []
-    for i, term in enumerate(related_searches, 1):
-        item = {
-            "@type": "ListItem",
-            "position": i,
-            "name": term,
-            "url": f"https://www.baidu.com/s?wd={term}"
-        }
-        json_items.append(json.dumps(item))
-    return "[" + ",".join(json_items) + "]"
-
-def is_chinese_text(text):
-    """判断文本是否包含中文"""
-    for char in text:
-        if '\u4e00' <= char <= '\u9fff':
-            return True
-    return False
+# 主页模板只编译一次（静态部分在编译时压缩）
+INDEX_TEMPLATE = Template(get_html_template(), 'index', minify=True)
 
-def get_article_content(term):
-    """获取每个搜索词的详细内容"""
-    url = f'http://www.baidu.com/s?wd={urllib.parse.quote(term)}'
-    try:
-        response = requests.get(url, headers=headers)
-        response.encoding = 'utf-8'
-        if response.status_code == 200:
-            html = etree.HTML(response.text)
-            contents = []
-            
-            # 遍历前10个搜索结果
-            for result_id in range(1, 12):
-                try:
-                    # 为每个结果ID构建特定的XPath
-                    result_paths = {
-                        'title': f'//*[@id="{result_id}"]/div/div[1]/h3/a//text()',
-                        'abstract': f'//*[@id="{result_id}"]/div/div[1]/div[2]/div[1]/div[2]//text()',
-                        'source': f'//*[@id="{result_id}"]/div/div[1]/div[2]/div[1]/div[2]/div/a/span/text()',
-                        'url': f'//*[@id="{result_id}"]/@mu'
-                    }
-                    
-                    # 获取当前结果的所有容
-                    result_content = {}
-                    
-                    # 获取标题
-                    title = html.xpath(result_paths['title'])
-                    if title:
-                        temp_title = ''.join(title).strip()
-                        if is_chinese_text(temp_title):
-                            result_content['title'] = temp_title
-                        else:
-                            continue
-                    else:
-                        continue
-                    
-                    # 获取摘要
-                    abstract = html.xpath(result_paths['abstract'])
-                    if abstract:
-                        abstract_text = ''.join(abstract).strip()
-                        if abstract_text:
-                            result_content['abstract'] = abstract_text
-                        else:
-                            continue
-                    else:
-                        continue
-                    
-                    # 获取来源
-                    source = html.xpath(result_paths['source'])
-                    result_content['source'] = source[0].strip() if source else ""
-                    
-                    # 获取URL
-                    url_element = html.xpath(result_paths['url'])
-                    result_content['url'] = url_element[0] if url_element else ""
-                    
-                    # 只有当必要内容都获取到时才添加到结果中
-                    if result_content.get('title') and result_content.get('abstract'):
-                        contents.append(result_content)
-                    
-                except Exception as e:
-                    print(f"处理第 {result_id} 条搜索结果时出错: {str(e)}")
-                    continue
-            
-            return contents
+def get_detail_template():
+    return '''
+<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+    <meta charset="UTF-8">
+    <title>{term} - 相关内容详细信息 - 最新整理</title>
+    
+    <!-- 增强的SEO Meta标签 -->
+    <meta name="keywords" content="{meta_keywords}">
+    <meta name="description" content="{meta_description}">
+    <meta name="robots" content="index, follow, max-snippet:-1, max-image-preview:large, max-video-preview:-1">
+    <meta name="author" content="Search Results Generator">
+    
+    <!-- Open Graph Meta标签强 -->
+    <meta property="og:title" content="{term} - 最新相关内容汇总">
+    <meta property="og:description" content="{meta_description}">
+    <meta property="og:type" content="article">
+    <meta property="og:url" content="{filename}.html">
+    <meta property="og:site_name" content="搜索结果聚合">
+    <meta property="article:published_time" content="{published_time}">
+    <meta property="article:modified_time" content="{published_time}">
+    <meta property="og:locale" content="zh_CN">
+    
+    <!-- Twitter Card Meta标签增强 -->
+    <meta name="twitter:card" content="summary_large_image">
+    <meta name="twitter:title" content="{term} - 最新相关内容汇总">
+    <meta name="twitter:description" content="{meta_description}">
+    
+    <!-- 其他重要Meta标签 -->
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <meta http-equiv="X-UA-Compatible" content="IE=edge">
+    <meta name="format-detection" content="telephone=no">
+    <meta name="mobile-web-app-capable" content="yes">
+    <meta name="apple-mobile-web-app-capable" content="yes">
+    
+    <!-- 百度特定Meta标签 -->
+    <meta http-equiv="Cache-Control" content="no-transform">
+    <meta http-equiv="Cache-Control" content="no-siteapp">
+    <meta name="applicable-device" content="pc,mobile">
+    <meta name="MobileOptimized" content="width">
+    <meta name="HandheldFriendly" content="true">
+    
+    <link rel="stylesheet" href="{stylesheet}">
+    <link rel="canonical" href="{filename}.html">
+    
+    <!-- 增强的结构化数据 -->
+    <script type="application/ld+json">
+    {structured_data:raw}
+    </script>
+</head>
+<body class="detail-page">
+    <div class="container">
+        <nav class="breadcrumb">
+            <a href="../index.html">首页</a> > {term}
+        </nav>
+        <article>
+            <h1>{term}</h1>
+            <div class="article-meta">
+                发布时间：{published_text}
+            </div>
+            <main>
+                {content_html:raw}
+            </main>
             
-    except Exception as e:
-        print(f"获取 {term} 的详细内容时出错: {str(e)}")
-        return None
+            <footer>
+                <p><a href="../index.html">返回搜索结果</a></p>
+            </footer>
+        </article>
+    </div>
+</body>
+</html>
+'''
+
+# 详细页面模板只编译一次
+DETAIL_TEMPLATE = Template(get_detail_template(), 'detail', minify=True)
+
+def stream_json_results(related_searches):
+    """逐项产出结构化数据的搜索结果列表（每个词的片段只序列化一次，出现在其他关键词下时直接复用）"""
+    return stream_item_list((term, f"https://www.baidu.com/s?wd={term}") for term in related_searches)
+
+def create_json_results(related_searches):
+    """创建结构化数据的搜索结果列表"""
+    return ''.join(stream_json_results(related_searches))
 
 def generate_seo_filename(text):
     """生成SEO友好的文件名，并保存到文件中"""
@@ -771,299 +732,154 @@ def generate_seo_filename(text):
         print(f"生成文件名出错: {str(e)}")
         return 'page'
 
+# 单个相关搜索词链接
+RELATED_TERM_TEMPLATE = Template('<a href="?keyword={quoted_term}" class="related-term">{term}</a>', 'related_term')
+
+def stream_related_terms(related_terms):
+    """逐个产出相关搜索词链接的HTML"""
+    for term in related_terms:
+        yield RELATED_TERM_TEMPLATE.render({'quoted_term': urllib.parse.quote(term), 'term': term})
+
+def render_related_terms(related_terms):
+    """生成相关搜索词的HTML"""
+    return ''.join(stream_related_terms(related_terms))
+
 def get_related_terms_html(term):
     """获取相关搜索词并生成HTML"""
     try:
-        url = f'http://www.baidu.com/s?wd={urllib.parse.quote(term)}'
-        response = requests.get(url, headers=headers)
-        if response.status_code == 200:
-            html = etree.HTML(response.text)
-            # 获取相关搜索词
-            related_terms = html.xpath('//*[@id="rs_new"]/div/table//td/a/span/text()')
-            
-            # 生成HTML
-            terms_html = ''
-            for term in related_terms:
-                if term.strip():
-                    terms_html += f'<a href="?keyword={urllib.parse.quote(term.strip())}" class="related-term">{term.strip()}</a>'
-            
-            return terms_html
+        # 与详细页面共用同一个SERP文档，不再重复请求
+        document = get_serp_document(term)
+        if document is not None:
+            return render_related_terms(document.related_terms)
         return ''
     except Exception as e:
         print(f"获取相关搜索词时出错: {str(e)}")
         return ''
 
-def create_detail_page(term, contents, output_dir):
-    """创建详细页��"""
-    if not contents:
-        return None
-    
-    try:
-        # 生成SEO友好的文件名
-        filename = generate_seo_filename(term)
-        safe_term = filename  # 添加这行，定义safe_term
-        
-        # 创建详细页面目录
-        detail_dir = os.path.join(output_dir, 'p')  # 改用简短的目录名
-        if not os.path.exists(detail_dir):
-            os.makedirs(detail_dir)
-        
-        # 生成内容HTML和结构化数据
-        content_html = ""
-        article_schema = []
-        
-        # 集所有标题和摘要用于SEO
-        all_titles = [content['title'] for content in contents if content.get('title')]
-        all_abstracts = [content['abstract'] for content in contents if content.get('abstract')]
-        
-        # 生成更丰富的meta描述
-        meta_description = f"{term}的详细内容。包含{len(contents)}个相关结果："
-        meta_description += ''.join(all_titles[:3]) + "等。"
-        if all_abstracts:
-            meta_description += all_abstracts[0][:100] + "..."
-            
-        # 生成更丰富的关键词
-        meta_keywords = set([term])
-        meta_keywords.update(all_titles)
-        meta_keywords.update([word for title in all_titles for word in title if len(word) > 1])
-        meta_keywords_str = ', '.join(list(meta_keywords)[:20])  # 限制关键字量
-        
-        # 为每个内容块创建更丰富的Schema.org结构化数据
-        for i, content in enumerate(contents, 1):
-            article_schema.append({
-                "@type": "Article",
-                "headline": f"{content['source']}{content['title']}",
-                "description": content['abstract'],
-                "url": content['url'],
-                "publisher": {
-                    "@type": "Organization",
-                    "name": content['source']
-                },
-                "position": i,
-                "datePublished": datetime.now().isoformat(),
-                "inLanguage": "zh-CN",
-                "articleSection": term,
-                "keywords": content['title'].split(),
-                "mainEntityOfPage": {
-                    "@type": "WebPage",
-                    "@id": content['url']
-                }
-            })
-            
-            # 生成更语义化的HTML内容
-            content_html += f'''
+# 详细页面中的单条搜索结果
+DETAIL_ITEM_TEMPLATE = Template('''
             <article class="search-result" itemscope itemtype="http://schema.org/Article">
-                <h2 itemprop="headline">{content['source']}{content['title']}</h2>
+                <h2 itemprop="headline">{source}{title}</h2>
                 <div class="content-body">
-                    <p itemprop="description" class="abstract">{content['abstract']}</p>
+                    <p itemprop="description" class="abstract">{abstract}</p>
                     <div class="meta-info">
                         <span class="source" itemprop="publisher" itemscope itemtype="http://schema.org/Organization">
-                            来源：<span itemprop="name">{content['source']}</span>
+                            来源：<span itemprop="name">{source}</span>
                         </span>
-                        <time itemprop="datePublished" datetime="{datetime.now().isoformat()}">
-                            发布时间：{datetime.now().strftime('%Y-%m-%d')}
+                        <time itemprop="datePublished" datetime="{published_time}">
+                            发布时间：{published_date}
                         </time>
                     </div>
                     <p class="source-link">
-                        原文链接：<a href="{content['url']}" target="_blank" rel="noopener noreferrer" itemprop="url">{content['url']}</a>
+                        原文链接：<a href="{url}" target="_blank" rel="noopener noreferrer" itemprop="url">{url}</a>
                     </p>
                 </div>
             </article>
-            '''
-        
-        # 获取相关搜索词的HTML
-        related_terms_html = get_related_terms_html(term)
-        
-        # 在生成HTML内容时使用相关搜索词
-        content_html += f'''
+            ''', 'detail_item', minify=True)
+
+@lru_cache(maxsize=4)
+def get_detail_item_template(published_time, published_date):
+    """填好发布时间的单条结果模板（构建时间在一次运行中固定，所有详细页面共用同一个）"""
+    return DETAIL_ITEM_TEMPLATE.bind({'published_time': published_time, 'published_date': published_date})
+
+# 详细页面底部的相关搜索
+RELATED_SEARCHES_TEMPLATE = Template('''
             <!-- 在footer前添加相关搜索部分 -->
             <div class="related-searches">
                 <h3>相关搜索</h3>
                 <div class="related-terms">
-                    {related_terms_html}
+                    {related_terms_html:raw}
                 </div>
             </div>
-        '''
-        
-        # 详细页面的HTML模板，添加更多SEO优化
-        detail_template = f'''
-<!DOCTYPE html>
-<html lang="zh-CN">
-<head>
-    <meta charset="UTF-8">
-    <title>{term} - 相关内容详细信息 - 最新整理</title>
+        ''', 'related_searches', minify=True)
+
+def detail_page_context(term, contents, filename, related_terms_html, stylesheet):
+    """详细页面模板的插槽值（content_html为逐条产出搜索结果的生成器）"""
+    records = result_records(contents)
     
-    <!-- 增强的SEO Meta标签 -->
-    <meta name="keywords" content="{meta_keywords_str}">
-    <meta name="description" content="{meta_description}">
-    <meta name="robots" content="index, follow, max-snippet:-1, max-image-preview:large, max-video-preview:-1">
-    <meta name="author" content="Search Results Generator">
+    # 集所有标题和摘要用于SEO
+    all_titles = [content['title'] for content in contents if content.get('title')]
+    all_abstracts = [content['abstract'] for content in contents if content.get('abstract')]
     
-    <!-- Open Graph Meta标签强 -->
-    <meta property="og:title" content="{term} - 最新相关内容汇总">
-    <meta property="og:description" content="{meta_description}">
-    <meta property="og:type" content="article">
-    <meta property="og:url" content="{safe_term}.html">
-    <meta property="og:site_name" content="搜索结果聚合">
-    <meta property="article:published_time" content="{datetime.now().isoformat()}">
-    <meta property="article:modified_time" content="{datetime.now().isoformat()}">
-    <meta property="og:locale" content="zh_CN">
+    # 生成更丰富的meta描述
+    meta_description = f"{term}的详细内容。包含{len(contents)}个相关结果："
+    meta_description += ''.join(all_titles[:3]) + "等。"
+    if all_abstracts:
+        meta_description += all_abstracts[0][:100] + "..."
+        
+    # 生成更丰富的关键词
+    # 按出现顺序去重（集合的遍历顺序每次运行都不同，生成的页面就无法逐字节复现）
+    meta_keywords = dict.fromkeys([term])
+    meta_keywords.update(dict.fromkeys(all_titles))
+    meta_keywords_str = ', '.join(list(meta_keywords)[:20])  # 限制关键字量
     
-    <!-- Twitter Card Meta标签增强 -->
-    <meta name="twitter:card" content="summary_large_image">
-    <meta name="twitter:title" content="{term} - 最新相关内容汇总">
-    <meta name="twitter:description" content="{meta_description}">
+    # 整页共用一个时间
+    now = build_now()
+    published_time = now.isoformat()
+    published_date = now.strftime('%Y-%m-%d')
     
-    <!-- 其他重要Meta标签 -->
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <meta http-equiv="X-UA-Compatible" content="IE=edge">
-    <meta name="format-detection" content="telephone=no">
-    <meta name="mobile-web-app-capable" content="yes">
-    <meta name="apple-mobile-web-app-capable" content="yes">
+    # 为每个内容块创建更丰富的Schema.org结构化数据
+    structured_data = detail_page_json(term, records, meta_description, published_time)
     
-    <!-- 百度特定Meta标签 -->
-    <meta http-equiv="Cache-Control" content="no-transform">
-    <meta http-equiv="Cache-Control" content="no-siteapp">
-    <meta name="applicable-device" content="pc,mobile">
-    <meta name="MobileOptimized" content="width">
-    <meta name="HandheldFriendly" content="true">
+    # 发布时间已填进模板，每条结果只再填自己的字段
+    item_template = get_detail_item_template(published_time, published_date)
     
-    <link rel="stylesheet" href="../c/style.css">
-    <link rel="canonical" href="{filename}.html">
+    def stream_content():
+        # 生成更语义化的HTML内容
+        for record in records:
+            yield item_template.render({
+                'source': record.source,
+                'title': record.title,
+                'abstract': record.abstract,
+                'url': record.url
+            })
+        yield from RELATED_SEARCHES_TEMPLATE.stream({'related_terms_html': related_terms_html})
     
-    <!-- 增强的结构化数据 -->
-    <script type="application/ld+json">
-    {{
-        "@context": "https://schema.org",
-        "@type": "ItemList",
-        "itemListElement": {json.dumps(article_schema)},
-        "mainEntity": {{
-            "@type": "WebPage",
-            "name": "{term} - 相关内容详细信息",
-            "description": "{meta_description}",
-            "datePublished": "{datetime.now().isoformat()}",
-            "dateModified": "{datetime.now().isoformat()}",
-            "inLanguage": "zh-CN",
-            "isPartOf": {{
-                "@type": "WebSite",
-                "name": "搜索结果聚合",
-                "url": "../index.html"
-            }}
-        }}
-    }}
-    </script>
+    return {
+        'term': term,
+        'meta_keywords': meta_keywords_str,
+        'meta_description': meta_description,
+        'filename': filename,
+        'date_code': now.strftime('%Y%m%d'),
+        'published_time': published_time,
+        'published_text': now.strftime('%Y-%m-%d %H:%M:%S'),
+        'structured_data': structured_data,
+        'content_html': stream_content(),
+        'stylesheet': stylesheet
+    }
+
+def stream_detail_page(term, contents, filename, related_terms_html, stylesheet):
+    """逐块产出详细页面的HTML（related_terms_html可以是分块的可迭代对象），整页不在内存中拼接"""
+    return DETAIL_TEMPLATE.stream(detail_page_context(term, contents, filename, related_terms_html, stylesheet))
+
+def render_detail_page(term, contents, filename, related_terms_html, stylesheet):
+    """渲染详细页面，返回完整HTML（一次%填充，不经过逐块产出）"""
+    return DETAIL_TEMPLATE.render(detail_page_context(term, contents, filename, related_terms_html, stylesheet))
     
-    <style>
-        /* 文章页面特定样式 */
-        .search-result {{
-            margin-bottom: 30px;
-            padding: 20px;
-            background: #fff;
-            border-radius: 8px;
-            box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-        }}
-        .content-body {{
-            margin-top: 15px;
-            line-height: 1.8;
-            font-size: 16px;
-        }}
-        .abstract {{
-            color: #4d5156;
-            margin-bottom: 15px;
-            text-indent: 2em;
-        }}
-        .source-link {{
-            color: #006621;
-            font-size: 14px;
-            margin-top: 10px;
-            border-top: 1px solid #eee;
-            padding-top: 10px;
-        }}
-        h1 {{
-            font-size: 24px;
-            color: #1a0dab;
-            margin-bottom: 20px;
-            padding-bottom: 10px;
-            border-bottom: 2px solid #eee;
-        }}
-        h2 {{
-            font-size: 18px;
-            color: #1a0dab;
-            margin: 0 0 15px 0;
-        }}
-        .article-meta {{
-            color: #666;
-            font-size: 14px;
-            margin-bottom: 20px;
-        }}
-        .breadcrumb {{
-            margin-bottom: 20px;
-            color: #666;
-            font-size: 14px;
-        }}
+
+def create_detail_page(term, contents, output_dir, related_terms=None):
+    """创建详细页��"""
+    if not contents:
+        return None
+    
+    try:
+        # 生成SEO友好的文件名
+        filename = generate_seo_filename(term)
         
-        /* 相关搜索样式 */
-        .related-searches {{
-            margin-top: 40px;
-            padding: 20px;
-            background: #fff;
-            border-radius: 8px;
-            box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-        }}
-        .related-searches h3 {{
-            color: #1a0dab;
-            font-size: 18px;
-            margin-bottom: 15px;
-            padding-bottom: 10px;
-            border-bottom: 1px solid #eee;
-        }}
-        .related-terms {{
-            display: flex;
-            flex-wrap: wrap;
-            gap: 10px;
-        }}
-        .related-term {{
-            background: #f8f9fa;
-            padding: 8px 15px;
-            border-radius: 20px;
-            color: #1a0dab;
-            text-decoration: none;
-            font-size: 14px;
-            transition: all 0.3s ease;
-        }}
-        .related-term:hover {{
-            background: #e8eaed;
-            transform: translateY(-1px);
-        }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <nav class="breadcrumb">
-            <a href="../index.html">首页</a> > {term}
-        </nav>
-        <article>
-            <h1>{term}</h1>
-            <div class="article-meta">
-                发布时间：{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-            </div>
-            <main>
-                {content_html}
-            </main>
-            
-            <footer>
-                <p><a href="../index.html">返回搜索结果</a></p>
-            </footer>
-        </article>
-    </div>
-</body>
-</html>
-'''
+        # 创建详细页面目录
+        detail_dir = os.path.join(output_dir, 'p')  # 改用简短的目录名
+        ensure_dir(detail_dir)
+        
+        # 获取相关搜索词的HTML（调用方已有SERP文档时直接使用其中的相关搜索词）
+        if related_terms is None:
+            related_terms_html = get_related_terms_html(term)
+        else:
+            related_terms_html = stream_related_terms(related_terms)
+        stylesheet = asset_href(get_site_stylesheet(), detail_dir)
         
-        # 保存详细页面
+        # 边渲染边保存详细页面
         file_path = os.path.join(detail_dir, f"{filename}.html")
-        with open(file_path, 'w', encoding='utf-8', errors='ignore') as f:
-            f.write(detail_template)
+        write_chunks(file_path, stream_detail_page(term, contents, filename, related_terms_html, stylesheet), errors='ignore')
         
         return f'p/{filename}.html'
         
@@ -1071,12 +887,8 @@ def create_detail_page(term, contents, output_dir):
         print(f"创建详细页面时出错: {str(e)}")
         return None
 
-def create_result_item(index, term):
-    """创建主页面的搜索结果项"""
-    # 生成SEO友好的文件名
-    filename = generate_seo_filename(term)
-    
-    return f'''
+# 主页中的单个搜索结果项
+RESULT_ITEM_TEMPLATE = Template('''
         <article class="result-item">
             <h2>
                 <a href="p/{filename}.html" class="result-link">
@@ -1087,12 +899,94 @@ def create_result_item(index, term):
                 <p>点击查看详情内容</p>
             </div>
         </article>
-    '''
+    ''', 'result_item', minify=True)
+
+def create_result_item(index, term):
+    """创建主页面的搜索结果项"""
+    # 生成SEO友好的文件名
+    filename = generate_seo_filename(term)
+    
+    return RESULT_ITEM_TEMPLATE.render({'filename': filename, 'term': term})
 
 def ensure_directory(directory):
-    """确保目录存在，如果不存在则创建"""
-    if not os.path.exists(directory):
-        os.makedirs(directory)
+    """确保目录存在，如果不存在则创建（已确认过的目录不再访问文件系统）"""
+    ensure_dir(directory)
+
+def stream_index_page(keyword, related_searches, stylesheet):
+    """逐块产出关键词主页的HTML，搜索结果项边生成边输出"""
+    timestamp = build_now().strftime("%Y-%m-%d %H:%M:%S")
+    
+    # 生成搜索结果HTML
+    search_results = (create_result_item(i, term) for i, term in enumerate(related_searches, 1))
+    
+    # 生成其他内容
+    json_results = stream_json_results(related_searches)
+    keywords = ', '.join(dict.fromkeys([keyword] + related_searches))
+    description = f"关于{keyword}的相关搜索结果，含{len(related_searches)}个相关主题。"
+    
+    return INDEX_TEMPLATE.stream({
+        'keyword': keyword,
+        'timestamp': timestamp,
+        'search_results': search_results,
+        'result_count': len(related_searches),
+        'json_results': json_results,
+        'keywords': keywords,
+        'description': description,
+        'stylesheet': stylesheet
+    })
+
+def render_index_page(keyword, related_searches, stylesheet):
+    """渲染关键词主页，返回完整HTML"""
+    return ''.join(stream_index_page(keyword, related_searches, stylesheet))
+
+def write_keyword_index(keyword, related_searches):
+    """创建关键词目录，写入CSS和主页，返回输出目录（失败时返回None）"""
+    
+    # 生成目录名
+    dir_name = generate_seo_filename(keyword)
+    output_dir = get_site_layout().keyword_path(f's_{dir_name}')  # 使用更短的前缀（hashed布局时在分片子目录中）
+    get_output_manifest().retire_dirs(get_site_layout().other_keyword_dirs(f's_{dir_name}'))  # 切换布局后删除旧目录中的文件
+    details_dir = os.path.join(output_dir, 'p')  # 简详情页目录名
+    
+    try:
+        # 创建必要的目录
+        for directory in [output_dir, details_dir]:
+            ensure_dir(directory)
+    except Exception as e:
+        print(f"创建目录失败: {str(e)}")
+        return None
+        
+    try:
+        # 站点共用的样式表（已写入时直接复用）
+        get_site_stylesheet()
+    except Exception as e:
+        print(f"保存CSS文件失败: {str(e)}")
+        return None
+        
+    try:
+        html_file = os.path.join(output_dir, 'index.html')
+        
+        # 相关搜索列表和模板都没有变化时，主页不必重新生成
+        graph = get_build_graph()
+        graph.update(f'related:{keyword}', related_searches)
+        node_id = f'index:{html_file}'
+        inputs = [keyword, get_render_fingerprint()]
+        deps = [f'related:{keyword}']
+        if not graph.is_dirty(node_id, inputs, deps):
+            get_output_manifest().track(html_file)
+            return output_dir
+        
+        html_chunks = stream_index_page(keyword, related_searches, asset_href(get_site_stylesheet(), output_dir))
+        
+        # 边渲染边保存主页HTML
+        write_chunks(html_file, html_chunks)
+        graph.mark_built(node_id, inputs, deps, [html_file])
+        
+        return output_dir
+        
+    except Exception as e:
+        print(f"生成HTML内容失败: {str(e)}")
+        return None
 
 def save_to_html(keyword, related_searches):
     try:
@@ -1100,74 +994,37 @@ def save_to_html(keyword, related_searches):
             print("关键词或搜索结果为空")
             return None
             
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        current_time = datetime.now().strftime('%Y%m%d_%H%M%S')
-        
-        # 生成目录名
-        dir_name = generate_seo_filename(keyword)
-        output_dir = f's_{dir_name}'  # 使用更短的前缀
-        css_dir = os.path.join(output_dir, 'c')  # 简化css目录名
-        details_dir = os.path.join(output_dir, 'p')  # 简详情页目录名
-        
-        try:
-            # 创建必要的目录
-            for directory in [output_dir, css_dir, details_dir]:
-                if not os.path.exists(directory):
-                    os.makedirs(directory)
-        except Exception as e:
-            print(f"创建目录失败: {str(e)}")
-            return None
-            
-        try:
-            # 保存CSS文件
-            css_file = os.path.join(css_dir, 'style.css')
-            with open(css_file, 'w', encoding='utf-8') as f:
-                f.write(get_css_content())
-        except Exception as e:
-            print(f"保存CSS文件失败: {str(e)}")
+        # 创建目录并生成主页
+        output_dir = write_keyword_index(keyword, related_searches)
+        if not output_dir:
             return None
             
         try:
-            # 生成搜索结果HTML
-            search_results = ""
-            for i, term in enumerate(related_searches, 1):
-                search_results += create_result_item(i, term)
+            registry = get_term_registry()
+            detail_dir = os.path.join(output_dir, 'p')
             
-            # 生成其他内容
-            meta_tags = get_meta_tags(keyword, related_searches)
-            json_results = create_json_results(related_searches)
-            keywords = ', '.join(list(set([keyword] + related_searches)))
-            description = f"关于{keyword}的相关搜索结果，含{len(related_searches)}个相关主题。"
-            
-            # 生成完整的HTML
-            html_content = get_html_template().format(
-                keyword=str(keyword),
-                meta_tags=str(meta_tags),
-                timestamp=str(timestamp),
-                search_results=str(search_results),
-                result_count=len(related_searches),
-                json_results=str(json_results),
-                keywords=str(keywords),
-                description=str(description)
-            )
-            
-            # 保存主页HTML
-            html_file = os.path.join(output_dir, 'index.html')
-            with open(html_file, 'w', encoding='utf-8') as f:
-                f.write(html_content)
-                
             # 为每个搜索词创建详细页面
             for term in related_searches:
+                # 其他关键词（或上次运行）已生成过、SERP数据和模板也没有变化的词直接链接，不再请求
+                if link_detail_page(term, detail_dir):
+                    print(f"{term} 的详细页面已存在，直接复用")
+                    continue
                 print(f"正在为 {term} 创建详细页面...")
-                contents = get_article_content(term)
-                if contents:
-                    detail_page = create_detail_page(term, contents, output_dir)
-                    if not detail_page:
-                        print(f"创建 {term} 的详细页面失败")
-                time.sleep(2)  # 加延迟避免请求过快
+                try:
+                    # 单个词重试用尽后仍失败（连接错误、超时等）时跳过，不影响其余的词和导航页
+                    document = get_serp_document(term)
+                    if document is not None and document.items:
+                        if not create_detail_page_from_document(document, output_dir):
+                            print(f"创建 {term} 的详细页面失败")
+                except Exception as e:
+                    print(f"获取 {term} 的详细内容时出错: {str(e)}")
+                if not is_replaying():
+                    time.sleep(2)  # 加延迟避免请求过快
+            registry.save()
             
             # 生成主页
             generate_nav_page('.', [keyword] + related_searches)
+            get_build_graph().save()
             
             return output_dir
             
@@ -1180,22 +1037,12 @@ def save_to_html(keyword, related_searches):
         return None
 
 def get_related_searches(keyword):
-    # 发送HTTP请求获取度搜索页面的HTML内容
-    url = f'http://www.baidu.com/s?wd={keyword}'
-    response = requests.get(url, headers=headers)
+    # 获取关键词的SERP文档（同一页面的解析结果会被后续步骤复用）
+    document = get_serp_document(keyword)
 
     # 检查请求是否成功
-    if response.status_code == 200:
-        # 使用lxml解析HTML内容
-        html = etree.HTML(response.text)
-        
-        # 使用xpath获取相关搜索区域
-        related_searches = html.xpath('//*[@id="rs_new"]/div/table//text()')
-        
-        # 过滤空白字符
-        related_searches = [term.strip() for term in related_searches if term.strip()]
-        
-        return related_searches
+    if document is not None:
+        return document.related_searches
     else:
         print('Failed to retrieve the webpage')
         return []
@@ -1270,7 +1117,7 @@ class PauseController:
         return None
         
     def pause_if_needed(self):
-        if self.should_pause():
+        if self.should_pause() and not is_replaying():
             pause_end = self.get_pause_end_time()
             logging.info(f"已处理{self.batch_size}个关键词，暂停至 {pause_end}")
             print(f"\n已处理{self.batch_size}个关键词，开始暂停1小时...")
@@ -1350,23 +1197,6 @@ class ThreadedSearchManager:
         except Exception as e:
             logging.error(f"处理关键词 '{keyword}' 时出错: {str(e)}")
 
-class ResultCache:
-    def __init__(self, cache_dir='cache'):
-        self.cache_dir = Path(cache_dir)
-        self.cache_dir.mkdir(exist_ok=True)
-        
-    def get(self, key):
-        cache_file = self.cache_dir / f"{key}.pkl"
-        if cache_file.exists():
-            with cache_file.open('rb') as f:
-                return pickle.load(f)
-        return None
-        
-    def set(self, key, value):
-        cache_file = self.cache_dir / f"{key}.pkl"
-        with cache_file.open('wb') as f:
-            pickle.dump(value, f)
-
 class ProxyManager:
     def __init__(self, proxy_list=None):
         self.proxy_list = proxy_list or []
@@ -1380,36 +1210,49 @@ class ProxyManager:
         return proxy
 
 class AsyncSearchClient:
-    """异步搜索客户端"""
-    def __init__(self):
+    """异步搜索客户端
+
+    concurrency 限制同时进行中的请求数，requests_per_minute 是全部请求共享的全局预算，
+    parse_executor 决定HTML解析在哪里进行（thread/process/inline，inline即在事件循环中解析）
+    """
+    def __init__(self, concurrency=4, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE, parse_executor='thread'):
         self.headers = headers  # 使用原有的 headers
-        self.session = None
+        self.budget = RequestBudget(requests_per_minute)
+        self.transport = AsyncTransport(headers=self.headers, budget=self.budget, pool_size=concurrency)
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.parse_executor_kind = parse_executor
+        self.parse_executor = None
+        self.lag_monitor = LoopLagMonitor()
         
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession(headers=self.headers)
+        await self.transport.open()
+        self.parse_executor = create_parse_executor(self.parse_executor_kind)
+        self.lag_monitor.start()
         return self
         
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
-            await self.session.close()
+        await self.lag_monitor.stop()
+        await self.transport.close()
+        if self.parse_executor is not None:
+            self.parse_executor.shutdown()
+        logging.info(f"异步请求统计: {self.transport.stats.as_dict()}, 预算等待 {self.budget.waited_seconds:.1f} 秒")
+        logging.info(f"事件循环延迟({self.parse_executor_kind}解析): {self.lag_monitor.stats()}")
             
-    async def get_article_content_async(self, term):
-        """异步获取文章内容"""
-        url = f'http://www.baidu.com/s?wd={urllib.parse.quote(term)}'
+    async def get_document_async(self, term):
+        """异步获取搜索词的SERP文档（解析在parse_executor中完成）"""
         try:
-            async with self.session.get(url) as response:
-                if response.status == 200:
-                    html = await response.text()
-                    tree = etree.HTML(html)
-                    return self._parse_search_results(tree)
+            async with self.semaphore:
+                return await get_serp_document_async(self.transport, term, self.parse_executor)
         except Exception as e:
             print(f"获取 {term} 内容时出错: {str(e)}")
             return None
-
-    def _parse_search_results(self, html):
-        """保持原有的解析逻辑"""
-        # ... (使用原有的解析代码)
-        pass
+            
+    async def get_article_content_async(self, term):
+        """异步获取文章内容"""
+        document = await self.get_document_async(term)
+        if document is not None:
+            return document.items
+        return None
 
 # 修改 main 函数支持多线程
 def main():
@@ -1440,8 +1283,8 @@ def main():
                     print(f"'{keyword}' 的搜索结果已保存到目录: {output_dir}")
                     print(f"请在浏览器中打开 {os.path.join(output_dir, 'index.html')} 查看搜索结果")
             
-            # 如果不是最后一个关键词，则等待6分钟
-            if i < len(keywords):
+            # 如果不是最后一个关键词，则等待6分钟（回放模式不访问网络，无需等待）
+            if i < len(keywords) and not is_replaying():
                 pause_end = datetime.now() + timedelta(minutes=6)
                 print(f"\n等待6分钟后继续处理下一个关键词...")
                 print(f"预计恢复时间: {pause_end.strftime('%H:%M:%S')}")
@@ -1455,53 +1298,29 @@ def main():
                 
                 print("\n继续处理...")
             
+        return True
+            
     except Exception as e:
         print(f"程序执行出错: {str(e)}")
     finally:
         # 关闭线程池
         thread_manager.thread_pool.shutdown()
-
-# 添加步搜索类
-class AsyncSearchClient:
-    """异步搜索客户端"""
-    def __init__(self):
-        self.headers = headers  # 使用原有的 headers
-        self.session = None
-        
-    async def __aenter__(self):
-        self.session = aiohttp.ClientSession(headers=self.headers)
-        return self
-        
-    async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
-            await self.session.close()
-            
-    async def get_article_content_async(self, term):
-        """异步获取文章内容"""
-        url = f'http://www.baidu.com/s?wd={urllib.parse.quote(term)}'
-        try:
-            async with self.session.get(url) as response:
-                if response.status == 200:
-                    html = await response.text()
-                    tree = etree.HTML(html)
-                    return self._parse_search_results(tree)
-        except Exception as e:
-            print(f"获取 {term} 内容时出错: {str(e)}")
-            return None
-
-    def _parse_search_results(self, html):
-        """保持原有的解析逻辑"""
-        # ... (使用原有的解析代码)
-        pass
+        logging.info(f"抓取缓存统计: {fetch_cache_stats()}")
+        logging.info(f"搜索词复用统计: {get_term_registry().stats()}")
+        logging.info(f"重试统计: {get_retry_policy().stats()}")
+        logging.info(f"增量构建统计: {get_build_graph().stats()}")
+        logging.info(f"结构化数据片段缓存: {fragment_cache_stats()}")
+        logging.info(f"模板压缩节省: {minify_stats()}")
+        logging.info(f"请求统计: {get_transport().stats.as_dict()}")
 
 # 添加异步处理函数
-async def process_keywords_async(keywords):
+async def process_keywords_async(keywords, concurrency=4, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE, parse_executor='thread'):
     """异步处理关键词列表"""
     pause_controller = PauseController()
-    async with AsyncSearchClient() as client:
+    async with AsyncSearchClient(concurrency, requests_per_minute, parse_executor) as client:
         for i, keyword in enumerate(keywords, 1):
             # 检查是否需要暂停
-            if pause_controller.should_pause():
+            if pause_controller.should_pause() and not is_replaying():
                 pause_end = pause_controller.get_pause_end_time()
                 logging.info(f"已处理{pause_controller.batch_size}个关键词，暂停至 {pause_end}")
                 print(f"\n已处理{pause_controller.batch_size}个关键词，开始暂停1小时...")
@@ -1524,49 +1343,25 @@ async def process_keywords_async(keywords):
                     print(f"'{keyword}' 的搜索结果已异步保存到目录: {output_dir}")
             except Exception as e:
                 print(f"异步处理关键词 '{keyword}' 时出错: {str(e)}")
-            
-            # 每个关键词处理后短暂暂停，避免请求过快
-            await asyncio.sleep(2)
 
 # 添加异步主函数
-async def main_async():
+async def main_async(concurrency=4, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE, parse_executor='thread'):
     """异步主函数"""
     try:
         keywords = read_keywords_from_file('1.txt')
         if keywords:
-            await process_keywords_async(keywords)
+            await process_keywords_async(keywords, concurrency, requests_per_minute, parse_executor)
+            return True
     except Exception as e:
         print(f"异步处理错: {str(e)}")
+    finally:
+        logging.info(f"抓取缓存统计: {fetch_cache_stats()}")
+        logging.info(f"搜索词复用统计: {get_term_registry().stats()}")
+        logging.info(f"重试统计: {get_retry_policy().stats()}")
+        logging.info(f"增量构建统计: {get_build_graph().stats()}")
+        logging.info(f"结构化数据片段缓存: {fragment_cache_stats()}")
+        logging.info(f"模板压缩节省: {minify_stats()}")
 
-# 修改原有的 main 函数，添加选择机制
-if __name__ == "__main__":
-    import sys
-    
-    if len(sys.argv) > 1 and sys.argv[1] == '--async':
-        # 使用异步式
-        if sys.platform == 'win32':
-            asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
-        asyncio.run(main_async())
-    else:
-        # 使用多线程模式
-        main()
- 
-class RetryableRequest:
-    def __init__(self, max_retries=3, delay=1):
-        self.max_retries = max_retries
-        self.delay = delay
-        
-    async def execute(self, func, *args, **kwargs):
-        for attempt in range(self.max_retries):
-            try:
-                return await func(*args, **kwargs)
-            except Exception as e:
-                if attempt == self.max_retries - 1:
-                    raise e
-                logging.warning(f"请求失败，{self.delay}秒后重试: {str(e)}")
-                await asyncio.sleep(self.delay)
-                self.delay *= 2  # 指数退避
- 
 class ResultValidator:
     @staticmethod
     def validate_content(content):
@@ -1602,70 +1397,166 @@ class Config:
             'max_retries': 3,
             'delay': 1,
             'max_memory_percent': 75,
-            'cache_enabled': True,
             'proxy_list': []
         }
  
-# 添加新函数用于获取相关搜索词
-def get_related_terms_html(term):
-    """获取相关搜索词并生成HTML"""
-    try:
-        url = f'http://www.baidu.com/s?wd={urllib.parse.quote(term)}'
-        response = requests.get(url, headers=headers)
-        if response.status_code == 200:
-            html = etree.HTML(response.text)
-            # 获取相关搜索词
-            related_terms = html.xpath('//*[@id="rs_new"]/div/table//td/a/span/text()')
-            
-            # 生成HTML
-            terms_html = ''
-            for term in related_terms:
-                if term.strip():
-                    terms_html += f'<a href="?keyword={urllib.parse.quote(term.strip())}" class="related-term">{term.strip()}</a>'
-            
-            return terms_html
-        return ''
-    except Exception as e:
-        print(f"获取相关搜索词时出错: {str(e)}")
-        return ''
- 
 async def get_related_searches_async(client, keyword):
     """异步获取相关搜索词"""
-    url = f'http://www.baidu.com/s?wd={urllib.parse.quote(keyword)}'
+    document = await client.get_document_async(keyword)
+    if document is not None:
+        return document.related_searches
+    return []
+ 
+def link_detail_page(term, detail_dir):
+    """SERP数据和模板都没有变化时，把已生成的详细页面链接到detail_dir并返回路径；需要重新生成时返回None"""
+    pool = get_render_pool()
+    if pool is not None:
+        pool.wait(f'detail:{term}')  # 同一个词正在其他进程中渲染时，等它写完再链接
+    if get_build_graph().is_dirty(f'detail:{term}', [get_render_fingerprint()], [f'serp:{term}']):
+        return None
+    linked = get_term_registry().link_into(term, detail_dir)
+    if linked:
+        get_output_manifest().track(linked)
+    return linked
+
+def create_detail_page_from_document(document, output_dir):
+    """根据SERP文档创建详细页面
+
+    没有启用渲染进程池时在调用线程中渲染和写盘，返回页面路径；启用时交给进程池后立即返回True，
+    页面写好后在回调中登记
+    """
+    term, contents, related_terms = document.term, document.items, document.related_terms
+    if not contents:
+        return None
+    pool = get_render_pool()
+    if pool is not None:
+        pool.submit(f'detail:{term}', create_detail_page, (term, contents, output_dir, related_terms),
+                    lambda detail_page: register_detail_page(term, output_dir, detail_page, contents, related_terms))
+        return True
+    detail_page = create_detail_page(term, contents, output_dir, related_terms)
+    register_detail_page(term, output_dir, detail_page, contents, related_terms)
+    return detail_page
+
+def register_detail_page(term, output_dir, detail_page, contents, related_terms):
+    """记录搜索词的SERP数据，登记生成好的详细页面（在主进程中执行）"""
+    graph = get_build_graph()
+    graph.update(f'serp:{term}', [contents, related_terms])
+    if detail_page:
+        path = os.path.join(output_dir, detail_page)
+        get_term_registry().register(term, path)
+        graph.mark_built(f'detail:{term}', [get_render_fingerprint()], [f'serp:{term}'], [path])
+
+def render_detail_document(term, content, encoding, output_dir):
+    """在渲染进程中解析SERP原始字节并生成详细页面，返回 (页面路径, 结果列表, 相关搜索词)"""
+    document = SerpDocument(term, content, encoding)
+    contents, related_terms = document.items, document.related_terms
+    return create_detail_page(term, contents, output_dir, related_terms), contents, related_terms
+
+def rebuild_from_cache(keywords):
+    """不访问网络，只用抓取缓存（回放模式下为归档）中的数据重新生成所有页面
+
+    关键词主页在主进程中生成，详细页面的解析、渲染和写盘都交给渲染进程池，用满所有CPU核心。
+    模板修改后配合--full-rebuild重新生成全部页面；没有变化的页面照常直接链接或跳过写盘。
+    """
+    pool = get_render_pool()
+    scheduled = set()
+    deferred = []  # 本次已提交渲染的词在其他关键词目录中的链接，等渲染完成后再建立
+    missing = 0
+    for keyword in tqdm(keywords, desc="重新生成", unit="词"):
+        document = get_cached_document(keyword)
+        if document is None or not document.related_searches:
+            logging.warning(f"缓存中没有关键词 {keyword} 的数据，跳过")
+            missing += 1
+            continue
+        related_searches = document.related_searches
+        output_dir = write_keyword_index(keyword, related_searches)
+        if not output_dir:
+            continue
+        detail_dir = os.path.join(output_dir, 'p')
+        for term in related_searches:
+            if term in scheduled:
+                deferred.append((term, detail_dir))
+                continue
+            if link_detail_page(term, detail_dir):
+                continue
+            cached = get_cached_document(term)
+            if cached is None:
+                missing += 1
+                continue
+            scheduled.add(term)
+            pool.submit(f'detail:{term}', render_detail_document, (term, cached.content, cached.encoding, output_dir),
+                        lambda result, term=term, output_dir=output_dir: register_detail_page(term, output_dir, *result))
+
+    pool.join()
+    for term, detail_dir in deferred:
+        link_detail_page(term, detail_dir)
+    get_term_registry().save()
+    generate_nav_page('.', keywords)
+    get_build_graph().save()
+    if missing:
+        logging.warning(f"缓存中缺少 {missing} 个词的数据，对应页面没有重新生成")
+    return True
+
+def main_rebuild():
+    """从缓存重新生成1.txt中所有关键词的页面"""
     try:
-        async with client.session.get(url) as response:
-            if response.status == 200:
-                html = await response.text()
-                tree = etree.HTML(html)
-                related_searches = tree.xpath('//*[@id="rs_new"]/div/table//text()')
-                return [term.strip() for term in related_searches if term.strip()]
+        keywords = read_keywords_from_file('1.txt')
+        if not keywords:
+            print("未能从1.txt读取到关键词")
+            return
+        return rebuild_from_cache(keywords)
     except Exception as e:
-        print(f"获取相关搜索词时出错: {str(e)}")
-        return []
- 
+        print(f"重新生成页面出错: {str(e)}")
+    finally:
+        logging.info(f"抓取缓存统计: {fetch_cache_stats()}")
+        logging.info(f"搜索词复用统计: {get_term_registry().stats()}")
+        logging.info(f"增量构建统计: {get_build_graph().stats()}")
+        logging.info(f"结构化数据片段缓存: {fragment_cache_stats()}")
+        logging.info(f"模板压缩节省: {minify_stats()}")
+
 async def save_to_html_async(keyword, related_searches, client):
-    """异步版本的save_to_html函数"""
+    """异步版本的save_to_html函数
+
+    详细页面并发抓取（受信号量和全局请求预算限制），解析、渲染和写盘放到线程池，
+    与其他词的网络等待重叠进行
+    """
     try:
         if not keyword or not related_searches:
             return None
             
-        # 复用原有的目录创建逻辑
-        dir_name = generate_seo_filename(keyword)
-        output_dir = f's_{dir_name}'
-        css_dir = os.path.join(output_dir, 'c')
-        details_dir = os.path.join(output_dir, 'p')
+        loop = asyncio.get_running_loop()
         
-        # 建目录
-        for directory in [output_dir, css_dir, details_dir]:
-            os.makedirs(directory, exist_ok=True)
+        # 创建目录并生成主页
+        output_dir = await loop.run_in_executor(None, write_keyword_index, keyword, related_searches)
+        if not output_dir:
+            return None
             
-        # 保存CSS文件
-        css_file = os.path.join(css_dir, 'style.css')
-        with open(css_file, 'w', encoding='utf-8') as f:
-            f.write(get_css_content())
+        registry = get_term_registry()
+        detail_dir = os.path.join(output_dir, 'p')
+        
+        async def build_detail_page(term):
+            # 已生成过、输入也没有变化的词直接链接，不占用请求预算
+            if await loop.run_in_executor(None, link_detail_page, term, detail_dir):
+                return
+            try:
+                document = await client.get_document_async(term)
+                if document is None:
+                    return
+                detail_page = await loop.run_in_executor(None, create_detail_page_from_document, document, output_dir)
+            except Exception as e:
+                # 单个词失败时跳过，不让gather中断其余的词和导航页
+                print(f"获取 {term} 的详细内容时出错: {str(e)}")
+                return
+            if not detail_page:
+                print(f"创建 {term} 的详细页面失败")
+        
+        # 为每个搜索词创建详细页面
+        await asyncio.gather(*(build_detail_page(term) for term in related_searches))
+        await loop.run_in_executor(None, registry.save)
         
-        # 使用nav_generator生成导航页面
-        generate_nav_page('.', [keyword] + related_searches)
+        # 生成导航页面（保存在根目录）
+        await loop.run_in_executor(None, generate_nav_page, '.', [keyword] + related_searches)
+        await loop.run_in_executor(None, get_build_graph().save)
         
         return output_dir
         
@@ -1680,15 +1571,14 @@ def generate_sitemap(output_dir, urls):
     {urls}
 </urlset>'''
     
-    with open(os.path.join(output_dir, 'sitemap.xml'), 'w', encoding='utf-8') as f:
-        f.write(sitemap_content)
+    write_text(os.path.join(output_dir, 'sitemap.xml'), sitemap_content)
 
 def create_sitemap_url(loc, lastmod=None, changefreq='daily', priority='0.8'):
     """创建单个URL的sitemap条目"""
     return f'''
     <url>
         <loc>{loc}</loc>
-        <lastmod>{lastmod or datetime.now().strftime('%Y-%m-%d')}</lastmod>
+        <lastmod>{lastmod or build_now().strftime('%Y-%m-%d')}</lastmod>
         <changefreq>{changefreq}</changefreq>
         <priority>{priority}</priority>
     </url>'''
@@ -1717,8 +1607,7 @@ User-agent: Sogou web spider
 Crawl-delay: 0.5
 Allow: /'''
 
-    with open(os.path.join(output_dir, 'robots.txt'), 'w', encoding='utf-8') as f:
-        f.write(robots_content)
+    write_text(os.path.join(output_dir, 'robots.txt'), robots_content)
  
 def create_internal_links(related_searches, current_term):
     """创建内部链接HTML"""
@@ -1729,25 +1618,6 @@ def create_internal_links(related_searches, current_term):
             links.append(f'<a href="../p/{filename}.html" class="internal-link">{term}</a>')
     return '\n'.join(links)
  
-def get_html_template():
-    return '''
-    <!-- ... 现有代码 ... -->
-    <nav class="breadcrumb">
-        <a href="../index.html">首页</a> > 
-        <a href="index.html">搜索果</a> > 
-        {keyword}
-    </nav>
-    
-    <!-- 添加相关页面链接 -->
-    <div class="related-pages">
-        <h3>相关页面</h3>
-        <div class="related-links">
-            {internal_links}
-        </div>
-    </div>
-    <!-- ... 现有代码 ... -->
-    '''
- 
 def generate_rss_feed(output_dir, items, title="最新搜索结果"):
     """生成RSS feed"""
     rss_content = f'''<?xml version="1.0" encoding="UTF-8" ?>
@@ -1757,13 +1627,12 @@ def generate_rss_feed(output_dir, items, title="最新搜索结果"):
     <link>./</link>
     <description>最新搜索结果更新</description>
     <language>zh-CN</language>
-    <pubDate>{datetime.now().strftime('%a, %d %b %Y %H:%M:%S +0800')}</pubDate>
+    <pubDate>{build_now().strftime('%a, %d %b %Y %H:%M:%S +0800')}</pubDate>
     {items}
 </channel>
 </rss>'''
     
-    with open(os.path.join(output_dir, 'feed.xml'), 'w', encoding='utf-8') as f:
-        f.write(rss_content)
+    write_text(os.path.join(output_dir, 'feed.xml'), rss_content)
  
 def get_advanced_structured_data(keyword, related_searches, contents):
     """生成更丰富的结构化数据"""
@@ -1826,8 +1695,8 @@ def create_semantic_html(content):
         <header>
             <h1 itemprop="headline">{content['title']}</h1>
             <div class="meta">
-                <time itemprop="datePublished" datetime="{datetime.now().isoformat()}">
-                    {datetime.now().strftime('%Y-%m-%d')}
+                <time itemprop="datePublished" datetime="{build_now().isoformat()}">
+                    {build_now().strftime('%Y-%m-%d')}
                 </time>
                 <span itemprop="author" itemscope itemtype="http://schema.org/Person">
                     <meta itemprop="name" content="Search Results Generator">
@@ -1869,8 +1738,7 @@ def calculate_relevance(keyword, term):
 def add_update_info(output_dir):
     """添加更新时间信息"""
     update_file = os.path.join(output_dir, 'last_update.txt')
-    with open(update_file, 'w', encoding='utf-8') as f:
-        f.write(datetime.now().isoformat())
+    write_text(update_file, build_now().isoformat())
     
     # 同时更新sitemap
     update_sitemap_dates(output_dir)
@@ -1880,13 +1748,14 @@ def optimize_url_structure(term):
     # 使用拼音转换
     pinyin = '-'.join(lazy_pinyin(term))
     # 添加日期
-    date = datetime.now().strftime('%Y%m')
+    date = build_now().strftime('%Y%m')
     # 生成最终URL
     return f"{date}/{pinyin}.html"
  
 def update_sitemap_dates(output_dir):
     """更新sitemap中的时间戳"""
     sitemap_file = os.path.join(output_dir, 'sitemap.xml')
+    get_output_manifest().wait(sitemap_file)
     if not os.path.exists(sitemap_file):
         return
         
@@ -1895,16 +1764,125 @@ def update_sitemap_dates(output_dir):
             content = f.read()
             
         # 更新所有lastmod标签的日期为当前日期
-        current_date = datetime.now().strftime('%Y-%m-%d')
+        current_date = build_now().strftime('%Y-%m-%d')
         updated_content = re.sub(
             r'<lastmod>.*?</lastmod>',
             f'<lastmod>{current_date}</lastmod>',
             content
         )
         
-        with open(sitemap_file, 'w', encoding='utf-8') as f:
-            f.write(updated_content)
+        write_text(sitemap_file, updated_content)
             
     except Exception as e:
         logging.error(f"更新sitemap日期时出错: {str(e)}")
- 
\ No newline at end of file
+
+# 修改原有的 main 函数，添加选择机制
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='根据1.txt中的关键词生成搜索结果聚合页面')
+    parser.add_argument('--async', dest='use_async', action='store_true', help='使用异步模式')
+    parser.add_argument('--concurrency', type=int, default=4, help='异步模式下同时进行的请求数')
+    parser.add_argument('--rpm', type=int, default=DEFAULT_REQUESTS_PER_MINUTE, help='异步模式下每分钟的请求预算')
+    parser.add_argument('--parse-executor', choices=['thread', 'process', 'inline'], default='thread',
+                        help='异步模式下HTML解析的执行方式（inline为直接在事件循环中解析）')
+    archive_group = parser.add_mutually_exclusive_group()
+    archive_group.add_argument('--record', metavar='ARCHIVE', help='把抓取到的所有响应写入归档文件')
+    archive_group.add_argument('--replay', metavar='ARCHIVE', help='只从归档文件读取响应，不访问网络')
+    parser.add_argument('--term-registry', default=DEFAULT_REGISTRY_PATH,
+                        help='搜索词登记表文件，已生成过详细页面的词直接链接复用')
+    parser.add_argument('--no-cache', action='store_true', help='关闭抓取缓存，每次都重新请求')
+    parser.add_argument('--max-attempts', type=int, default=DEFAULT_MAX_ATTEMPTS,
+                        help='每个请求最多尝试的次数（只对连接失败、超时、429和5xx重试）')
+    parser.add_argument('--manifest', default=DEFAULT_MANIFEST_PATH,
+                        help='输出文件清单，内容没有变化的文件不再重写')
+    parser.add_argument('--remove-stale', action='store_true',
+                        help='完整运行结束后删除清单中本次没有生成的旧文件')
+    parser.add_argument('--build-graph', default=DEFAULT_GRAPH_PATH,
+                        help='增量构建依赖图文件，输入没有变化的页面不再重新生成')
+    parser.add_argument('--full-rebuild', action='store_true', help='忽略依赖图，重新生成所有页面')
+    parser.add_argument('--json-encoder', choices=sorted(ENCODERS),
+                        help='结构化数据使用的JSON编码器（默认装了orjson就用orjson，输出相同）')
+    parser.add_argument('--precompress', action='store_true',
+                        help='在后台为HTML、CSS和XML文件生成.gz预压缩副本（装了brotli时同时生成.br）')
+    parser.add_argument('--precompress-workers', type=int, help='预压缩线程数（默认为CPU核数）')
+    parser.add_argument('--writer-threads', type=int, default=1,
+                        help='后台写文件线程数，渲染线程不必等待磁盘；0表示在渲染线程中直接写盘')
+    parser.add_argument('--fsync', choices=FSYNC_POLICIES, default='never',
+                        help='后台写入的落盘策略：never交给操作系统，batch每批写完sync一次，always每个文件都fsync')
+    parser.add_argument('--bundle', metavar='PATH',
+                        help='构建结束后把所有输出文件打包到PATH（只追加变化的文件），部署时只需复制这一个文件，'
+                             '可用bundle_server.py直接提供服务')
+    parser.add_argument('--delta', metavar='OUT',
+                        help='构建结束后导出相对上次部署变化的文件：OUT.json（新增/变化/删除的文件及哈希、大小）'
+                             '和OUT.tar.gz（只含新增和变化的文件）')
+    parser.add_argument('--deploy-state', default=DEFAULT_STATE_PATH, help='上次导出变更时保存的部署状态文件')
+    parser.add_argument('--layout', choices=LAYOUT_STRATEGIES, default='flat',
+                        help='关键词站点的目录布局：flat直接放在当前目录下（s_<目录名>/），'
+                             'hashed按目录名哈希分到两级子目录（ab/cd/s_<目录名>/），关键词很多时减轻单个目录的负担')
+    parser.add_argument('--render-workers', type=int, default=0,
+                        help='渲染进程数，大于0时详细页面的渲染和写盘交给进程池，与抓取并行（默认在抓取线程中渲染）')
+    parser.add_argument('--rebuild', action='store_true',
+                        help='不访问网络，只用抓取缓存（或--replay归档）中的数据重新生成所有页面，'
+                             '渲染进程数默认为CPU核数；模板修改后配合--full-rebuild使用')
+    parser.add_argument('--build-time', type=parse_build_time, help='固定页面中的构建时间（ISO格式或Unix时间戳，也可用BUILD_TIME环境变量），'
+                                             '相同输入可生成逐字节相同的文件')
+    args = parser.parse_args()
+    
+    set_build_time(args.build_time)
+    writer = OutputWriter(args.writer_threads, fsync=args.fsync) if args.writer_threads > 0 else None
+    set_output_manifest(OutputManifest(args.manifest, remove_stale=args.remove_stale, writer=writer))
+    set_build_graph(BuildGraph(args.build_graph, force=args.full_rebuild))
+    set_site_layout(SiteLayout(args.layout, root='.'))
+    set_json_encoder(args.json_encoder)
+    if args.precompress:
+        set_precompressor(Precompressor(get_output_manifest(), args.precompress_workers))
+    if args.render_workers > 0 or args.rebuild:
+        set_render_pool(RenderPool(args.render_workers or None))
+    set_term_registry(TermRegistry(args.term_registry))
+    if args.no_cache:
+        set_fetch_cache(None)
+    set_retry_policy(RetryPolicy(RETRYABLE_ERRORS, max_attempts=args.max_attempts, breaker=CircuitBreaker()))
+    
+    if args.record:
+        configure_archive(args.record, 'record')
+    elif args.replay:
+        configure_archive(args.replay, 'replay')
+    
+    completed = False
+    try:
+        if args.rebuild:
+            completed = main_rebuild()
+        elif args.use_async:
+            # 使用异步式
+            if sys.platform == 'win32':
+                asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+            completed = asyncio.run(main_async(args.concurrency, args.rpm, args.parse_executor))
+        else:
+            # 使用多线程模式
+            completed = main()
+    finally:
+        close_archive()
+        render_pool = get_render_pool()
+        if render_pool is not None:
+            logging.info(f"渲染进程池统计: {render_pool.close()}")
+            get_term_registry().save()
+        get_build_graph().save()
+        # 先让后台写线程写完，所有页面的预压缩任务才都已提交
+        get_output_manifest().flush()
+        precompressor = get_precompressor()
+        if precompressor is not None:
+            logging.info(f"预压缩统计: {precompressor.close()}")
+        if writer is not None:
+            logging.info(f"后台写入统计: {writer.close()}")
+        logging.info(f"输出文件统计: {get_output_manifest().finish(complete=bool(completed))}")
+        if args.bundle:
+            try:
+                logging.info(f"打包统计: {pack_site(get_output_manifest().files(), args.bundle)}")
+            except Exception as e:
+                logging.error(f"打包到 {args.bundle} 失败: {str(e)}")
+        if args.delta:
+            try:
+                logging.info(f"变更导出统计: {export_delta(get_output_manifest().snapshot(), args.delta, args.deploy_state)}")
+            except Exception as e:
+                logging.error(f"导出变更到 {args.delta} 失败: {str(e)}")
@@ -0,0 +1,108 @@
+import json
+import logging
+import os
+import threading
+
+class ResponseArchive:
+    """抓取响应归档：所有响应按URL追加写入一个数据文件，另有偏移索引文件
+
+    数据文件中每条记录是一行JSON头（url/status/length）加上length字节的原始响应体；
+    索引文件 <归档>.idx 每行记录一个URL在数据文件中的偏移。索引缺失或损坏时从数据文件重建。
+    同一URL多次写入时以最后一次为准。
+    """
+    def __init__(self, path, writable=False):
+        self.path = path
+        self.index_path = path + '.idx'
+        self.writable = writable
+        self.lock = threading.Lock()
+        self.index = {}  # url -> (status, 响应体偏移, 长度)
+        self.recorded = 0
+        self.replayed = 0
+        self.missing = 0
+
+        if writable:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.data_file = open(path, 'ab+')
+            self.index_file = open(self.index_path, 'a', encoding='utf-8')
+        else:
+            self.data_file = open(path, 'rb')
+            self.index_file = None
+        self._load_index()
+
+    def _load_index(self):
+        """读取偏移索引，与数据文件长度对不上时重新扫描数据文件"""
+        data_size = os.path.getsize(self.path)
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    entry = json.loads(line)
+                    if entry['offset'] + entry['length'] > data_size:
+                        raise ValueError('索引超出数据文件范围')
+                    self.index[entry['url']] = (entry['status'], entry['offset'], entry['length'])
+            return
+        except FileNotFoundError:
+            if data_size == 0:
+                return
+        except (ValueError, KeyError) as e:
+            logging.warning(f"归档索引 {self.index_path} 无效，重新扫描: {str(e)}")
+
+        self.index = {}
+        self.data_file.seek(0)
+        offset = 0
+        while offset < data_size:
+            header_line = self.data_file.readline()
+            if not header_line.endswith(b'\n'):
+                break
+            header = json.loads(header_line)
+            body_offset = offset + len(header_line)
+            if body_offset + header['length'] > data_size:
+                break  # 最后一条记录未写完整
+            self.index[header['url']] = (header['status'], body_offset, header['length'])
+            offset = body_offset + header['length']
+            self.data_file.seek(offset)
+
+    def record(self, url, status, content):
+        """追加一条响应记录"""
+        header = json.dumps({'url': url, 'status': status, 'length': len(content)}, ensure_ascii=False)
+        header_bytes = header.encode('utf-8') + b'\n'
+        with self.lock:
+            self.data_file.seek(0, os.SEEK_END)
+            offset = self.data_file.tell() + len(header_bytes)
+            self.data_file.write(header_bytes)
+            self.data_file.write(content)
+            self.data_file.flush()
+            self.index[url] = (status, offset, len(content))
+            self.index_file.write(json.dumps({'url': url, 'status': status, 'offset': offset, 'length': len(content)}, ensure_ascii=False) + '\n')
+            self.index_file.flush()
+            self.recorded += 1
+
+    def lookup(self, url):
+        """读取URL对应的 (status, 响应体)，没有记录时返回None"""
+        with self.lock:
+            entry = self.index.get(url)
+            if entry is None:
+                self.missing += 1
+                return None
+            status, offset, length = entry
+            self.data_file.seek(offset)
+            content = self.data_file.read(length)
+            self.replayed += 1
+            return status, content
+
+    def stats(self):
+        """归档读写统计"""
+        with self.lock:
+            return {
+                'entries': len(self.index),
+                'recorded': self.recorded,
+                'replayed': self.replayed,
+                'missing': self.missing
+            }
+
+    def close(self):
+        with self.lock:
+            self.data_file.close()
+            if self.index_file:
+                self.index_file.close()
@@ -0,0 +1,34 @@
+import hashlib
+import os
+
+from output_manifest import temp_path_for
+
+# 静态资源目录（相对于站点根目录）
+ASSET_DIR = 'assets'
+
+def content_hash(data, length=10):
+    """资源内容的短哈希，用于文件名"""
+    return hashlib.sha1(data).hexdigest()[:length]
+
+def publish_asset(content, name, suffix, site_root='.', asset_dir=ASSET_DIR):
+    """写入带内容哈希的静态资源 <site_root>/assets/<name>.<hash><suffix>，返回文件路径
+
+    文件名随内容变化，内容不变时文件名也不变，可以放心设置长期缓存（Cache-Control: immutable）。
+    同名文件已存在说明内容相同，不再重复写入。
+    """
+    data = content.encode('utf-8') if isinstance(content, str) else content
+    directory = os.path.join(site_root, asset_dir)
+    path = os.path.join(directory, f'{name}.{content_hash(data)}{suffix}')
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(directory, exist_ok=True)
+    temp_path = temp_path_for(path)
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+    return path
+
+def asset_href(path, page_dir):
+    """从page_dir中的页面引用资源时使用的相对链接"""
+    return os.path.relpath(path, page_dir).replace(os.sep, '/')
@@ -0,0 +1,645 @@
+"""页面渲染的微基准：原先的f-string/str.format拼接（旧实现） vs 预编译模板（templates.Template）
+
+用法: python bench/bench_render.py [轮数]
+
+用fixtures/serp_*.html解析出的真实结果渲染详细页面和关键词主页。基准会先固定时钟确认两种实现
+输出的HTML完全一致（新模板的静态部分在编译时压缩，两边都经过minify_html再比较），
+再分别报告每秒可渲染的页面数。两种实现交替运行REPEATS次，各取最快的一次，提速取每次交替运行之比的中位数。抓取命中缓存之后，渲染就是主要开销。
+
+旧实现不是最初版本的逐字副本：为了能逐字节比较，样式表链接、构建时间和结构化数据等页面结构的改动
+都同步到了旧实现中，测出的只是整页f-string与预编译模板两种渲染方式的差别。
+"""
+import functools
+import glob
+import importlib.util
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.join(BENCH_DIR, '..')
+FIXTURE_DIR = os.path.join(BENCH_DIR, 'fixtures')
+
+sys.path.insert(0, ROOT_DIR)
+
+from build_clock import set_build_time
+from serp import SerpDocument
+from structured_data import dumps, detail_page_graph, result_records
+from html_minify import minify_html
+
+def load_site_module():
+    """加载1.py中的渲染函数（在临时目录中导入，日志和关键词文件都不会写到仓库里）"""
+    os.chdir(tempfile.mkdtemp())
+    open('1.txt', 'w', encoding='utf-8').close()
+    spec = importlib.util.spec_from_file_location('site_pages', os.path.join(ROOT_DIR, '1.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+site = load_site_module()
+
+# 文件名生成（拼音转换、读取1.txt）与模板无关，新旧实现共用同一份缓存结果，只比较渲染本身
+site.generate_seo_filename = functools.lru_cache(maxsize=None)(site.generate_seo_filename)
+generate_seo_filename = site.generate_seo_filename
+create_json_results = site.create_json_results
+
+def legacy_render_detail_page(term, contents, filename, related_terms_html, stylesheet):
+    """旧版create_detail_page中的渲染部分：整页f-string，每个位置各取一次当前时间（页面结构与现行模板同步）"""
+    safe_term = filename
+    # 生成内容HTML
+    content_html = ""
+    
+    # 集所有标题和摘要用于SEO
+    all_titles = [content['title'] for content in contents if content.get('title')]
+    all_abstracts = [content['abstract'] for content in contents if content.get('abstract')]
+    
+    # 生成更丰富的meta描述
+    meta_description = f"{term}的详细内容。包含{len(contents)}个相关结果："
+    meta_description += ''.join(all_titles[:3]) + "等。"
+    if all_abstracts:
+        meta_description += all_abstracts[0][:100] + "..."
+        
+    # 生成更丰富的关键词
+    meta_keywords = dict.fromkeys([term])
+    meta_keywords.update(dict.fromkeys(all_titles))
+    meta_keywords.update(dict.fromkeys([word for title in all_titles for word in title if len(word) > 1]))
+    meta_keywords_str = ', '.join(list(meta_keywords)[:20])  # 限制关键字量
+    
+    for content in contents:
+        # 生成更语义化的HTML内容
+        content_html += f'''
+            <article class="search-result" itemscope itemtype="http://schema.org/Article">
+                <h2 itemprop="headline">{content['source']}{content['title']}</h2>
+                <div class="content-body">
+                    <p itemprop="description" class="abstract">{content['abstract']}</p>
+                    <div class="meta-info">
+                        <span class="source" itemprop="publisher" itemscope itemtype="http://schema.org/Organization">
+                            来源：<span itemprop="name">{content['source']}</span>
+                        </span>
+                        <time itemprop="datePublished" datetime="{datetime.now().isoformat()}">
+                            发布时间：{datetime.now().strftime('%Y-%m-%d')}
+                        </time>
+                    </div>
+                    <p class="source-link">
+                        原文链接：<a href="{content['url']}" target="_blank" rel="noopener noreferrer" itemprop="url">{content['url']}</a>
+                    </p>
+                </div>
+            </article>
+            '''
+    
+    # 在生成HTML内容时使用相关搜索词
+    content_html += f'''
+            <!-- 在footer前���加相关搜索部分 -->
+            <div class="related-searches">
+                <h3>相关搜索</h3>
+                <div class="related-terms">
+                    {related_terms_html}
+                </div>
+            </div>
+        '''
+    
+    # 详细页面的HTML模板，添加更多SEO优化
+    return f'''
+<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+    <meta charset="UTF-8">
+    <title>{term} - 相关内容详细信息 - 最新整理</title>
+    
+    <!-- 增强的SEO Meta标签 -->
+    <meta name="keywords" content="{meta_keywords_str}">
+    <meta name="description" content="{meta_description}">
+    <meta name="robots" content="index, follow, max-snippet:-1, max-image-preview:large, max-video-preview:-1">
+    <meta name="author" content="Search Results Generator">
+    <meta name="baidu-site-verification" content="codeva-5Tx3gC2Tal" content="code-{datetime.now().strftime('%Y%m%d')}/>
+    <meta name="msvalidate.01" content="71A98B01C97FA508E1DF9917FB8E0C00" content="code-{datetime.now().strftime('%Y%m%d')}/>
+    <meta name="google-site-verification" content="dYg1tNb5pqr-ZRMcNAbVqPEk0kt6_Us3lTUpzuUri2U" content="code-{datetime.now().strftime('%Y%m%d')}/>
+    
+    <!-- Open Graph Meta标签强 -->
+    <meta property="og:title" content="{term} - 最新相关内容汇总">
+    <meta property="og:description" content="{meta_description}">
+    <meta property="og:type" content="article">
+    <meta property="og:url" content="{safe_term}.html">
+    <meta property="og:site_name" content="搜索结果聚合">
+    <meta property="article:published_time" content="{datetime.now().isoformat()}">
+    <meta property="article:modified_time" content="{datetime.now().isoformat()}">
+    <meta property="og:locale" content="zh_CN">
+    
+    <!-- Twitter Card Meta标签增强 -->
+    <meta name="twitter:card" content="summary_large_image">
+    <meta name="twitter:title" content="{term} - 最新相关内容汇总">
+    <meta name="twitter:description" content="{meta_description}">
+    
+    <!-- 其他重要Meta标签 -->
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <meta http-equiv="X-UA-Compatible" content="IE=edge">
+    <meta name="format-detection" content="telephone=no">
+    <meta name="mobile-web-app-capable" content="yes">
+    <meta name="apple-mobile-web-app-capable" content="yes">
+    
+    <!-- ��度特定Meta标签 -->
+    <meta http-equiv="Cache-Control" content="no-transform">
+    <meta http-equiv="Cache-Control" content="no-siteapp">
+    <meta name="applicable-device" content="pc,mobile">
+    <meta name="MobileOptimized" content="width">
+    <meta name="HandheldFriendly" content="true">
+    
+    <link rel="stylesheet" href="{stylesheet}">
+    <link rel="canonical" href="{filename}.html">
+    
+    <!-- 增强的结构化数据 -->
+    <script type="application/ld+json">
+    {dumps(detail_page_graph(term, result_records(contents), meta_description, datetime.now().isoformat()))}
+    </script>
+</head>
+<body class="detail-page">
+    <div class="container">
+        <nav class="breadcrumb">
+            <a href="../index.html">首页</a> > {term}
+        </nav>
+        <article>
+            <h1>{term}</h1>
+            <div class="article-meta">
+                发布时间：{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+            </div>
+            <main>
+                {content_html}
+            </main>
+            
+            <footer>
+                <p><a href="../index.html">返回搜索结果</a></p>
+            </footer>
+        </article>
+    </div>
+</body>
+</html>
+'''
+
+def legacy_get_html_template():
+    return '''
+<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+    <meta charset="UTF-8">
+    <title>{keyword} - 搜索结果聚合 | 最新整理 {timestamp}</title>
+    
+    <!-- 增强的SEO Meta标签 -->
+    <meta name="keywords" content="{keywords}, 搜索结果, 相关内容, 最新资讯">
+    <meta name="description" content="{description} 更新时间: {timestamp}. 提供最新、最全面的相关内容整理与分析。">
+    <meta name="robots" content="index, follow, max-snippet:-1, max-image-preview:large, max-video-preview:-1">
+    <meta name="author" content="Search Results Generator">
+    <meta name="revisit-after" content="1 days">
+    <meta name="generator" content="Search Results Generator 1.0">
+    <meta name="copyright" content="Search Results Generator">
+    <meta name="rating" content="general">
+    <meta name="distribution" content="global">
+    
+    <!-- 新增百度特定Meta标签 -->
+    <meta name="bytedance-verification-code" content="验证码">
+    <meta name="baidu-site-verification" content="验证码">
+    <meta name="360-site-verification" content="验证码">
+    <meta name="sogou_site_verification" content="验证码">
+    
+    <!-- 强的Open Graph Meta标签 -->
+    <meta property="og:title" content="{keyword} - 最新搜索结果聚合 | {timestamp}">
+    <meta property="og:description" content="{description}">
+    <meta property="og:type" content="website">
+    <meta property="og:url" content="index.html">
+    <meta property="og:site_name" content="搜索结果聚合">
+    <meta property="og:locale" content="zh_CN">
+    <meta property="og:updated_time" content="{timestamp}">
+    <meta property="og:image" content="logo.png">
+    <meta property="og:image:type" content="image/png">
+    
+    <!-- 增强的结构化数据 -->
+    <script type="application/ld+json">
+    {{
+        "@context": "https://schema.org",
+        "@type": "WebSite",
+        "name": "搜索结果聚合",
+        "alternateName": ["搜索聚合", "内容聚合"],
+        "url": "./",
+        "potentialAction": {{
+            "@type": "SearchAction",
+            "target": {{
+                "@type": "EntryPoint",
+                "urlTemplate": "?keyword={{search_term_string}}"
+            }},
+            "query-input": "required name=search_term_string"
+        }},
+        "publisher": {{
+            "@type": "Organization",
+            "name": "Search Results Generator",
+            "logo": {{
+                "@type": "ImageObject",
+                "url": "logo.png"
+            }}
+        }},
+        "mainEntity": {{
+            "@type": "ItemList",
+            "itemListElement": {json_results},
+            "numberOfItems": {result_count}
+        }},
+        "datePublished": "{timestamp}",
+        "dateModified": "{timestamp}",
+        "inLanguage": "zh-CN"
+    }}
+    </script>
+
+    <!-- 添加Breadcrumb结构化数 -->
+    <script type="application/ld+json">
+    {{
+        "@context": "https://schema.org",
+        "@type": "BreadcrumbList",
+        "itemListElement": [
+            {{
+                "@type": "ListItem",
+                "position": 1,
+                "name": "首页",
+                "item": "./"
+            }},
+            {{
+                "@type": "ListItem",
+                "position": 2,
+                "name": "{keyword}",
+                "item": "?keyword={keyword}"
+            }}
+        ]
+    }}
+    </script>
+
+    <!-- 添加FAQ结构化数据 -->
+    <script type="application/ld+json">
+    {{
+        "@context": "https://schema.org",
+        "@type": "FAQPage",
+        "mainEntity": [
+            {{
+                "@type": "Question",
+                "name": "如何使用搜索功能",
+                "acceptedAnswer": {{
+                    "@type": "Answer",
+                    "text": "在搜索框中输入关键词，点击搜索按钮或按回车键即可开始搜索。"
+                }}
+            }},
+            {{
+                "@type": "Question",
+                "name": "搜索结果如何排序？",
+                "acceptedAnswer": {{
+                    "@type": "Answer",
+                    "text": "搜索结果按照相关度排序，最相关的内容会显示在最前面。"
+                }}
+            }}
+        ]
+    }}
+    </script>
+    
+    <link rel="stylesheet" href="{stylesheet}">
+    <link rel="canonical" href="index.html">
+    <link rel="preconnect" href="https://fonts.googleapis.com">
+    <link href="https://fonts.googleapis.com/css2?family=Noto+Sans+SC:wght@400;500;700&display=swap" rel="stylesheet">
+    
+    <style>
+        /* 全局样式优化 */
+        body {{
+            font-family: 'Noto Sans SC', sans-serif;
+            background: #f8f9fa;
+            color: #202124;
+        }}
+        
+        /* 搜索框样式优化 */
+        .search-box {{
+            margin: 30px auto;
+            max-width: 650px;
+            padding: 25px;
+            background: white;
+            border-radius: 12px;
+            box-shadow: 0 2px 8px rgba(0,0,0,0.08);
+            transition: box-shadow 0.3s;
+        }}
+        .search-box:hover {{
+            box-shadow: 0 4px 12px rgba(0,0,0,0.12);
+        }}
+        .search-form {{
+            display: flex;
+            gap: 12px;
+            align-items: center;
+        }}
+        .search-input {{
+            flex: 1;
+            padding: 12px 20px;
+            border: 2px solid #e8eaed;
+            border-radius: 30px;
+            font-size: 16px;
+            outline: none;
+            transition: all 0.3s;
+        }}
+        .search-input:focus {{
+            border-color: #1a73e8;
+            box-shadow: 0 0 0 4px rgba(26,115,232,0.1);
+        }}
+        .search-button {{
+            padding: 12px 24px;
+            background: #1a73e8;
+            color: white;
+            border: none;
+            border-radius: 30px;
+            font-size: 16px;
+            font-weight: 500;
+            cursor: pointer;
+            transition: all 0.3s;
+        }}
+        .search-button:hover {{
+            background: #1557b0;
+            transform: translateY(-1px);
+            box-shadow: 0 2px 6px rgba(26,115,232,0.3);
+        }}
+        
+        /* 果列表样式优化 */
+        .result-item {{
+            background: white;
+            padding: 20px 25px;
+            margin-bottom: 15px;
+            border-radius: 12px;
+            border: 1px solid #e8eaed;
+        }}
+        .result-link {{
+            font-size: 18px;
+            color: #1a73e8;
+            text-decoration: none;
+            display: block;
+            margin-bottom: 10px;
+            font-weight: 500;
+            border-bottom: 2px solid transparent;
+        }}
+        .result-link:hover {{
+            border-bottom-color: #1a73e8;
+        }}
+        .result-snippet {{
+            color: #5f6368;
+            line-height: 1.6;
+            font-size: 15px;
+        }}
+        
+        /* 页面布局优化 */
+        .container {{
+            max-width: 850px;
+            margin: 0 auto;
+            padding: 20px;
+        }}
+        .search-info {{
+            text-align: center;
+            margin: 30px 0;
+            padding: 25px;
+            background: white;
+            border-radius: 12px;
+            box-shadow: 0 2px 8px rgba(0,0,0,0.06);
+        }}
+        .search-keyword {{
+            color: #1a73e8;
+            font-size: 26px;
+            font-weight: 700;
+            margin-bottom: 12px;
+        }}
+        .search-time {{
+            color: #5f6368;
+            font-size: 15px;
+        }}
+        .footer {{
+            text-align: center;
+            padding: 25px;
+            color: #5f6368;
+            background: white;
+            border-radius: 12px;
+            margin-top: 40px;
+            box-shadow: 0 2px 8px rgba(0,0,0,0.06);
+        }}
+        
+        /* 加载状态样式 */
+        .search-status {{
+            margin-top: 15px;
+            text-align: center;
+            color: #5f6368;
+            font-size: 14px;
+        }}
+        .loading {{
+            display: inline-block;
+            width: 20px;
+            height: 20px;
+            border: 3px solid #f3f3f3;
+            border-top: 3px solid #1a73e8;
+            border-radius: 50%;
+            animation: spin 1s linear infinite;
+            margin-right: 8px;
+            vertical-align: middle;
+        }}
+        @keyframes spin {{
+            0% {{ transform: rotate(0deg); }}
+            100% {{ transform: rotate(360deg); }}
+        }}
+    </style>
+    
+    <script>
+    async function performSearch() {{
+        const keyword = document.getElementById('search-input').value.trim();
+        const statusDiv = document.getElementById('search-status');
+        
+        if (keyword) {{
+            try {{
+                // 显示加载状态
+                statusDiv.innerHTML = '<span class="loading"></span>搜索中...';
+                
+                // 构建新的URL
+                const currentUrl = new URL(window.location.href);
+                const baseUrl = currentUrl.origin + currentUrl.pathname;
+                const newUrl = baseUrl + '?keyword=' + encodeURIComponent(keyword);
+                
+                // 发起搜索请求
+                const response = await fetch(newUrl);
+                
+                if (response.ok) {{
+                    // 更新URL刷新页面
+                    window.location.href = newUrl;
+                }} else {{
+                    throw new Error('搜索请求失败');
+                }}
+            }} catch (error) {{
+                console.error('搜索错误:', error);
+                statusDiv.textContent = '搜索失败，请稍后重试';
+                
+                // 3秒后清除错误消息
+                setTimeout(() => {{
+                    statusDiv.textContent = '';
+                }}, 3000);
+            }}
+        }}
+        return false;
+    }}
+    
+    // 添加键盘事件监听
+    document.addEventListener('DOMContentLoaded', function() {{
+        const searchInput = document.getElementById('search-input');
+        searchInput.addEventListener('keypress', function(e) {{
+            if (e.key === 'Enter') {{
+                e.preventDefault();
+                performSearch();
+            }}
+        }});
+    }});
+    </script>
+</head>
+<body>
+    <div class="container">
+        <!-- 搜索框 -->
+        <div class="search-box">
+            <form onsubmit="return performSearch()" class="search-form">
+                <input type="text" id="search-input" class="search-input" 
+                       placeholder="输入关键词搜索..." value="{keyword}"
+                       autocomplete="off" spellcheck="false">
+                <button type="submit" class="search-button">搜索</button>
+            </form>
+            <div id="search-status" class="search-status"></div>
+        </div>
+        
+        <!-- 搜索信息 -->
+        <header class="search-info">
+            <h1 class="search-keyword">{keyword}</h1>
+            <div class="search-time">搜索时间: {timestamp}</div>
+        </header>
+        
+        <!-- 搜索结果 -->
+        <main class="results">
+            {search_results}
+        </main>
+        
+        <!-- 页脚 -->
+        <footer class="footer">
+            <p>共找到 {result_count} 个相关结果</p>
+            <p>© 2024 搜索结果聚合. All rights reserved.</p>
+        </footer>
+    </div>
+</body>
+</html>
+'''
+
+def legacy_create_result_item(index, term):
+    """创建主页面的搜索结果项"""
+    # 生成SEO友好的文件名
+    filename = generate_seo_filename(term)
+    
+    return f'''
+        <article class="result-item">
+            <h2>
+                <a href="p/{filename}.html" class="result-link">
+                    {term}
+                </a>
+            </h2>
+            <div class="result-snippet">
+                <p>点击查看详情内容</p>
+            </div>
+        </article>
+    '''
+
+def legacy_render_index_page(keyword, related_searches, stylesheet):
+    """旧版save_to_html中的主页渲染：逐项拼接结果，再对整份模板调用str.format"""
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    search_results = ""
+    for i, term in enumerate(related_searches, 1):
+        search_results += legacy_create_result_item(i, term)
+    json_results = create_json_results(related_searches)
+    keywords = ', '.join(dict.fromkeys([keyword] + related_searches))
+    description = f"关于{keyword}的相关搜索结果，含{len(related_searches)}个相关主题。"
+    return legacy_get_html_template().format(
+        keyword=str(keyword),
+        timestamp=str(timestamp),
+        search_results=str(search_results),
+        result_count=len(related_searches),
+        json_results=str(json_results),
+        keywords=str(keywords),
+        description=str(description),
+        stylesheet=stylesheet
+    )
+
+# 页面中引用的站点样式表（基准只渲染不写盘，链接内容不影响结果）
+STYLESHEET = '../assets/style.css'
+
+class FrozenDateTime(datetime):
+    """校验输出时使用的固定时钟"""
+    @classmethod
+    def now(cls, tz=None):
+        return cls(2024, 1, 1, 8, 0, 0)
+
+def load_pages():
+    """读取所有SERP样本，返回 (搜索词, 结果列表, 相关搜索词) 列表"""
+    pages = []
+    for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, 'serp_*.html'))):
+        with open(path, 'rb') as f:
+            document = SerpDocument(os.path.basename(path)[:-5], f.read())
+        pages.append((document.related_searches[0] if document.related_searches else document.term,
+                      document.items, document.related_terms, document.related_searches))
+    return pages
+
+def detail_jobs(pages):
+    return [(term, items, generate_seo_filename(term), site.render_related_terms(related_terms), STYLESHEET)
+            for term, items, related_terms, _ in pages]
+
+# 交替运行的次数：同一时段内先后测量两种实现，减少其他进程对比值的干扰
+REPEATS = 7
+
+def timed(render, jobs, rounds):
+    """渲染jobs共rounds轮，返回耗时（秒）"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for job in jobs:
+            render(*job)
+    return time.perf_counter() - start
+
+def run(title, legacy, compiled, jobs, rounds):
+    """交替测量两种实现，报告各自最快一次的每秒页面数和提速的中位数"""
+    before, after = [], []
+    for _ in range(REPEATS):
+        before.append(timed(legacy, jobs, rounds))
+        after.append(timed(compiled, jobs, rounds))
+    pages = rounds * len(jobs)
+    print(f"{title + '（旧实现）':<24} {pages / min(before):>10.1f} 页/秒")
+    print(f"{title + '（预编译模板）':<24} {pages / min(after):>10.1f} 页/秒")
+    print(f"{title}提速: {statistics.median(b / a for b, a in zip(before, after)):.2f}x")
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    pages = load_pages()
+    if not pages:
+        print(f"未找到样本: {FIXTURE_DIR}")
+        return
+
+    details = detail_jobs(pages)
+    indexes = [(term, related_searches, STYLESHEET) for term, _, _, related_searches in pages]
+
+    # 先固定时钟确认输出一致（新实现使用构建时间，旧实现每次调用datetime.now()）
+    global datetime
+    real_datetime, datetime = datetime, FrozenDateTime
+    set_build_time(FrozenDateTime.now())
+    try:
+        for job in details:
+            if minify_html(legacy_render_detail_page(*job)) != minify_html(site.render_detail_page(*job)):
+                print("错误: 详细页面的新旧渲染结果不一致")
+                sys.exit(1)
+        for job in indexes:
+            if minify_html(legacy_render_index_page(*job)) != minify_html(site.render_index_page(*job)):
+                print("错误: 主页的新旧渲染结果不一致")
+                sys.exit(1)
+    finally:
+        datetime = real_datetime
+
+    print(f"样本数: {len(pages)}, 轮数: {rounds}")
+    for title, legacy, compiled, jobs in (
+        ('详细页面', legacy_render_detail_page, site.render_detail_page, details),
+        ('主页', legacy_render_index_page, site.render_index_page, indexes)
+    ):
+        run(title, legacy, compiled, jobs, rounds)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""多进程渲染的基准：在主进程中逐页解析、渲染、写盘（旧方式） vs RenderPool（1、2、4……直到CPU核数个进程）
+
+用法: python bench/bench_render_pool.py [页面数]
+
+模拟模板修改后从缓存重新生成详细页面：用fixtures/serp_*.html的原始字节作为每个搜索词的缓存数据，
+每页都要解析SERP、渲染并写盘（与 --rebuild 中交给渲染进程的工作相同）。基准会先确认进程池写出的
+文件与单进程完全一致，再报告每种进程数每秒生成的页面数。
+"""
+import glob
+import importlib.util
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.join(BENCH_DIR, '..')
+FIXTURE_DIR = os.path.join(BENCH_DIR, 'fixtures')
+
+sys.path.insert(0, ROOT_DIR)
+
+from build_clock import set_build_time
+from output_manifest import OutputManifest, set_output_manifest
+from render_pool import RenderPool
+
+BUILD_TIME = datetime(2024, 1, 1, 8, 0, 0)
+
+def load_site_module():
+    """加载1.py中的渲染函数（在临时目录中导入，日志和关键词文件都不会写到仓库里）
+
+    渲染进程用spawn启动，会重新导入本脚本：子进程沿用主进程的工作目录，页面中的样式表路径才相同
+    """
+    if __name__ != '__mp_main__':
+        os.chdir(tempfile.mkdtemp())
+        open('1.txt', 'w', encoding='utf-8').close()
+    spec = importlib.util.spec_from_file_location('site_pages', os.path.join(ROOT_DIR, '1.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+site = load_site_module()
+
+def render_job(term, content, encoding, output_dir):
+    # 模块级包装函数，渲染进程按名称找到它（site_pages模块本身不能按名称导入）
+    return site.render_detail_document(term, content, encoding, output_dir)
+
+def load_jobs(count, output_dir):
+    """用SERP样本生成count个搜索词各不相同的任务"""
+    samples = []
+    for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, 'serp_*.html'))):
+        with open(path, 'rb') as f:
+            samples.append(f.read())
+    return [(f'词{i}', samples[i % len(samples)], None, output_dir) for i in range(count)] if samples else []
+
+def fresh_manifest():
+    manifest = OutputManifest(os.path.join(tempfile.mkdtemp(), 'manifest.json'))
+    set_output_manifest(manifest)
+    return manifest
+
+def run_inline(jobs):
+    fresh_manifest()
+    start = time.perf_counter()
+    for job in jobs:
+        render_job(*job)
+    return time.perf_counter() - start
+
+def run_pool(jobs, workers):
+    pool = RenderPool(workers, manifest=fresh_manifest())
+    pool.submit('warmup', render_job, jobs[0])  # 进程启动和导入不计入耗时
+    pool.join()
+    start = time.perf_counter()
+    for i, job in enumerate(jobs):
+        pool.submit(i, render_job, job)
+    pool.join()
+    elapsed = time.perf_counter() - start
+    pool.close()
+    return elapsed
+
+def read_tree(directory):
+    files = {}
+    for root, _, names in os.walk(directory):
+        for name in names:
+            path = os.path.join(root, name)
+            with open(path, 'rb') as f:
+                files[os.path.relpath(path, directory)] = f.read()
+    return files
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    set_build_time(BUILD_TIME)
+    site.get_site_stylesheet()
+
+    # 先确认两种方式写出的文件完全一致
+    inline_dir, pool_dir = os.path.abspath('inline'), os.path.abspath('pool')
+    check = min(count, 20)
+    run_inline(load_jobs(check, inline_dir))
+    run_pool(load_jobs(check, pool_dir), 2)
+    if not read_tree(inline_dir) or read_tree(inline_dir) != read_tree(pool_dir):
+        print("错误: 进程池写出的页面与单进程不一致")
+        sys.exit(1)
+
+    jobs = load_jobs(count, os.path.abspath('out'))
+    cpus = os.cpu_count() or 1
+    print(f"页面数: {count}, CPU核数: {cpus}")
+    baseline = count / run_inline(jobs)
+    print(f"{'单进程（旧方式）':<20} {baseline:>10.1f} 页/秒")
+    workers = 1
+    while True:
+        rate = count / run_pool(jobs, workers)
+        print(f"{f'进程池 x{workers}':<20} {rate:>10.1f} 页/秒  {rate / baseline:.2f}x")
+        if workers >= cpus:
+            break
+        workers = min(workers * 2, cpus)
+
+if __name__ == '__main__':
+    main()
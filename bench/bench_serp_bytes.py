@@ -0,0 +1,78 @@
+"""SERP解析的微基准：先解码成str再etree.HTML（旧实现） vs 直接解析字节并复用HTMLParser（serp.parse_html_bytes）
+
+用法: python bench/bench_serp_bytes.py [轮数]
+
+基准会先确认两种方式提取出的结果完全一致，再分别报告每秒页面数和tracemalloc记录的内存峰值。
+"""
+import glob
+import os
+import sys
+import time
+import tracemalloc
+
+from lxml import etree
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from serp import detect_charset, extract_result_items, extract_related_searches, parse_html_bytes
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+def load_fixtures():
+    """读取所有SERP样本"""
+    pages = []
+    for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, 'serp_*.html'))):
+        with open(path, 'rb') as f:
+            pages.append(f.read())
+    return pages
+
+def parse_decoded(page):
+    """旧实现：整页解码成str后再交给lxml"""
+    return etree.HTML(page.decode('utf-8', errors='replace'))
+
+def parse_bytes(page):
+    """新实现：识别字符集后直接解析字节"""
+    return parse_html_bytes(page, detect_charset(page))
+
+def run(label, parse, pages, rounds):
+    """执行一组基准，返回 (每秒页面数, 内存峰值字节)"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for page in pages:
+            extract_result_items(parse(page))
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    for page in pages:
+        extract_result_items(parse(page))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    pages_per_second = rounds * len(pages) / elapsed
+    print(f"{label:<24} {pages_per_second:>10.1f} 页/秒  内存峰值 {peak / 1024:>8.1f} KB")
+    return pages_per_second, peak
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    pages = load_fixtures()
+    if not pages:
+        print(f"未找到样本: {FIXTURE_DIR}")
+        return
+
+    # 先确认输出一致
+    for page in pages:
+        before, after = parse_decoded(page), parse_bytes(page)
+        if (extract_result_items(before) != extract_result_items(after)
+                or extract_related_searches(before) != extract_related_searches(after)):
+            print("错误: 两种解析方式的提取结果不一致")
+            sys.exit(1)
+
+    print(f"样本数: {len(pages)}, 轮数: {rounds}")
+    before_speed, before_peak = run('解码后解析（旧实现）', parse_decoded, pages, rounds)
+    after_speed, after_peak = run('直接解析字节', parse_bytes, pages, rounds)
+    per_page = (1 / before_speed - 1 / after_speed) * 1000
+    print(f"提速: {after_speed / before_speed:.2f}x，每页节省 {per_page:.3f} ms，"
+          f"内存峰值减少 {(before_peak - after_peak) / 1024:.1f} KB")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""搜索结果提取的微基准：逐ID绝对XPath（旧实现） vs 预编译单次遍历（serp.extract_result_items）
+
+用法: python bench/bench_serp_extract.py [轮数]
+
+fixtures/serp_*.html 按百度结果页的结构保存（id为1~11的结果容器、#rs_new相关搜索），
+基准会先确认两种实现的输出完全一致，再分别报告每秒可处理的页面数。
+"""
+import glob
+import os
+import sys
+import time
+
+from lxml import etree
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from serp import extract_result_items, is_chinese_text
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+def legacy_extract_result_items(html):
+    """旧版get_article_content中的提取逻辑（每个ID四次全文档XPath）"""
+    contents = []
+    for result_id in range(1, 12):
+        try:
+            result_paths = {
+                'title': f'//*[@id="{result_id}"]/div/div[1]/h3/a//text()',
+                'abstract': f'//*[@id="{result_id}"]/div/div[1]/div[2]/div[1]/div[2]//text()',
+                'source': f'//*[@id="{result_id}"]/div/div[1]/div[2]/div[1]/div[2]/div/a/span/text()',
+                'url': f'//*[@id="{result_id}"]/@mu'
+            }
+            result_content = {}
+            title = html.xpath(result_paths['title'])
+            if title:
+                temp_title = ''.join(title).strip()
+                if is_chinese_text(temp_title):
+                    result_content['title'] = temp_title
+                else:
+                    continue
+            else:
+                continue
+            abstract = html.xpath(result_paths['abstract'])
+            if abstract:
+                abstract_text = ''.join(abstract).strip()
+                if abstract_text:
+                    result_content['abstract'] = abstract_text
+                else:
+                    continue
+            else:
+                continue
+            source = html.xpath(result_paths['source'])
+            result_content['source'] = source[0].strip() if source else ""
+            url_element = html.xpath(result_paths['url'])
+            result_content['url'] = url_element[0] if url_element else ""
+            if result_content.get('title') and result_content.get('abstract'):
+                contents.append(result_content)
+        except Exception as e:
+            print(f"处理第 {result_id} 条搜索结果时出错: {str(e)}")
+            continue
+    return contents
+
+def load_fixtures():
+    """读取所有SERP样本"""
+    pages = []
+    for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, 'serp_*.html'))):
+        with open(path, 'rb') as f:
+            pages.append(f.read())
+    return pages
+
+def run(label, extract, pages, rounds, parse):
+    """执行一组基准并返回每秒页面数"""
+    trees = None if parse else [etree.HTML(page.decode('utf-8')) for page in pages]
+    start = time.perf_counter()
+    for _ in range(rounds):
+        if parse:
+            for page in pages:
+                extract(etree.HTML(page.decode('utf-8')))
+        else:
+            for tree in trees:
+                extract(tree)
+    elapsed = time.perf_counter() - start
+    pages_per_second = rounds * len(pages) / elapsed
+    print(f"{label:<28} {pages_per_second:>10.1f} 页/秒")
+    return pages_per_second
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    pages = load_fixtures()
+    if not pages:
+        print(f"未找到样本: {FIXTURE_DIR}")
+        return
+
+    # 先确认输出一致
+    for page in pages:
+        tree = etree.HTML(page.decode('utf-8'))
+        if legacy_extract_result_items(tree) != extract_result_items(tree):
+            print("错误: 新旧提取结果不一致")
+            sys.exit(1)
+
+    print(f"样本数: {len(pages)}, 轮数: {rounds}")
+    for parse in (False, True):
+        title = '仅提取' if not parse else '解析+提取'
+        before = run(f'{title}（旧实现）', legacy_extract_result_items, pages, rounds, parse)
+        after = run(f'{title}（预编译单次遍历）', extract_result_items, pages, rounds, parse)
+        print(f"{title}提速: {after / before:.2f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""页面写盘的微基准：整页拼成字符串再写（write_text） vs 边渲染边写（stream_* + write_chunks）
+
+用法: python bench/bench_stream.py [轮数] [相关搜索词数量]
+
+用fixtures/serp_*.html解析出的真实结果，把相关搜索列表扩充到指定数量（默认1000个），
+分别生成关键词主页和详细页面。基准会先确认两种方式写出的文件逐字节相同，
+再报告每页耗时和tracemalloc记录的单页内存峰值。
+
+流式写入是用时间换内存：分批编码、逐批写入的调用开销让每页耗时比整页拼接多（1000个相关搜索词时
+主页约慢1.25倍，详细页面约慢1.04倍），换来的是单页内存峰值降到约0.15倍，页面越大越明显。
+"""
+import functools
+import glob
+import importlib.util
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.join(BENCH_DIR, '..')
+FIXTURE_DIR = os.path.join(BENCH_DIR, 'fixtures')
+
+sys.path.insert(0, ROOT_DIR)
+
+from build_clock import set_build_time
+from output_manifest import OutputManifest, set_output_manifest, write_text, write_chunks
+from serp import SerpDocument
+
+def load_site_module():
+    """加载1.py中的渲染函数（在临时目录中导入，日志、关键词文件和输出都不会写到仓库里）"""
+    os.chdir(tempfile.mkdtemp())
+    open('1.txt', 'w', encoding='utf-8').close()
+    spec = importlib.util.spec_from_file_location('site_pages', os.path.join(ROOT_DIR, '1.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+site = load_site_module()
+
+# 文件名生成（拼音转换、读取1.txt）与写盘方式无关，两种方式共用同一份缓存结果
+site.generate_seo_filename = functools.lru_cache(maxsize=None)(site.generate_seo_filename)
+
+STYLESHEET = '../assets/style.css'
+
+def load_pages(count):
+    """读取所有SERP样本，相关搜索列表扩充到count个，返回 (搜索词, 结果列表, 相关搜索词) 列表"""
+    pages = []
+    for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, 'serp_*.html'))):
+        with open(path, 'rb') as f:
+            document = SerpDocument(os.path.basename(path)[:-5], f.read())
+        seeds = document.related_searches or [document.term]
+        related = [f'{seeds[i % len(seeds)]}{i}' for i in range(count)]
+        pages.append((seeds[0], document.items, related))
+    return pages
+
+def whole_index(term, items, related, path):
+    write_text(path, site.render_index_page(term, related, STYLESHEET))
+
+def stream_index(term, items, related, path):
+    write_chunks(path, site.stream_index_page(term, related, STYLESHEET))
+
+def whole_detail(term, items, related, path):
+    html = site.render_detail_page(term, items, 'page', site.render_related_terms(related), STYLESHEET)
+    write_text(path, html, errors='ignore')
+
+def stream_detail(term, items, related, path):
+    chunks = site.stream_detail_page(term, items, 'page', site.stream_related_terms(related), STYLESHEET)
+    write_chunks(path, chunks, errors='ignore')
+
+def fresh_manifest():
+    """每次写入都用空清单，保证两种方式都真正写盘"""
+    set_output_manifest(OutputManifest(os.path.join(tempfile.gettempdir(), 'bench_stream_manifest.json')))
+
+def run(label, write, pages, rounds):
+    """执行一组基准，返回 (每页毫秒数, 单页内存峰值字节)
+
+    计时和内存峰值分开测量，tracemalloc本身的开销不计入耗时。
+    """
+    path = os.path.abspath('bench_page.html')
+    elapsed = 0.0
+    for _ in range(rounds):
+        for term, items, related in pages:
+            fresh_manifest()
+            start = time.perf_counter()
+            write(term, items, related, path)
+            elapsed += time.perf_counter() - start
+
+    peak = 0
+    for term, items, related in pages:
+        fresh_manifest()
+        tracemalloc.start()
+        write(term, items, related, path)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    ms_per_page = elapsed * 1000 / (rounds * len(pages))
+    print(f"{label:<20} {ms_per_page:>8.2f} 毫秒/页  内存峰值 {peak / 1024:>8.1f} KB")
+    return ms_per_page, peak
+
+def read_output(write, page):
+    path = os.path.abspath('bench_check.html')
+    fresh_manifest()
+    write(*page, path)
+    with open(path, 'rb') as f:
+        return f.read()
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    pages = load_pages(count)
+    if not pages:
+        print(f"未找到样本: {FIXTURE_DIR}")
+        return
+
+    set_build_time(datetime(2024, 1, 1, 8, 0, 0))
+    cases = (
+        ('主页', whole_index, stream_index),
+        ('详细页面', whole_detail, stream_detail)
+    )
+
+    # 先确认两种方式写出的文件完全一致
+    for title, whole, stream in cases:
+        for page in pages:
+            if read_output(whole, page) != read_output(stream, page):
+                print(f"错误: {title}的两种写法输出不一致")
+                sys.exit(1)
+
+    print(f"样本数: {len(pages)}, 相关搜索词: {count}, 轮数: {rounds}")
+    for title, whole, stream in cases:
+        whole_ms, whole_peak = run(f'{title}（整页拼接）', whole, pages, rounds)
+        stream_ms, stream_peak = run(f'{title}（流式写入）', stream, pages, rounds)
+        print(f"{title}: 流式写入的耗时为整页拼接的 {stream_ms / whole_ms:.2f}x（大于1为更慢），"
+              f"内存峰值为 {stream_peak / whole_peak:.2f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""结构化数据（JSON-LD）序列化的微基准：每项各调用一次json.dumps再手工拼接（旧实现） vs structured_data模块
+
+用法: python bench/bench_structured_data.py [关键词数量] [每个关键词的相关搜索词数量]
+
+模拟一次完整构建：每个关键词的相关搜索词从同一个词池中抽取（同一个词会出现在多个关键词下），
+生成主页的ListItem列表；详细页面用fixtures/serp_*.html解析出的真实结果生成Article列表。
+基准会先确认两种方式输出的JSON解析后完全相同，再分别报告耗时。
+"""
+import glob
+import json
+import os
+import random
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_DIR = os.path.join(BENCH_DIR, 'fixtures')
+
+sys.path.insert(0, os.path.join(BENCH_DIR, '..'))
+
+from serp import SerpDocument
+from structured_data import ENCODERS, set_json_encoder, stream_item_list, article_list_json, result_records
+
+PUBLISHED_TIME = '2024-01-01T08:00:00'
+
+def legacy_item_list(related_searches):
+    """旧版create_json_results：每项json.dumps后手工拼接"""
+    json_items = []
+    for i, term in enumerate(related_searches, 1):
+        item = {
+            "@type": "ListItem",
+            "position": i,
+            "name": term,
+            "url": f"https://www.baidu.com/s?wd={term}"
+        }
+        json_items.append(json.dumps(item))
+    return "[" + ",".join(json_items) + "]"
+
+def item_list(related_searches):
+    return ''.join(stream_item_list((term, f"https://www.baidu.com/s?wd={term}") for term in related_searches))
+
+def legacy_article_list(term, contents):
+    """旧版create_detail_page：结果字典逐个构建后整体json.dumps（默认ASCII转义和带空格的分隔符）"""
+    article_schema = []
+    for i, content in enumerate(contents, 1):
+        article_schema.append({
+            "@type": "Article",
+            "headline": f"{content['source']}{content['title']}",
+            "description": content['abstract'],
+            "url": content['url'],
+            "publisher": {
+                "@type": "Organization",
+                "name": content['source']
+            },
+            "position": i,
+            "datePublished": PUBLISHED_TIME,
+            "inLanguage": "zh-CN",
+            "articleSection": term,
+            "keywords": content['title'].split(),
+            "mainEntityOfPage": {
+                "@type": "WebPage",
+                "@id": content['url']
+            }
+        })
+    return json.dumps(article_schema)
+
+def article_list(term, contents):
+    return article_list_json(term, result_records(contents), PUBLISHED_TIME)
+
+def load_details():
+    """读取所有SERP样本，返回 (搜索词, 结果列表) 列表"""
+    details = []
+    for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, 'serp_*.html'))):
+        with open(path, 'rb') as f:
+            document = SerpDocument(os.path.basename(path)[:-5], f.read())
+        details.append((document.term, document.items))
+    return details
+
+def run(label, build, jobs):
+    """执行一组基准，返回耗时（秒）"""
+    start = time.perf_counter()
+    for job in jobs:
+        build(*job)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed * 1000:>10.1f} 毫秒")
+    return elapsed
+
+def main():
+    keyword_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    related_count = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    rng = random.Random(1)
+    pool = [f'相关搜索词{i}' for i in range(keyword_count * related_count // 5)]
+    indexes = [(rng.sample(pool, related_count),) for _ in range(keyword_count)]
+    details = load_details() * (keyword_count // 10)
+
+    for name in sorted(ENCODERS):
+        set_json_encoder(name)
+        for job in indexes[:50]:
+            if json.loads(legacy_item_list(*job)) != json.loads(item_list(*job)):
+                print(f"错误: 主页ListItem的输出不一致（{name}）")
+                sys.exit(1)
+        for job in details:
+            if json.loads(legacy_article_list(*job)) != json.loads(article_list(*job)):
+                print(f"错误: 详细页面Article的输出不一致（{name}）")
+                sys.exit(1)
+
+    print(f"关键词: {keyword_count}, 每个关键词的相关搜索词: {related_count}, 词池: {len(pool)}, 详细页面: {len(details)}")
+    before = run('主页ListItem（旧实现）', legacy_item_list, indexes)
+    for name in sorted(ENCODERS):
+        set_json_encoder(name)  # 切换编码器会清空片段缓存，每种编码器都从冷缓存开始
+        after = run(f'主页ListItem（{name}）', item_list, indexes)
+        print(f"提速: {before / after:.2f}x")
+    before = run('详细页面Article（旧实现）', legacy_article_list, details)
+    for name in sorted(ENCODERS):
+        set_json_encoder(name)
+        after = run(f'详细页面Article（{name}）', article_list, details)
+        print(f"提速: {before / after:.2f}x")
+
+if __name__ == '__main__':
+    main()
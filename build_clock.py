@@ -0,0 +1,51 @@
+import os
+import random
+import threading
+from datetime import datetime
+
+# 固定构建时间的环境变量：BUILD_TIME（ISO格式，如 2024-01-01T08:00:00 或Unix时间戳），
+# 也兼容可复现构建约定的 SOURCE_DATE_EPOCH（Unix时间戳）
+BUILD_TIME_ENV = 'BUILD_TIME'
+SOURCE_DATE_EPOCH_ENV = 'SOURCE_DATE_EPOCH'
+
+_build_time = None
+_build_time_lock = threading.Lock()
+
+def parse_build_time(value):
+    """解析ISO格式时间或Unix时间戳（按本地时间）"""
+    if isinstance(value, datetime):
+        return value
+    value = str(value).strip()
+    if value.isdigit():
+        return datetime.fromtimestamp(int(value))
+    return datetime.fromisoformat(value)
+
+def _resolve_build_time(value):
+    if value is None:
+        value = os.environ.get(BUILD_TIME_ENV) or os.environ.get(SOURCE_DATE_EPOCH_ENV)
+    build_time = parse_build_time(value) if value else datetime.now()
+    return build_time.replace(microsecond=0)
+
+def set_build_time(value=None):
+    """固定本次构建的时间
+
+    value为None时依次读取BUILD_TIME、SOURCE_DATE_EPOCH环境变量，都没有设置则取当前时间。
+    同一次构建中所有页面都使用这个时间，相同的输入才能生成完全相同的文件。
+    """
+    global _build_time
+    build_time = _resolve_build_time(value)
+    with _build_time_lock:
+        _build_time = build_time
+    return build_time
+
+def build_now():
+    """本次构建的固定时间，渲染页面时用它代替datetime.now()"""
+    global _build_time
+    with _build_time_lock:
+        if _build_time is None:
+            _build_time = _resolve_build_time(None)
+        return _build_time
+
+def build_random():
+    """以构建时间为种子的随机数生成器，固定构建时间后随机选取的结果也固定"""
+    return random.Random(int(build_now().timestamp()))
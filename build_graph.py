@@ -0,0 +1,138 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+
+from output_manifest import get_output_manifest
+
+DEFAULT_GRAPH_PATH = 'build_graph.json'
+
+class BuildGraph:
+    """增量构建的依赖图：节点ID -> (输入哈希, 依赖节点, 输出文件)
+
+    节点分两类：数据节点（关键词的相关搜索列表、搜索词的SERP数据）用update记录内容哈希；
+    页面节点（关键词主页、详细页面、导航页和sitemap）的输入哈希由自身输入和依赖节点的哈希组成，
+    与上次构建相同且输出文件都在时就是干净的，不必重新渲染。构建时间不算输入，
+    内容没有变化的页面保留上次生成时的时间。force为True时所有页面节点都视为需要重建。
+    """
+    def __init__(self, path=DEFAULT_GRAPH_PATH, force=False):
+        self.path = path
+        self.force = force
+        self.lock = threading.Lock()
+        self.nodes = {}  # 节点ID -> {'hash', 'deps', 'outputs'}
+        self.changed = 0
+        self.clean = 0
+        self.rebuilt = 0
+        self.dirty = False
+        self.load()
+
+    def load(self):
+        """读取上次构建的依赖图，不存在或损坏时所有节点都按需要重建处理"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                nodes = json.load(f)
+            if isinstance(nodes, dict):
+                self.nodes = nodes
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logging.warning(f"读取构建依赖图 {self.path} 失败: {str(e)}")
+
+    def save(self):
+        """有变化时写回依赖图（先写临时文件再替换）"""
+        with self.lock:
+            if not self.dirty:
+                return
+            data = json.dumps(self.nodes, ensure_ascii=False, sort_keys=True, indent=0)
+            self.dirty = False
+        try:
+            temp_path = f'{self.path}.{threading.get_ident()}.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            logging.warning(f"保存构建依赖图 {self.path} 失败: {str(e)}")
+
+    def node_hash(self, node_id):
+        """节点当前的输入哈希，没有记录时返回None"""
+        with self.lock:
+            node = self.nodes.get(node_id)
+            return node['hash'] if node else None
+
+    def digest(self, inputs, deps=()):
+        """自身输入（可JSON序列化的值）加上依赖节点的哈希"""
+        payload = json.dumps([inputs, [(dep, self.node_hash(dep)) for dep in deps]],
+                             ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def update(self, node_id, inputs, deps=()):
+        """记录数据节点的内容，返回内容是否与上次不同"""
+        digest = self.digest(inputs, deps)
+        with self.lock:
+            node = self.nodes.get(node_id)
+            if node is not None and node['hash'] == digest:
+                return False
+            self.nodes[node_id] = {'hash': digest, 'deps': list(deps), 'outputs': []}
+            self.changed += 1
+            self.dirty = True
+            return True
+
+    def is_dirty(self, node_id, inputs, deps=()):
+        """页面节点是否需要重建：输入或依赖有变化、输出文件缺失、或者强制重建"""
+        digest = self.digest(inputs, deps)
+        with self.lock:
+            node = self.nodes.get(node_id)
+            dirty = self.force or node is None or node['hash'] != digest
+            outputs = [] if dirty else list(node['outputs'])
+        if not dirty:
+            # 输出文件可能还在后台写线程的队列中，等待时不持有锁
+            manifest = get_output_manifest()
+            for path in outputs:
+                manifest.wait(path)
+            dirty = not all(os.path.exists(path) for path in outputs)
+        if not dirty:
+            with self.lock:
+                self.clean += 1
+        return dirty
+
+    def outputs(self, node_id):
+        """节点上次构建生成的文件"""
+        with self.lock:
+            node = self.nodes.get(node_id)
+            return list(node['outputs']) if node else []
+
+    def mark_built(self, node_id, inputs, deps=(), outputs=()):
+        """页面节点重建完成后记录本次的输入哈希和输出文件"""
+        digest = self.digest(inputs, deps)
+        with self.lock:
+            self.nodes[node_id] = {'hash': digest, 'deps': list(deps), 'outputs': list(outputs)}
+            self.rebuilt += 1
+            self.dirty = True
+
+    def stats(self):
+        """数据变化/页面跳过/页面重建统计"""
+        with self.lock:
+            return {
+                'nodes': len(self.nodes),
+                'changed': self.changed,
+                'clean': self.clean,
+                'rebuilt': self.rebuilt
+            }
+
+_graph = None
+_graph_lock = threading.Lock()
+
+def set_build_graph(graph):
+    """替换全局构建依赖图"""
+    global _graph
+    with _graph_lock:
+        _graph = graph
+
+def get_build_graph():
+    """返回全局构建依赖图，首次使用时按默认路径创建"""
+    global _graph
+    with _graph_lock:
+        if _graph is None:
+            _graph = BuildGraph()
+        return _graph
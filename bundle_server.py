@@ -0,0 +1,105 @@
+"""直接从打包文件（--bundle生成）提供站点的静态文件服务器
+
+用法: python bundle_server.py site.bundle [--host 127.0.0.1] [--port 8000]
+
+页面内容是打包文件mmap上的切片，不复制就写给客户端；客户端接受gzip/br且包里有预压缩副本时返回副本。
+"""
+import argparse
+import logging
+import mimetypes
+import posixpath
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+from site_bundle import SiteBundle
+
+# 预压缩副本的后缀 -> Content-Encoding，按优先顺序
+ENCODINGS = (('br', 'br'), ('gz', 'gzip'))
+
+class BundleRequestHandler(BaseHTTPRequestHandler):
+    bundle = None  # 由make_server设置
+
+    def do_GET(self):
+        self.send_page(head_only=False)
+
+    def do_HEAD(self):
+        self.send_page(head_only=True)
+
+    def resolve(self):
+        """请求路径 -> 包中的文件名，目录请求指向其中的index.html"""
+        path = unquote(urlsplit(self.path).path)
+        name = posixpath.normpath('/' + path).lstrip('/')
+        if not name or path.endswith('/'):
+            name = posixpath.join(name, 'index.html')
+        return name
+
+    def send_page(self, head_only):
+        name = self.resolve()
+        if name not in self.bundle:
+            if posixpath.join(name, 'index.html') in self.bundle:
+                self.send_response(301)
+                self.send_header('Location', urlsplit(self.path).path + '/')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_error(404)
+            return
+
+        content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type in ('application/xml', 'application/javascript'):
+            content_type += '; charset=utf-8'
+        accepted = self.headers.get('Accept-Encoding', '')
+        variants = [(suffix, encoding) for suffix, encoding in ENCODINGS if f'{name}.{suffix}' in self.bundle]
+        served, encoding = name, None
+        for suffix, candidate in variants:
+            if candidate in accepted:
+                served, encoding = f'{name}.{suffix}', candidate
+                break
+        data, digest = self.bundle.get(served)
+        try:
+            etag = f'"{digest}"'
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(data)))
+            self.send_header('ETag', etag)
+            if encoding:
+                self.send_header('Content-Encoding', encoding)
+            if variants:
+                self.send_header('Vary', 'Accept-Encoding')
+            self.end_headers()
+            if not head_only:
+                self.wfile.write(data)
+        finally:
+            data.release()
+
+def make_server(bundle, host='127.0.0.1', port=8000):
+    """创建从bundle（SiteBundle）提供服务的多线程HTTP服务器"""
+    handler = type('Handler', (BundleRequestHandler,), {'bundle': bundle})
+    return ThreadingHTTPServer((host, port), handler)
+
+def main():
+    parser = argparse.ArgumentParser(description='直接从打包文件提供站点的静态文件服务')
+    parser.add_argument('bundle', help='打包文件路径')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址')
+    parser.add_argument('--port', type=int, default=8000, help='监听端口')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    bundle = SiteBundle(args.bundle)
+    server = make_server(bundle, args.host, args.port)
+    logging.info(f"从 {args.bundle}（{len(bundle)} 个文件）提供服务: http://{args.host}:{args.port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        bundle.close()
+
+if __name__ == '__main__':
+    main()
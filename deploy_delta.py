@@ -0,0 +1,114 @@
+"""两次部署之间的输出文件变更清单
+
+用法: python deploy_delta.py OUT [--manifest output_manifest.json] [--state deploy_state.json]
+
+对比输出清单与上次导出时保存的状态，写出 OUT.json（新增/变化/删除的文件及其哈希和大小）
+和 OUT.tar.gz（只含新增和变化的文件），成功后更新状态文件。构建脚本的 --delta 选项在构建结束时做同样的事。
+"""
+import argparse
+import json
+import logging
+import os
+import tarfile
+
+from build_clock import build_now
+from output_manifest import DEFAULT_MANIFEST_PATH, OutputManifest, temp_path_for
+
+DEFAULT_STATE_PATH = 'deploy_state.json'
+
+def load_state(path=DEFAULT_STATE_PATH):
+    """上次导出时的文件状态：路径 -> {'hash', 'size'}，还没有导出过时为空"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        return state if isinstance(state, dict) else {}
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logging.warning(f"读取部署状态 {path} 失败，按首次部署处理: {str(e)}")
+        return {}
+
+def save_state(state, path=DEFAULT_STATE_PATH):
+    temp_path = temp_path_for(path)
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, sort_keys=True, indent=0)
+    os.replace(temp_path, path)
+
+def compute_delta(current, previous):
+    """对比两份 路径 -> {'hash', 'size'}，返回按路径排序的 added/changed/removed 列表"""
+    delta = {'added': [], 'changed': [], 'removed': []}
+    for path in sorted(current):
+        entry = current[path]
+        old = previous.get(path)
+        if old is None:
+            delta['added'].append({'path': path, 'hash': entry['hash'], 'size': entry['size']})
+        elif old['hash'] != entry['hash']:
+            delta['changed'].append({'path': path, 'hash': entry['hash'], 'size': entry['size'],
+                                     'previous_hash': old['hash']})
+    for path in sorted(previous):
+        if path not in current:
+            old = previous[path]
+            delta['removed'].append({'path': path, 'hash': old['hash'], 'size': old['size']})
+    return delta
+
+def write_archive(paths, archive_path):
+    """把paths打成tar.gz（先写临时文件再替换），返回打包的字节数"""
+    temp_path = temp_path_for(archive_path)
+    size = 0
+    try:
+        with tarfile.open(temp_path, 'w:gz') as archive:
+            for path in paths:
+                info = archive.gettarinfo(path, arcname=path)
+                info.uid = info.gid = 0
+                info.uname = info.gname = ''
+                with open(path, 'rb') as f:
+                    archive.addfile(info, f)
+                size += info.size
+        os.replace(temp_path, archive_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return size
+
+def export_delta(current, out, state_path=DEFAULT_STATE_PATH):
+    """导出相对上次部署的变更：OUT.json和OUT.tar.gz，成功后更新状态文件，返回统计
+
+    输出清单中有记录但磁盘上已不存在的文件当作删除处理。
+    """
+    current = {path: entry for path, entry in current.items() if os.path.isfile(path)}
+    delta = compute_delta(current, load_state(state_path))
+    shipped = [entry['path'] for entry in delta['added'] + delta['changed']]
+    archive_path = f'{out}.tar.gz'
+    archive_bytes = write_archive(shipped, archive_path)
+
+    report = {
+        'generated': build_now().isoformat(),
+        'archive': os.path.basename(archive_path),
+        'files': len(current),
+        **delta
+    }
+    temp_path = temp_path_for(f'{out}.json')
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=1)
+    os.replace(temp_path, f'{out}.json')
+    save_state(current, state_path)
+    return {
+        'added': len(delta['added']),
+        'changed': len(delta['changed']),
+        'removed': len(delta['removed']),
+        'archive_bytes': archive_bytes
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='导出相对上次部署变化的输出文件')
+    parser.add_argument('out', help='输出文件名前缀，生成 OUT.json 和 OUT.tar.gz')
+    parser.add_argument('--manifest', default=DEFAULT_MANIFEST_PATH, help='输出清单文件')
+    parser.add_argument('--state', default=DEFAULT_STATE_PATH, help='上次导出时保存的部署状态文件')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    logging.info(f"变更导出统计: {export_delta(OutputManifest(args.manifest).snapshot(), args.out, args.state)}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+import hashlib
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+# 默认缓存有效期（秒）和总容量上限（字节）
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# 缓存文件头：过期时间戳（大端double）
+_HEADER = struct.Struct('>d')
+_SUFFIX = '.z'
+
+class FetchCache:
+    """抓取结果缓存
+
+    以URL的SHA1作为键，文件按 cache/ab/cd/<sha1>.z 两级分散存放，内容用zlib压缩，
+    每条记录带过期时间；总大小超过上限时按最近使用顺序（LRU）淘汰。
+    """
+    def __init__(self, cache_dir='cache', ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES, compress_level=6):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.compress_level = compress_level
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # 键 -> 文件大小，按最近使用排序
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        # 缓存目录在第一次写入时才创建，只读取缓存（如回放归档）的运行不会留下空目录
+        self._load_index()
+
+    @staticmethod
+    def key_for(url):
+        """URL对应的缓存键"""
+        return hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key[2:4], key + _SUFFIX)
+
+    def _load_index(self):
+        """扫描缓存目录，按文件修改时间恢复LRU顺序"""
+        found = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(_SUFFIX):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(root, name))
+                except OSError:
+                    continue
+                found.append((stat.st_mtime, name[:-len(_SUFFIX)], stat.st_size))
+
+        for _, key, size in sorted(found):
+            self.entries[key] = size
+            self.total_bytes += size
+
+    def _remove(self, key):
+        size = self.entries.pop(key, 0)
+        self.total_bytes -= size
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def get(self, url):
+        """读取缓存内容，未命中或已过期返回None"""
+        key = self.key_for(url)
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return None
+
+            path = self._path(key)
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+                expires_at, = _HEADER.unpack_from(data)
+                if expires_at < time.time():
+                    self.expired += 1
+                    self.misses += 1
+                    self._remove(key)
+                    return None
+                content = zlib.decompress(data[_HEADER.size:])
+            except (OSError, struct.error, zlib.error) as e:
+                logging.warning(f"读取缓存 {path} 失败: {str(e)}")
+                self.misses += 1
+                self._remove(key)
+                return None
+
+            # 更新最近使用顺序（修改时间用于下次启动时恢复顺序）
+            self.entries.move_to_end(key)
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            self.hits += 1
+            return content
+
+    def set(self, url, content, ttl=None):
+        """写入缓存，ttl为None时使用默认有效期"""
+        key = self.key_for(url)
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        data = _HEADER.pack(expires_at) + zlib.compress(content, self.compress_level)
+        path = self._path(key)
+
+        with self.lock:
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # 先写临时文件再替换，中途崩溃不会留下半个缓存文件
+                temp_path = f'{path}.{threading.get_ident()}.tmp'
+                with open(temp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(temp_path, path)
+            except OSError as e:
+                logging.warning(f"写入缓存 {path} 失败: {str(e)}")
+                return
+
+            self.total_bytes += len(data) - self.entries.pop(key, 0)
+            self.entries[key] = len(data)
+
+            # 超出容量时淘汰最久未使用的记录
+            while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+                oldest = next(iter(self.entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def stats(self):
+        """缓存命中统计，字段与empty_stats()相同"""
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'expired': self.expired,
+                'evictions': self.evictions,
+                'entries': len(self.entries),
+                'bytes': self.total_bytes
+            }
+
+def empty_stats():
+    """还没有打开缓存时的统计（各项都为0）"""
+    return {'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0, 'entries': 0, 'bytes': 0}
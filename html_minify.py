@@ -0,0 +1,118 @@
+import re
+
+# 前后空白不影响显示的块级元素（以及head中的元素），与它们相邻的空白可以整段删除
+BLOCK_TAGS = {
+    '!doctype', 'html', 'head', 'body', 'title', 'meta', 'link', 'base', 'script', 'style', 'noscript',
+    'div', 'section', 'article', 'aside', 'header', 'footer', 'nav', 'main', 'p', 'h1', 'h2', 'h3', 'h4',
+    'h5', 'h6', 'ul', 'ol', 'li', 'dl', 'dt', 'dd', 'table', 'thead', 'tbody', 'tfoot', 'tr', 'td', 'th',
+    'form', 'fieldset', 'figure', 'figcaption', 'blockquote', 'hr', 'pre', 'textarea'
+}
+
+# 注释、内容原样保留或单独处理的元素（pre/textarea/script/style）、标签、文本
+_TOKEN = re.compile(r'<!--.*?-->|<(pre|textarea|script|style)\b[^>]*>.*?</\1\s*>|<[^>]*>|[^<]+|<', re.S | re.I)
+_TAG_NAME = re.compile(r'</?\s*([!\w-]+)')
+_WHITESPACE = re.compile(r'\s+')
+_JSON_LD = re.compile(r'type\s*=\s*["\']application/ld\+json["\']', re.I)
+
+def minify_css(css):
+    """压缩CSS：去掉注释和多余空白，以及规则末尾的分号"""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = _WHITESPACE.sub(' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    css = re.sub(r':\s+', ':', css)
+    css = re.sub(r'\(\s+', '(', css)
+    css = re.sub(r'\s+\)', ')', css)
+    return css.replace(';}', '}').strip()
+
+def minify_json(text):
+    """去掉JSON字符串以外的空白（不解析JSON，模板中带占位符的JSON也能处理）"""
+    out = []
+    in_string = False
+    escaped = False
+    for char in text:
+        if in_string:
+            out.append(char)
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+            out.append(char)
+        elif not char.isspace():
+            out.append(char)
+    return ''.join(out)
+
+def _minify_tag(tag):
+    # 标签内引号外的连续空白合并为一个空格，属性值原样保留
+    out = []
+    quote = None
+    pending_space = False
+    for char in tag:
+        if quote:
+            out.append(char)
+            if char == quote:
+                quote = None
+        elif char.isspace():
+            pending_space = True
+        else:
+            if pending_space and char not in '>/' and out[-1] != '<':
+                out.append(' ')
+            pending_space = False
+            if char in '"\'':
+                quote = char
+            out.append(char)
+    return ''.join(out)
+
+def _minify_raw_block(block, name):
+    name = name.lower()
+    open_end = block.index('>') + 1
+    close_start = block.lower().rindex('</')
+    open_tag, body, close_tag = _minify_tag(block[:open_end]), block[open_end:close_start], block[close_start:]
+    if name == 'style':
+        body = minify_css(body)
+    elif name == 'script' and _JSON_LD.search(open_tag):
+        body = minify_json(body)
+    return open_tag + body + close_tag
+
+def _tag_name(token):
+    match = _TAG_NAME.match(token)
+    return match.group(1).lower() if match else ''
+
+def minify_html(html):
+    """压缩HTML：删除注释（保留IE条件注释），合并空白，删除块级元素两侧的空白，压缩内联CSS和JSON-LD
+
+    <pre>、<textarea>和普通<script>的内容原样保留。
+    """
+    tokens = []  # (类型, 文本)：'tag'、'block'（块级标签）、'raw'（原样保留的元素）、'text'
+    for match in _TOKEN.finditer(html):
+        token = match.group(0)
+        if token.startswith('<!--'):
+            if token.startswith('<!--[if'):
+                tokens.append(('raw', token))
+            continue
+        if match.group(1):
+            tokens.append(('block', _minify_raw_block(token, match.group(1))))
+        elif token.startswith('<') and len(token) > 1:
+            tokens.append(('block' if _tag_name(token) in BLOCK_TAGS else 'tag', _minify_tag(token)))
+        elif tokens and tokens[-1][0] == 'text':
+            # 删掉注释后前后两段文本相邻，合并后再处理空白
+            tokens[-1] = ('text', _WHITESPACE.sub(' ', tokens[-1][1] + token))
+        else:
+            tokens.append(('text', _WHITESPACE.sub(' ', token)))
+
+    out = []
+    for i, (kind, token) in enumerate(tokens):
+        if kind == 'text':
+            previous_kind = tokens[i - 1][0] if i > 0 else 'block'
+            next_kind = tokens[i + 1][0] if i + 1 < len(tokens) else 'block'
+            if previous_kind == 'block':
+                token = token.lstrip(' ')
+            if next_kind == 'block':
+                token = token.rstrip(' ')
+            if not token:
+                continue
+        out.append(token)
+    return ''.join(out)
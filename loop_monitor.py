@@ -0,0 +1,47 @@
+import asyncio
+import time
+
+class LoopLagMonitor:
+    """事件循环延迟监控
+
+    周期性地睡眠interval秒，实际醒来时间比预期晚多少就是这段时间内事件循环被阻塞的时长。
+    解析等CPU任务直接在协程里执行时，延迟会明显升高。
+    """
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.samples = []
+        self.task = None
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, time.perf_counter() - start - self.interval))
+
+    def start(self):
+        """在当前事件循环中开始采样"""
+        if self.task is None:
+            self.task = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    async def stop(self):
+        """停止采样"""
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    def stats(self):
+        """延迟统计（毫秒）"""
+        if not self.samples:
+            return {'samples': 0, 'avg_ms': 0, 'p95_ms': 0, 'max_ms': 0}
+        ordered = sorted(self.samples)
+        return {
+            'samples': len(ordered),
+            'avg_ms': round(sum(ordered) / len(ordered) * 1000, 2),
+            'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 2),
+            'max_ms': round(ordered[-1] * 1000, 2)
+        }
@@ -1,10 +1,14 @@
-from datetime import datetime
 import os
-import json
-from urllib.parse import quote
-import random
+import hashlib
 import logging
 
+from build_clock import build_now, build_random
+from output_manifest import write_text, get_output_manifest
+from build_graph import get_build_graph
+from structured_data import dumps
+from templates import Template
+from site_layout import get_site_layout
+
 def get_random_keywords(max_count=20):
     """从folder_keywords.txt中随机获取指定数量的关键词"""
     try:
@@ -15,14 +19,27 @@ def get_random_keywords(max_count=20):
                     keyword, _ = line.strip().split('\t')
                     keywords.append(keyword)
         
+        # 同一个关键词每次运行都会追加一行，去重后导航页和sitemap才不会随运行次数变化
+        keywords = list(dict.fromkeys(keywords))
+        
         # 如果关键词数量超过max_count，随机选择max_count个
         if len(keywords) > max_count:
-            return random.sample(keywords, max_count)
+            return build_random().sample(keywords, max_count)
         return keywords
     except Exception as e:
         logging.error(f"获取随机关键词时出错: {str(e)}")
         return []
 
+_source_fingerprint = None
+
+def get_source_fingerprint():
+    """本模块源码的哈希，导航页模板写在代码里，代码有变化时导航页要重新生成"""
+    global _source_fingerprint
+    if _source_fingerprint is None:
+        with open(__file__, 'rb') as f:
+            _source_fingerprint = hashlib.sha1(f.read()).hexdigest()
+    return _source_fingerprint
+
 def generate_nav_page(output_dir, all_keywords):
     """生成导航页面"""
     # 获取随机关键词
@@ -30,14 +47,26 @@ def generate_nav_page(output_dir, all_keywords):
     if all_keywords and all_keywords[0] not in display_keywords:  # 确保当前关键词在列表中
         display_keywords.insert(0, all_keywords[0])  # 将当前关键词放在最前面
     
+    # 展示的关键词和目录映射都没有变化时，导航页和sitemap不必重新生成
+    graph = get_build_graph()
+    inputs = [display_keywords, list(get_keyword_folder_mapping().items()), get_source_fingerprint()]
+    outputs = ['index.html', os.path.join(output_dir, 'sitemap.xml'), os.path.join(output_dir, 'robots.txt')]
+    if not graph.is_dirty('nav', inputs):
+        for path in outputs:
+            get_output_manifest().track(path)
+        return
+    
     # 生成HTML内容
     nav_html = create_nav_html(group_keywords_by_topic(display_keywords), len(display_keywords))
     
-    # 保存导航页
-    save_nav_page(output_dir, nav_html)
-    
-    # 生成sitemap
-    generate_sitemap(output_dir, display_keywords)
+    # 导航页、sitemap和robots.txt写好后一起替换，并且晚于本批已提交的页面
+    with get_output_manifest().batch():
+        # 保存导航页
+        save_nav_page(output_dir, nav_html)
+        
+        # 生成sitemap
+        generate_sitemap(output_dir, display_keywords)
+    graph.mark_built('nav', inputs, outputs=outputs)
 
 def get_keywords_from_file():
     """从folder_keywords.txt获取关键词"""
@@ -198,56 +227,25 @@ def get_nav_css():
         }
     '''
 
-def create_nav_html(keyword_groups, total_keywords):
-    """创建导航页HTML内容"""
-    # 生成关键词和描述
-    all_keywords = []
-    for keywords in keyword_groups.values():
-        all_keywords.extend(keywords)
-    
-    # 生成更丰富的meta描述
-    meta_description = f"提供{total_keywords}个精选热门关键词的搜索结果聚合。包含{', '.join(all_keywords[:5])}等热门内容，每日更新。"
-    
-    # 生成结构化数据
-    mapping = get_keyword_folder_mapping()
-    structured_data = {
-        "@context": "https://schema.org",
-        "@type": "WebPage",
-        "name": "内容导航中心",
-        "description": meta_description,
-        "url": "./",
-        "dateModified": datetime.now().isoformat(),
-        "mainEntity": {
-            "@type": "ItemList",
-            "itemListElement": [
-                {
-                    "@type": "ListItem",
-                    "position": i + 1,
-                    "name": keyword,
-                    "url": f"{folder}/index.html"
-                } for i, (keyword, folder) in enumerate(mapping.items())
-            ]
-        }
-    }
-
-    return f'''<!DOCTYPE html>
+# 导航页模板只编译一次：样式在编译时内联，静态部分在编译时压缩
+NAV_TEMPLATE = Template('''<!DOCTYPE html>
     <html lang="zh-CN">
     <head>
         <meta charset="UTF-8">
         <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>聚合搜 - 最新更新 | {datetime.now().strftime('%Y-%m-%d')}</title>
+        <title>聚合搜 - 最新更新 | {date}</title>
         
         <!-- 增强搜索引擎抓取设置 -->
         <meta name="robots" content="index, follow, max-snippet:-1, max-image-preview:large, max-video-preview:-1, max-video-preview:-1">
         <meta name="googlebot" content="index, follow, max-snippet:-1, max-image-preview:large">
         <meta name="bingbot" content="index, follow, max-snippet:-1, max-image-preview:large">
-        <meta name="baidu-site-verification" content="codeva-5Tx3gC2Tal" content="code-{datetime.now().strftime('%Y%m%d')}"/>
-        <meta name="msvalidate.01" content="71A98B01C97FA508E1DF9917FB8E0C00" content="code-{datetime.now().strftime('%Y%m%d')}"/>
-        <meta name="google-site-verification" content="dYg1tNb5pqr-ZRMcNAbVqPEk0kt6_Us3lTUpzuUri2U" content="code-{datetime.now().strftime('%Y%m%d')}"/>
+        <meta name="baidu-site-verification" content="codeva-5Tx3gC2Tal" content="code-{date_code}"/>
+        <meta name="msvalidate.01" content="71A98B01C97FA508E1DF9917FB8E0C00" content="code-{date_code}"/>
+        <meta name="google-site-verification" content="dYg1tNb5pqr-ZRMcNAbVqPEk0kt6_Us3lTUpzuUri2U" content="code-{date_code}"/>
         
         <!-- 增强SEO Meta标签 -->
         <meta name="description" content="{meta_description}">
-        <meta name="keywords" content="{','.join(all_keywords)}">
+        <meta name="keywords" content="{keywords}">
         <meta name="author" content="Content Navigation Center">
         <meta name="copyright" content="Content Navigation Center">
         <meta name="revisit-after" content="1 days">
@@ -271,7 +269,7 @@ def create_nav_html(keyword_groups, total_keywords):
         
         <!-- 结构化数据增强 -->
         <script type="application/ld+json">
-        {json.dumps(structured_data, ensure_ascii=False)}
+        {structured_data:raw}
         </script>
         
         <!-- 添加Breadcrumb结构化数据 -->
@@ -290,7 +288,7 @@ def create_nav_html(keyword_groups, total_keywords):
         }}
         </script>
         
-        <style>{get_nav_css()}</style>
+        <style>{nav_css:raw}</style>
     </head>
     <body>
         <div class="nav-container" itemscope itemtype="http://schema.org/WebPage">
@@ -302,17 +300,62 @@ def create_nav_html(keyword_groups, total_keywords):
             </header>
             <main itemprop="mainContentOfPage">
                 <div class="keyword-list">
-                    {generate_keyword_links(get_keywords_from_file())}
+                    {keyword_links:raw}
                 </div>
             </main>
             <footer class="page-footer">
-                <p>更新时间：<time itemprop="dateModified" datetime="{datetime.now().isoformat()}">{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</time></p>
+                <p>更新时间：<time itemprop="dateModified" datetime="{modified_time}">{modified_text}</time></p>
                 <p>本站内容由AI智能算法推荐，每小时更新一次</p>
             </footer>
         </div>
     </body>
     </html>
-    '''
+    ''', 'nav', minify=True, constants={'nav_css': get_nav_css()})
+
+def create_nav_html(keyword_groups, total_keywords):
+    """创建导航页HTML内容"""
+    # 生成关键词和描述
+    all_keywords = []
+    for keywords in keyword_groups.values():
+        all_keywords.extend(keywords)
+    
+    # 生成更丰富的meta描述
+    meta_description = f"提供{total_keywords}个精选热门关键词的搜索结果聚合。包含{', '.join(all_keywords[:5])}等热门内容，每日更新。"
+    
+    # 生成结构化数据
+    mapping = get_keyword_folder_mapping()
+    structured_data = {
+        "@context": "https://schema.org",
+        "@type": "WebPage",
+        "name": "内容导航中心",
+        "description": meta_description,
+        "url": "./",
+        "dateModified": build_now().isoformat(),
+        "mainEntity": {
+            "@type": "ItemList",
+            "itemListElement": [
+                {
+                    "@type": "ListItem",
+                    "position": i + 1,
+                    "name": keyword,
+                    "url": f"{folder}/index.html"
+                } for i, (keyword, folder) in enumerate(mapping.items())
+            ]
+        }
+    }
+
+    now = build_now()
+    return NAV_TEMPLATE.render({
+        'date': now.strftime('%Y-%m-%d'),
+        'date_code': now.strftime('%Y%m%d'),
+        'meta_description': meta_description,
+        'keywords': ','.join(all_keywords),
+        'structured_data': dumps(structured_data),
+        'total_keywords': total_keywords,
+        'keyword_links': generate_keyword_links(get_keywords_from_file()),
+        'modified_time': now.isoformat(),
+        'modified_text': now.strftime('%Y-%m-%d %H:%M:%S')
+    })
 
 def group_keywords_by_topic(keywords):
     """将关键词按主题智能分组"""
@@ -391,9 +434,9 @@ def generate_keyword_links(keywords):
         # 根据文字长度决定跨列数
         cols = min(len(keyword) // 5 + 1, 4)  # 最多跨4列
         
-        # 生成指向html目录下的链接
+        # 生成指向关键词站点目录的链接（目录位置由布局决定）
         links.append(f'''
-        <a href="html/{folder}/index.html" 
+        <a href="{get_site_layout().keyword_dir(folder)}/index.html" 
            class="keyword-link" 
            title="{keyword}的详细信息"
            style="--cols: {cols}">
@@ -420,19 +463,21 @@ def generate_sitemap(output_dir, keywords):
     sitemap_content.append(f'''
     <url>
         <loc>./index.html</loc>
-        <lastmod>{datetime.now().strftime('%Y-%m-%dT%H:%M:%S+08:00')}</lastmod>
+        <lastmod>{build_now().strftime('%Y-%m-%dT%H:%M:%S+08:00')}</lastmod>
         <changefreq>always</changefreq>
         <priority>1.0</priority>
     </url>
     ''')
     
     # 添加所有关键词页面（高更新���率）
+    # 目录与导航页中的链接一致
+    mapping = get_keyword_folder_mapping()
     for keyword in keywords:
-        dir_name = f's_{generate_seo_filename(keyword)}'
+        site_dir = mapping.get(keyword) or get_site_layout().keyword_dir(f's_{generate_seo_filename(keyword)}')
         sitemap_content.append(f'''
         <url>
-            <loc>./html/{dir_name}/index.html</loc>
-            <lastmod>{datetime.now().strftime('%Y-%m-%dT%H:%M:%S+08:00')}</lastmod>
+            <loc>./{site_dir}/index.html</loc>
+            <lastmod>{build_now().strftime('%Y-%m-%dT%H:%M:%S+08:00')}</lastmod>
             <changefreq>hourly</changefreq>
             <priority>0.9</priority>
             <news:news>
@@ -440,7 +485,7 @@ def generate_sitemap(output_dir, keywords):
                     <news:name>Content Navigation Center</news:name>
                     <news:language>zh</news:language>
                 </news:publication>
-                <news:publication_date>{datetime.now().strftime('%Y-%m-%d')}</news:publication_date>
+                <news:publication_date>{build_now().strftime('%Y-%m-%d')}</news:publication_date>
                 <news:title>{keyword}</news:title>
             </news:news>
         </url>
@@ -449,8 +494,7 @@ def generate_sitemap(output_dir, keywords):
     sitemap_content.append('</urlset>')
     
     # 保存sitemap
-    with open(os.path.join(output_dir, 'sitemap.xml'), 'w', encoding='utf-8') as f:
-        f.write('\n'.join(sitemap_content))
+    write_text(os.path.join(output_dir, 'sitemap.xml'), '\n'.join(sitemap_content))
     
     # 生成robots.txt
     robots_content = f'''User-agent: *
@@ -487,13 +531,11 @@ Disallow: /
 '''
     
     # 保存robots.txt
-    with open(os.path.join(output_dir, 'robots.txt'), 'w', encoding='utf-8') as f:
-        f.write(robots_content)
+    write_text(os.path.join(output_dir, 'robots.txt'), robots_content)
 
 def save_nav_page(output_dir, html_content):
     """保存导航页HTML文件到根目录"""
-    with open('index.html', 'w', encoding='utf-8') as f:
-        f.write(html_content)
+    write_text('index.html', html_content)
 
 def get_keyword_folder_mapping():
     """获取关键词和文件夹的映射关系"""
@@ -503,8 +545,8 @@ def get_keyword_folder_mapping():
             for line in f:
                 if line.strip():
                     keyword, folder = line.strip().split('\t')
-                    # 修改映射路径，添加html目录前缀
-                    mapping[keyword] = f'html/{folder}'
+                    # 映射到关键词站点目录（html前缀和分片子目录由布局决定）
+                    mapping[keyword] = get_site_layout().keyword_dir(folder)
     except Exception as e:
         print(f"读取folder_keywords.txt时出错: {str(e)}")
     return mapping 
\ No newline at end of file
@@ -0,0 +1,487 @@
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import threading
+
+from output_writer import ensure_dir
+
+DEFAULT_MANIFEST_PATH = 'output_manifest.json'
+
+# 流式写入时攒够这么多字符再编码、计算哈希和写盘
+STREAM_BUFFER_CHARS = 16 * 1024
+
+def temp_path_for(path):
+    """path旁边的临时文件名，带进程号和线程号，多个进程、线程同时写同一个文件时互不覆盖"""
+    return f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+
+def encode_batches(chunks, encoding='utf-8', errors='strict'):
+    """把chunks（字符串的可迭代对象）攒够STREAM_BUFFER_CHARS个字符编码一次，逐批产出字节"""
+    pending = []
+    pending_chars = 0
+    for chunk in chunks:
+        pending.append(chunk)
+        pending_chars += len(chunk)
+        if pending_chars >= STREAM_BUFFER_CHARS:
+            yield ''.join(pending).encode(encoding, errors)
+            pending = []
+            pending_chars = 0
+    yield ''.join(pending).encode(encoding, errors)
+
+class _TempFile:
+    """后台写线程中逐批写入的临时文件（所有操作都在同一个写线程中按顺序执行）"""
+    def __init__(self, path, manifest):
+        self.temp_path = temp_path_for(path)
+        self.manifest = manifest
+        self.file = None
+        self.stat = None
+        self.error = None
+
+    def write(self, data):
+        if self.error is not None:
+            return
+        try:
+            if self.file is None:
+                ensure_dir(os.path.dirname(self.temp_path))
+                self.file = open(self.temp_path, 'wb')
+            self.file.write(data)
+        except BaseException as e:
+            self.error = e
+            self.discard()
+            raise
+
+    def close(self):
+        """写完并关闭临时文件，返回临时文件路径"""
+        if self.error is not None:
+            raise self.error
+        if self.file is None:
+            self.write(b'')
+        try:
+            self.file.flush()
+            self.manifest._sync_file(self.file)
+            self.stat = os.fstat(self.file.fileno())
+            self.file.close()
+        except BaseException:
+            self.discard()
+            raise
+        return self.temp_path
+
+    def discard(self):
+        if self.file is not None:
+            self.file.close()
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+class OutputManifest:
+    """输出文件清单：路径 -> (内容哈希, 大小, 修改时间)
+
+    写文件前先对渲染结果做哈希，与上次写入的记录相同且磁盘上的文件没有被改动（大小和修改时间一致）时
+    跳过写盘。需要写的文件都先写到同目录下的临时文件再用os.replace替换，服务器或rsync在构建期间读到的
+    总是完整的旧文件或新文件。清单保存为JSON文件，跨次运行有效。remove_stale为True时，本次完整运行没有生成的旧文件会被删除。
+    """
+    def __init__(self, path=DEFAULT_MANIFEST_PATH, remove_stale=False, writer=None):
+        self.path = path
+        self.remove_stale = remove_stale
+        self.writer = writer  # 后台写线程（OutputWriter），为None时在调用线程中写盘
+        self.local = threading.local()  # 当前线程正在进行的batch
+        self.lock = threading.Lock()
+        self.entries = {}  # 路径 -> {'hash', 'size', 'mtime'}
+        self.seen = set()
+        self.retired_dirs = set()  # 已废弃的输出目录（如切换布局前的关键词站点目录）
+        self.written = 0
+        self.skipped = 0
+        self.removed = 0
+        self.bytes_written = 0
+        self.listeners = []
+        self.load()
+
+    def load(self):
+        """读取清单文件，不存在或损坏时从空清单开始（所有文件都会重新写一次）"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+            if isinstance(entries, dict):
+                self.entries = entries
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logging.warning(f"读取输出清单 {self.path} 失败: {str(e)}")
+
+    def save(self):
+        with self.lock:
+            data = json.dumps(self.entries, ensure_ascii=False, sort_keys=True, indent=0)
+        try:
+            temp_path = f'{self.path}.{threading.get_ident()}.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            logging.warning(f"保存输出清单 {self.path} 失败: {str(e)}")
+
+    @staticmethod
+    def _key(path):
+        return os.path.normpath(path).replace(os.sep, '/')
+
+    @staticmethod
+    def _unchanged_on_disk(path, entry):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        return stat.st_size == entry['size'] and stat.st_mtime_ns == entry['mtime']
+
+    def _record(self, key, path, digest, source=None, stat=None):
+        stat = stat or os.stat(path)
+        self.entries[key] = {'hash': digest, 'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+        if source is not None:
+            self.entries[key]['source'] = source
+
+    def add_listener(self, listener):
+        """登记输出回调 listener(path, digest, data)：每个本次生成（写入、跳过或登记）的文件都会通知一次，
+        data为已在内存中的内容，没有时为None"""
+        with self.lock:
+            self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        with self.lock:
+            self.listeners.remove(listener)
+
+    def _notify(self, path, digest, data=None):
+        with self.lock:
+            listeners = list(self.listeners)
+        for listener in listeners:
+            listener(path, digest, data)
+
+    def current_hash(self, path):
+        """文件最近一次记录的内容哈希"""
+        with self.lock:
+            entry = self.entries.get(self._key(path))
+            return entry['hash'] if entry else None
+
+    def is_current(self, path, source_digest):
+        """派生文件（如预压缩副本）是否由同一份源内容生成且没有被改动，是的话记为本次已生成"""
+        key = self._key(path)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry.get('source') != source_digest or not self._unchanged_on_disk(path, entry):
+                return False
+            self.seen.add(key)
+            return True
+
+    def write(self, path, data, source=None):
+        """内容有变化时写入data（bytes），返回是否真正写了磁盘（交给后台写线程或在batch中时返回None）
+
+        内容先写到同目录下的临时文件再替换原文件，读取方不会看到写了一半的文件。
+        source为派生文件对应的源内容哈希（如预压缩副本），源文件变化而派生文件没有重新生成时会在finish中删除
+        """
+        key = self._key(path)
+        digest = hashlib.sha1(data).hexdigest()
+        staged = getattr(self.local, 'batch', None)
+        if staged is not None:
+            temp_file = _TempFile(path, self)
+            self._run(key, lambda: temp_file.write(data))
+            staged.append((key, path, temp_file, digest, len(data), source))
+            return None
+        if self.writer is not None:
+            self.writer.submit(key, lambda: self._write(key, path, data, digest, source))
+            return None
+        return self._write(key, path, data, digest, source)
+
+    def _write(self, key, path, data, digest, source):
+        with self.lock:
+            self.seen.add(key)
+            entry = self.entries.get(key)
+            unchanged = entry is not None and entry['hash'] == digest and self._unchanged_on_disk(path, entry)
+            if unchanged:
+                self.skipped += 1
+                if source is not None:
+                    entry['source'] = source
+        if unchanged:
+            self._notify(path, digest, data)
+            return False
+
+        ensure_dir(os.path.dirname(path))
+        temp_path = temp_path_for(path)
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+                f.flush()
+                self._sync_file(f)
+                stat = os.fstat(f.fileno())
+            os.replace(temp_path, path)
+            self._sync_dir(path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        with self.lock:
+            self._record(key, path, digest, source, stat)
+            self.written += 1
+            self.bytes_written += len(data)
+        self._notify(path, digest, data)
+        return True
+
+    def write_chunks(self, path, chunks, encoding='utf-8', errors='strict'):
+        """边渲染边写：chunks（字符串的可迭代对象）分批编码写入同目录下的临时文件，同时计算哈希
+
+        内容与上次相同且磁盘上的文件没有被改动时丢弃临时文件，否则用临时文件替换原文件。
+        内存中最多只有一批（STREAM_BUFFER_CHARS个字符）待写的内容，返回是否真正写了磁盘。
+        有后台写线程时每批编码好的内容交给写线程写入，返回None。
+        """
+        staged = getattr(self.local, 'batch', None)
+        if self.writer is None and staged is None:
+            temp_path, digest, size = self.stage_chunks(path, chunks, encoding, errors)
+            return self.commit(path, temp_path, digest, size)
+
+        key = self._key(path)
+        temp_file = _TempFile(path, self)
+        hasher = hashlib.sha1()
+        size = 0
+        try:
+            for data in encode_batches(chunks, encoding, errors):
+                hasher.update(data)
+                size += len(data)
+                self._run(key, lambda data=data: temp_file.write(data))
+        except BaseException:
+            self._run(key, temp_file.discard)
+            raise
+        digest = hasher.hexdigest()
+        if staged is not None:
+            staged.append((key, path, temp_file, digest, size, None))
+            return None
+        self.writer.submit(key, lambda: self._commit(key, path, temp_file.close(), digest, size, temp_file.stat))
+
+    @staticmethod
+    def stage_chunks(path, chunks, encoding='utf-8', errors='strict'):
+        """把chunks写入path旁边的临时文件，返回 (临时文件路径, 内容哈希, 字节数)"""
+        ensure_dir(os.path.dirname(path))
+        temp_path = temp_path_for(path)
+        hasher = hashlib.sha1()
+        size = 0
+        try:
+            with open(temp_path, 'wb') as f:
+                for data in encode_batches(chunks, encoding, errors):
+                    hasher.update(data)
+                    f.write(data)
+                    size += len(data)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return temp_path, hasher.hexdigest(), size
+
+    def commit(self, path, temp_path, digest, size):
+        """用写好的临时文件替换path，内容与上次相同且磁盘上的文件没有被改动时丢弃临时文件，返回是否真正写了磁盘
+
+        有后台写线程时替换交给写线程，返回None
+        """
+        key = self._key(path)
+        if self.writer is not None:
+            self.writer.submit(key, lambda: self._commit(key, path, temp_path, digest, size))
+            return None
+        return self._commit(key, path, temp_path, digest, size)
+
+    def _commit(self, key, path, temp_path, digest, size, stat=None, source=None):
+        try:
+            with self.lock:
+                self.seen.add(key)
+                entry = self.entries.get(key)
+                unchanged = entry is not None and entry['hash'] == digest and self._unchanged_on_disk(path, entry)
+                if unchanged:
+                    self.skipped += 1
+                    if source is not None:
+                        entry['source'] = source
+            if unchanged:
+                os.remove(temp_path)
+                self._notify(path, digest)
+                return False
+            os.replace(temp_path, path)
+            self._sync_dir(path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        with self.lock:
+            self._record(key, path, digest, source, stat)
+            self.written += 1
+            self.bytes_written += size
+        self._notify(path, digest)
+        return True
+
+    def _run(self, key, task):
+        # 有后台写线程时交给它执行，否则在调用线程中直接执行
+        if self.writer is not None:
+            self.writer.submit(key, task)
+        else:
+            task()
+
+    def _sync_file(self, f):
+        if self.writer is not None:
+            self.writer.sync_file(f)
+
+    def _sync_dir(self, path):
+        if self.writer is not None:
+            self.writer.sync_dir(os.path.dirname(path))
+
+    @contextlib.contextmanager
+    def batch(self):
+        """在with块中（当前线程）写的文件先写到临时文件，退出with块时一起替换
+
+        替换前先等后台写线程写完已提交的所有文件，导航页、sitemap等指向其他页面的文件
+        不会早于它们指向的页面出现。with块中出错时丢弃这一批临时文件。
+        """
+        previous = getattr(self.local, 'batch', None)
+        staged = self.local.batch = []
+        try:
+            yield
+        except BaseException:
+            self.local.batch = previous
+            self.flush()
+            for _, _, temp_file, *_ in staged:
+                temp_file.discard()
+            raise
+        self.local.batch = previous
+        self.flush()
+        for key, path, temp_file, digest, size, source in staged:
+            try:
+                self._commit(key, path, temp_file.close(), digest, size, temp_file.stat, source)
+            except Exception as e:
+                logging.warning(f"替换 {path} 失败: {str(e)}")
+
+    def wait(self, path):
+        """path还在后台写线程的队列中时等它写完（读取或链接刚生成的文件之前调用）"""
+        if self.writer is not None:
+            self.writer.wait(self._key(path))
+
+    def flush(self):
+        """等待后台写线程写完已提交的所有文件"""
+        if self.writer is not None:
+            self.writer.flush()
+
+    def track(self, path):
+        """登记不经过write生成的输出文件（如硬链接的详细页面、已存在的静态资源）"""
+        key = self._key(path)
+        with self.lock:
+            self.seen.add(key)
+            entry = self.entries.get(key)
+            digest = entry['hash'] if entry is not None and self._unchanged_on_disk(path, entry) else None
+        if digest is None:
+            try:
+                with open(path, 'rb') as f:
+                    digest = hashlib.sha1(f.read()).hexdigest()
+                with self.lock:
+                    self._record(key, path, digest)
+            except OSError as e:
+                logging.warning(f"登记输出文件 {path} 失败: {str(e)}")
+                return
+        self._notify(path, digest)
+
+    def retire_dirs(self, dirs):
+        """登记已废弃的输出目录：其中本次没有生成的文件在finish时删除（不受remove_stale和complete限制），
+        删除后变空的目录也一并删除"""
+        with self.lock:
+            self.retired_dirs.update(self._key(path) for path in dirs)
+
+    def _is_retired(self, key):
+        parent = os.path.dirname(key)
+        while parent:
+            if parent in self.retired_dirs:
+                return True
+            parent = os.path.dirname(parent)
+        return False
+
+    def _prune_retired_dirs(self):
+        # 从最深的目录开始删除空目录，再向上删除变空的上级目录（如hashed布局的分片目录）
+        for path in sorted(self.retired_dirs, key=lambda path: path.count('/'), reverse=True):
+            if not os.path.isdir(path):
+                continue
+            for root, _, _ in os.walk(path, topdown=False):
+                try:
+                    os.rmdir(root)
+                except OSError:
+                    pass
+            if not os.path.exists(path):
+                try:
+                    os.removedirs(os.path.dirname(path))
+                except OSError:
+                    pass
+
+    def _is_stale(self, key, complete):
+        if self._is_retired(key):
+            return True
+        source = self.entries[key].get('source')
+        if source is None:
+            return complete and self.remove_stale
+        # 派生文件（如 index.html.gz）只在对应的源文件变化或删除后过期，本次没有重新生成也保留
+        entry = self.entries.get(os.path.splitext(key)[0])
+        return entry is None or entry['hash'] != source
+
+    def finish(self, complete=True):
+        """结束本次运行：清理已不存在的记录，删除源文件已变化的派生文件和已废弃目录中的旧文件，
+        完整运行且开启remove_stale时删除本次没有生成的旧文件，保存清单并返回统计"""
+        self.flush()
+        with self.lock:
+            # 排序后源文件排在它的派生文件（源文件名加后缀）之前，源文件被删除时派生文件随后也会删除
+            for key in sorted(key for key in self.entries if key not in self.seen):
+                if not os.path.exists(key):
+                    del self.entries[key]
+                elif self._is_stale(key, complete):
+                    try:
+                        os.remove(key)
+                        del self.entries[key]
+                        self.removed += 1
+                    except OSError as e:
+                        logging.warning(f"删除过期文件 {key} 失败: {str(e)}")
+            if self.retired_dirs:
+                self._prune_retired_dirs()
+        self.save()
+        return self.stats()
+
+    def files(self):
+        """已登记的输出文件：路径 -> 内容哈希"""
+        with self.lock:
+            return {key: entry['hash'] for key, entry in self.entries.items()}
+
+    def snapshot(self):
+        """已登记的输出文件：路径 -> {'hash', 'size'}"""
+        with self.lock:
+            return {key: {'hash': entry['hash'], 'size': entry['size']} for key, entry in self.entries.items()}
+
+    def stats(self):
+        """写入/跳过/删除统计"""
+        with self.lock:
+            return {
+                'written': self.written,
+                'skipped': self.skipped,
+                'removed': self.removed,
+                'bytes_written': self.bytes_written,
+                'files': len(self.entries)
+            }
+
+_manifest = None
+_manifest_lock = threading.Lock()
+
+def set_output_manifest(manifest):
+    """替换全局输出清单"""
+    global _manifest
+    with _manifest_lock:
+        _manifest = manifest
+
+def get_output_manifest():
+    """返回全局输出清单，首次使用时按默认路径创建"""
+    global _manifest
+    with _manifest_lock:
+        if _manifest is None:
+            _manifest = OutputManifest()
+        return _manifest
+
+def write_text(path, text, encoding='utf-8', errors='strict'):
+    """通过全局输出清单写入文本文件，内容没有变化时跳过"""
+    return get_output_manifest().write(path, text.encode(encoding, errors))
+
+def write_chunks(path, chunks, encoding='utf-8', errors='strict'):
+    """通过全局输出清单流式写入分块生成的文本文件，内容没有变化时跳过"""
+    return get_output_manifest().write_chunks(path, chunks, encoding, errors)
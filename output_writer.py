@@ -0,0 +1,160 @@
+import logging
+import os
+import queue
+import threading
+import time
+import zlib
+
+# fsync策略：never（交给操作系统）、batch（每批写完调用一次os.sync）、always（每个文件替换前fsync，再fsync所在目录）
+FSYNC_POLICIES = ('never', 'batch', 'always')
+
+# 所有写线程的队列合计最多排队的任务数（流式写入时每个任务最多一批STREAM_BUFFER_CHARS个字符）
+DEFAULT_MAX_PENDING = 256
+
+_directories = set()
+_directories_lock = threading.Lock()
+
+def ensure_dir(directory):
+    """确保目录存在，本进程中创建或确认过的目录直接返回，不再访问文件系统
+
+    运行期间目录被外部删除的情况不考虑。
+    """
+    if not directory or directory in _directories:
+        return
+    os.makedirs(directory, exist_ok=True)
+    with _directories_lock:
+        _directories.add(directory)
+
+class OutputWriter:
+    """后台写文件线程
+
+    写文件的任务（已编码好的内容，以及替换、登记等收尾操作）放进有上限的队列，由独立的写线程执行，
+    渲染线程不必等待磁盘。同一路径的任务总是交给同一个写线程，按提交顺序执行；队列满时提交方等待（背压）。
+    写线程每次取出队列中已有的全部任务作为一批执行，fsync策略见FSYNC_POLICIES。
+    """
+    def __init__(self, threads=1, max_pending=DEFAULT_MAX_PENDING, fsync='never'):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"未知的fsync策略: {fsync}")
+        self.fsync = fsync
+        self.queues = [queue.Queue(max(1, max_pending // threads)) for _ in range(threads)]
+        self.lock = threading.Lock()
+        self.idle = threading.Condition(self.lock)
+        self.pending = {}  # 路径 -> 尚未执行完的任务数
+        self.tasks = 0
+        self.batches = 0
+        self.failed = 0
+        self.fsyncs = 0
+        self.blocked_seconds = 0.0
+        self.max_batch = 0
+        self.threads = [
+            threading.Thread(target=self._run, args=(tasks,), name=f'output-writer-{i}', daemon=True)
+            for i, tasks in enumerate(self.queues)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, path, task):
+        """把task()排进path对应的写线程，在写线程中执行"""
+        with self.lock:
+            self.pending[path] = self.pending.get(path, 0) + 1
+        tasks = self.queues[zlib.crc32(path.encode('utf-8')) % len(self.queues)]
+        try:
+            tasks.put_nowait((path, task))
+        except queue.Full:
+            start = time.perf_counter()
+            tasks.put((path, task))
+            with self.lock:
+                self.blocked_seconds += time.perf_counter() - start
+
+    def _run(self, tasks):
+        while True:
+            batch = [tasks.get()]
+            while True:
+                try:
+                    batch.append(tasks.get_nowait())
+                except queue.Empty:
+                    break
+            with self.lock:
+                self.batches += 1
+                self.max_batch = max(self.max_batch, len(batch))
+            stop = False
+            for item in batch:
+                if item is None:
+                    stop = True
+                    continue
+                path, task = item
+                try:
+                    task()
+                except Exception as e:
+                    with self.lock:
+                        self.failed += 1
+                    logging.warning(f"写入 {path} 失败: {str(e)}")
+                finally:
+                    self._task_done(path)
+            if self.fsync == 'batch' and hasattr(os, 'sync'):
+                os.sync()
+                with self.lock:
+                    self.fsyncs += 1
+            if stop:
+                return
+
+    def _task_done(self, path):
+        with self.lock:
+            self.tasks += 1
+            self.pending[path] -= 1
+            if not self.pending[path]:
+                del self.pending[path]
+                self.idle.notify_all()
+
+    def sync_file(self, f):
+        """always策略下把文件内容刷到磁盘（在写线程中、文件替换之前调用）"""
+        if self.fsync != 'always':
+            return
+        f.flush()
+        os.fsync(f.fileno())
+        with self.lock:
+            self.fsyncs += 1
+
+    def sync_dir(self, directory):
+        """always策略下fsync目录，文件替换（重命名）本身也落盘"""
+        if self.fsync != 'always' or os.name != 'posix':
+            return
+        fd = os.open(directory or '.', os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def wait(self, path):
+        """等待path已提交的任务全部执行完（读取刚写的文件之前调用）"""
+        with self.idle:
+            while path in self.pending:
+                self.idle.wait()
+
+    def flush(self):
+        """等待所有已提交的任务执行完"""
+        with self.idle:
+            while self.pending:
+                self.idle.wait()
+
+    def close(self):
+        """执行完所有任务后结束写线程，返回统计"""
+        for tasks in self.queues:
+            tasks.put(None)
+        for thread in self.threads:
+            thread.join()
+        return self.stats()
+
+    def stats(self):
+        """任务数、批数、单批最多任务数、失败数、fsync次数和提交方因队列满等待的时间"""
+        with self.lock:
+            return {
+                'threads': len(self.threads),
+                'tasks': self.tasks,
+                'batches': self.batches,
+                'max_batch': self.max_batch,
+                'failed': self.failed,
+                'fsync': self.fsync,
+                'fsyncs': self.fsyncs,
+                'blocked_seconds': round(self.blocked_seconds, 2)
+            }
@@ -0,0 +1,133 @@
+import gzip
+import hashlib
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 需要预压缩的文件类型（HTML页面、样式表、sitemap和feed）
+PRECOMPRESS_SUFFIXES = ('.html', '.css', '.xml')
+
+def gzip_compress(data):
+    """gzip最高压缩级别，文件头中的时间固定为0，相同内容压缩结果相同"""
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+def brotli_compress(data):
+    return brotli.compress(data, quality=11)
+
+def available_formats():
+    """可用的压缩格式：文件后缀 -> 压缩函数（没有安装brotli时只生成.gz）"""
+    formats = {'gz': gzip_compress}
+    if brotli is not None:
+        formats['br'] = brotli_compress
+    return formats
+
+class Precompressor:
+    """在后台线程池中为输出文件生成预压缩副本（index.html -> index.html.gz / index.html.br）
+
+    通过输出清单的回调得知本次生成的每个文件，源文件内容没有变化且副本还在时直接跳过。
+    副本也记录在输出清单中（附带源文件哈希），源文件变化而副本没有重新生成时会被删除，
+    不会出现gzip_static读到过期副本的情况。
+    """
+    def __init__(self, manifest, max_workers=None, formats=None, suffixes=PRECOMPRESS_SUFFIXES):
+        self.manifest = manifest
+        self.formats = formats or available_formats()
+        self.suffixes = tuple(suffixes)
+        self.pool = ThreadPoolExecutor(max_workers=max_workers or os.cpu_count(), thread_name_prefix='precompress')
+        self.lock = threading.Lock()
+        # 检查源文件是否仍是当前版本和写副本要一起完成；与计数用的lock分开，
+        # 后台写线程队列满时写副本会等待，而写线程回调on_output时需要lock
+        self.write_lock = threading.Lock()
+        self.compressed = 0
+        self.skipped = 0
+        self.failed = 0
+        self.bytes_in = dict.fromkeys(self.formats, 0)
+        self.bytes_out = dict.fromkeys(self.formats, 0)
+        self.seconds = dict.fromkeys(self.formats, 0.0)
+        self.started = time.perf_counter()
+        self.elapsed = None
+        manifest.add_listener(self.on_output)
+
+    def on_output(self, path, digest, data=None):
+        """输出清单的回调：源内容变化或副本缺失时提交压缩任务"""
+        if not path.endswith(self.suffixes):
+            return
+        targets = []
+        for suffix, compress in self.formats.items():
+            target = f'{path}.{suffix}'
+            if self.manifest.is_current(target, digest):
+                with self.lock:
+                    self.skipped += 1
+            else:
+                targets.append((suffix, target, compress))
+        if targets:
+            self.pool.submit(self._compress, path, digest, data, targets)
+
+    def _compress(self, path, digest, data, targets):
+        try:
+            if data is None:
+                with open(path, 'rb') as f:
+                    data = f.read()
+            # 排队期间文件又被重写过，交给后提交的任务处理
+            if hashlib.sha1(data).hexdigest() != digest:
+                return
+            for suffix, target, compress in targets:
+                start = time.perf_counter()
+                compressed = compress(data)
+                elapsed = time.perf_counter() - start
+                with self.write_lock:
+                    if self.manifest.current_hash(path) != digest:
+                        return
+                    self.manifest.write(target, compressed, source=digest)
+                with self.lock:
+                    self.compressed += 1
+                    self.bytes_in[suffix] += len(data)
+                    self.bytes_out[suffix] += len(compressed)
+                    self.seconds[suffix] += elapsed
+        except Exception as e:
+            with self.lock:
+                self.failed += 1
+            logging.warning(f"预压缩 {path} 失败: {str(e)}")
+
+    def close(self):
+        """等待所有压缩任务完成，返回统计"""
+        self.pool.shutdown(wait=True)
+        self.manifest.remove_listener(self.on_output)
+        self.elapsed = time.perf_counter() - self.started
+        return self.stats()
+
+    def stats(self):
+        """压缩文件数、跳过数，各格式的压缩率（压缩后/压缩前）和累计压缩耗时"""
+        with self.lock:
+            stats = {'compressed': self.compressed, 'skipped': self.skipped, 'failed': self.failed}
+            for suffix in self.formats:
+                ratio = self.bytes_out[suffix] / self.bytes_in[suffix] if self.bytes_in[suffix] else 0
+                stats[suffix] = {
+                    'bytes_in': self.bytes_in[suffix],
+                    'bytes_out': self.bytes_out[suffix],
+                    'ratio': round(ratio, 3),
+                    'seconds': round(self.seconds[suffix], 2)
+                }
+            if self.elapsed is not None:
+                stats['wall_seconds'] = round(self.elapsed, 2)
+            return stats
+
+_precompressor = None
+_precompressor_lock = threading.Lock()
+
+def set_precompressor(precompressor):
+    """启用（或传入None关闭）预压缩阶段"""
+    global _precompressor
+    with _precompressor_lock:
+        _precompressor = precompressor
+
+def get_precompressor():
+    """当前的预压缩器，没有启用时返回None"""
+    with _precompressor_lock:
+        return _precompressor
@@ -0,0 +1,170 @@
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from build_clock import build_now, set_build_time
+from output_manifest import OutputManifest, get_output_manifest, set_output_manifest
+from structured_data import get_json_encoder, set_json_encoder
+
+class StagedOutput(OutputManifest):
+    """渲染进程中使用的输出清单：页面只写到临时文件，替换、跳过和登记都交给主进程的输出清单"""
+    def __init__(self):
+        super().__init__(path=None)
+        self.staged = []  # ('commit', 路径, 临时文件, 哈希, 字节数) / ('write', 路径, 内容, 源哈希) / ('track', 路径)
+
+    def load(self):
+        pass
+
+    def save(self):
+        pass
+
+    def commit(self, path, temp_path, digest, size):
+        self.staged.append(('commit', path, temp_path, digest, size))
+        return True
+
+    def write(self, path, data, source=None):
+        self.staged.append(('write', path, data, source))
+        return True
+
+    def track(self, path):
+        self.staged.append(('track', path))
+
+def apply_staged(manifest, staged):
+    """在主进程中把渲染进程的输出提交到输出清单（内容没有变化的文件照常跳过）"""
+    for kind, path, *args in staged:
+        if kind == 'commit':
+            manifest.commit(path, *args)
+        elif kind == 'write':
+            manifest.write(path, *args)
+        else:
+            manifest.track(path)
+
+def _init_worker(build_time, json_encoder):
+    # 子进程使用与主进程相同的构建时间和JSON编码器，生成的页面与单进程渲染逐字节相同
+    set_build_time(build_time)
+    set_json_encoder(json_encoder)
+
+def _run_job(render, args):
+    staged = StagedOutput()
+    set_output_manifest(staged)
+    return render(*args), staged.staged
+
+class RenderPool:
+    """多进程渲染阶段
+
+    抓取、解析结果的登记和依赖图都留在主进程，渲染和写盘交给进程池：每个任务在子进程中调用render(*args)
+    （render和参数都要能pickle，一般是脚本中的模块级函数），页面写到临时文件；结果回到主进程后由输出清单提交，
+    再调用on_done(返回值)。同一个key（如同一个搜索词）同时只提交一次，wait(key)等待它完成。
+    排队中的任务数有上限，主进程不会一次把所有数据都读进内存。
+    """
+    def __init__(self, max_workers=None, manifest=None):
+        self.max_workers = max_workers or os.cpu_count()
+        self.manifest = manifest or get_output_manifest()
+        # 用spawn启动子进程：主进程中已有预压缩、事件循环等线程，fork可能复制到被其他线程持有的锁
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(build_now(), get_json_encoder())
+        )
+        self.slots = threading.BoundedSemaphore(self.max_workers * 4)
+        self.lock = threading.Lock()
+        self.pending = {}  # key -> 完成事件
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.started = time.perf_counter()
+        self.elapsed = None
+
+    def submit(self, key, render, args, on_done=None):
+        """提交渲染任务，同一个key正在渲染时不重复提交，返回是否提交了"""
+        with self.lock:
+            if key in self.pending:
+                return False
+            self.pending[key] = threading.Event()
+            self.submitted += 1
+        self.slots.acquire()
+        try:
+            future = self.executor.submit(_run_job, render, args)
+        except BaseException:
+            self.slots.release()
+            self._done(key)
+            raise
+        future.add_done_callback(lambda future: self._finish(key, future, on_done))
+        return True
+
+    def _finish(self, key, future, on_done):
+        # 在进程池的结果线程中执行：提交输出，再交给调用方登记
+        try:
+            result, staged = future.result()
+            apply_staged(self.manifest, staged)
+            if on_done is not None:
+                on_done(result)
+            with self.lock:
+                self.completed += 1
+        except Exception as e:
+            with self.lock:
+                self.failed += 1
+            logging.warning(f"渲染 {key} 失败: {str(e)}")
+        finally:
+            self.slots.release()
+            self._done(key)
+
+    def _done(self, key):
+        with self.lock:
+            event = self.pending.pop(key)
+        event.set()
+
+    def wait(self, key):
+        """key正在渲染时等待它完成"""
+        with self.lock:
+            event = self.pending.get(key)
+        if event is not None:
+            event.wait()
+
+    def join(self):
+        """等待已提交的任务全部完成（进程池继续可用）"""
+        while True:
+            with self.lock:
+                events = list(self.pending.values())
+            if not events:
+                return
+            for event in events:
+                event.wait()
+
+    def close(self):
+        """等待所有任务完成并关闭进程池，返回统计"""
+        self.executor.shutdown(wait=True)
+        self.elapsed = time.perf_counter() - self.started
+        return self.stats()
+
+    def stats(self):
+        """提交、完成、失败的任务数，关闭后还有总耗时和每秒完成的页面数"""
+        with self.lock:
+            stats = {
+                'workers': self.max_workers,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed
+            }
+            if self.elapsed is not None:
+                stats['wall_seconds'] = round(self.elapsed, 2)
+                stats['pages_per_second'] = round(self.completed / self.elapsed, 1) if self.elapsed else 0
+            return stats
+
+_render_pool = None
+_render_pool_lock = threading.Lock()
+
+def set_render_pool(pool):
+    """启用（或传入None关闭）多进程渲染"""
+    global _render_pool
+    with _render_pool_lock:
+        _render_pool = pool
+
+def get_render_pool():
+    """当前的渲染进程池，没有启用时返回None（在调用线程中渲染）"""
+    with _render_pool_lock:
+        return _render_pool
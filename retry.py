@@ -0,0 +1,173 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+
+# 默认重试参数：最多尝试次数、退避基准和上限（秒）
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_BASE_DELAY = 1.0
+DEFAULT_MAX_DELAY = 30.0
+
+# 默认熔断参数：连续失败多少次后熔断，熔断多久后放行一次试探请求（秒）
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 60.0
+
+class CircuitOpenError(Exception):
+    """熔断器处于打开状态，请求被直接拒绝"""
+
+class CircuitBreaker:
+    """熔断器：连续失败达到阈值后打开，reset_timeout秒内拒绝所有请求，之后放行一次试探
+
+    试探成功则恢复，失败则重新打开。多个线程和事件循环可以共用同一个熔断器。
+    """
+    def __init__(self, failure_threshold=DEFAULT_FAILURE_THRESHOLD, reset_timeout=DEFAULT_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.lock = threading.Lock()
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.trips = 0
+        self.rejected = 0
+
+    def allow(self):
+        """检查是否允许发出请求，不允许时抛出CircuitOpenError"""
+        with self.lock:
+            if self.opened_at is None:
+                return
+            if not self.probing and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.probing = True  # 半开：只放行这一次试探
+                return
+            self.rejected += 1
+        raise CircuitOpenError(f"连续失败 {self.failures} 次，熔断中")
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            # 试探失败，或者关闭状态下连续失败达到阈值时打开
+            if self.probing or (self.opened_at is None and self.failures >= self.failure_threshold):
+                self.trips += 1
+                self.opened_at = time.monotonic()
+                self.probing = False
+                logging.warning(f"连续失败 {self.failures} 次，熔断 {self.reset_timeout} 秒")
+
+    def release_probe(self):
+        """试探请求既没有成功也没有按失败记录就结束（非重试异常、被取消）时调用，下次请求重新试探"""
+        with self.lock:
+            self.probing = False
+
+    @property
+    def is_open(self):
+        with self.lock:
+            return self.opened_at is not None
+
+class RetryPolicy:
+    """重试策略：只对retry_on中的异常重试，退避时间采用去相关抖动（decorrelated jitter）
+
+    策略对象本身只保存配置和统计，每次call的重试次数和退避时间都是局部状态，
+    不同调用之间互不影响。传入breaker时，每次尝试前先经过熔断器。
+    """
+    def __init__(self, retry_on, max_attempts=DEFAULT_MAX_ATTEMPTS, base_delay=DEFAULT_BASE_DELAY,
+                 max_delay=DEFAULT_MAX_DELAY, breaker=None):
+        self.retry_on = tuple(retry_on)
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+
+    def next_delay(self, previous):
+        """去相关抖动：在 [base, previous*3] 之间随机取值，不超过max_delay"""
+        return min(self.max_delay, random.uniform(self.base_delay, max(self.base_delay, previous * 3)))
+
+    def _count(self, name):
+        with self.lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _before_attempt(self):
+        if self.breaker is not None:
+            self.breaker.allow()
+
+    def _after_failure(self, error, attempt, delay, description):
+        """记录一次失败，返回下次重试前的等待时间；不应再重试时返回None"""
+        if self.breaker is not None:
+            self.breaker.record_failure()
+        if attempt >= self.max_attempts or (self.breaker is not None and self.breaker.is_open):
+            self._count('failures')
+            return None
+        delay = self.next_delay(delay)
+        self._count('retries')
+        logging.warning(f"{description} 第 {attempt} 次失败，{delay:.1f}秒后重试: {str(error)}")
+        return delay
+
+    def _after_success(self):
+        if self.breaker is not None:
+            self.breaker.record_success()
+
+    def _after_abort(self):
+        # 不在retry_on中的异常（包括取消）：不计入熔断失败，但要释放半开状态的试探名额
+        if self.breaker is not None:
+            self.breaker.release_probe()
+
+    def call(self, func, *args, description='请求', **kwargs):
+        """同步执行func，按策略重试"""
+        self._count('calls')
+        delay = self.base_delay
+        attempt = 0
+        while True:
+            attempt += 1
+            self._before_attempt()
+            try:
+                result = func(*args, **kwargs)
+            except self.retry_on as e:
+                delay = self._after_failure(e, attempt, delay, description)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            except BaseException:
+                self._after_abort()
+                raise
+            self._after_success()
+            return result
+
+    async def call_async(self, func, *args, description='请求', **kwargs):
+        """异步执行协程函数func，按策略重试（等待期间不阻塞事件循环）"""
+        self._count('calls')
+        delay = self.base_delay
+        attempt = 0
+        while True:
+            attempt += 1
+            self._before_attempt()
+            try:
+                result = await func(*args, **kwargs)
+            except self.retry_on as e:
+                delay = self._after_failure(e, attempt, delay, description)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                self._after_abort()
+                raise
+            self._after_success()
+            return result
+
+    def stats(self):
+        """重试和熔断统计"""
+        with self.lock:
+            stats = {'calls': self.calls, 'retries': self.retries, 'failures': self.failures}
+        if self.breaker is not None:
+            stats['trips'] = self.breaker.trips
+            stats['rejected'] = self.breaker.rejected
+        return stats
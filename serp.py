@@ -0,0 +1,464 @@
+import asyncio
+import codecs
+import logging
+import re
+import threading
+import urllib.parse
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from lxml import etree
+
+from archive import ResponseArchive
+from fetch_cache import FetchCache, empty_stats
+from retry import CircuitBreaker, CircuitOpenError, RetryPolicy
+from transport import RETRYABLE_ERRORS, RetryableStatusError, SyncTransport, check_status
+
+# 百度搜索结果页地址
+SERP_URL = 'http://www.baidu.com/s?wd={}'
+
+# 设置请求头，模拟浏览器访问
+headers = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+# 最近使用的SERP文档数量上限（同一个词的详情页和相关搜索会连续用到）
+MAX_RECENT_DOCUMENTS = 32
+
+# 搜索结果容器的ID（前10条结果，兼容多出的一条）
+_RESULT_IDS = {str(result_id): result_id for result_id in range(1, 12)}
+
+# 预编译的XPath：导入时编译一次，容器内使用相对路径
+_RESULT_CONTAINERS = etree.XPath('//*[@id]')
+_RESULT_TITLE = etree.XPath('div/div[1]/h3/a//text()')
+_RESULT_ABSTRACT = etree.XPath('div/div[1]/div[2]/div[1]/div[2]//text()')
+_RESULT_SOURCE = etree.XPath('div/div[1]/div[2]/div[1]/div[2]/div/a/span/text()')
+_RESULT_URL = etree.XPath('@mu')
+_RELATED_TERMS = etree.XPath('//*[@id="rs_new"]/div/table//td/a/span/text()')
+_RELATED_SEARCHES = etree.XPath('//*[@id="rs_new"]/div/table//text()')
+
+# 从Content-Type响应头或页面meta标签中识别字符集
+_CHARSET_HEADER = re.compile(r'charset=["\']?([\w.:-]+)', re.I)
+_CHARSET_META = re.compile(rb'<meta[^>]+charset=["\']?([\w.:-]+)', re.I)
+DEFAULT_CHARSET = 'utf-8'
+
+# 每个线程复用自己的HTMLParser（lxml的解析器对象不能跨线程共用）
+_parsers = threading.local()
+
+_recent_documents = OrderedDict()
+_recent_lock = threading.Lock()
+
+_fetch_cache = None
+_fetch_cache_disabled = False
+_fetch_cache_lock = threading.Lock()
+
+# 同步抓取共用的传输层（连接池复用长连接）
+_transport = None
+_transport_lock = threading.Lock()
+
+_retry_policy = None
+_retry_policy_lock = threading.Lock()
+
+# 响应归档：record模式把抓到的响应写入归档，replay模式只从归档读取
+_archive = None
+_archive_mode = None
+
+def build_serp_url(term):
+    """生成搜索词对应的百度搜索地址"""
+    return SERP_URL.format(urllib.parse.quote(term))
+
+def is_chinese_text(text):
+    """判断文本是否包含中文"""
+    for char in text:
+        if '\u4e00' <= char <= '\u9fff':
+            return True
+    return False
+
+def detect_charset(content, content_type=None):
+    """确定页面字符集：优先取响应头，其次取页面前4KB中的meta标签，默认utf-8"""
+    match = _CHARSET_HEADER.search(content_type or '')
+    if match is None:
+        match = _CHARSET_META.search(content[:4096])
+    if match is None:
+        return DEFAULT_CHARSET
+    charset = match.group(1)
+    if isinstance(charset, bytes):
+        charset = charset.decode('ascii', errors='ignore')
+    try:
+        return codecs.lookup(charset).name
+    except LookupError:
+        return DEFAULT_CHARSET
+
+def get_html_parser(encoding=DEFAULT_CHARSET):
+    """返回当前线程中指定字符集的HTMLParser，同一线程内重复使用"""
+    parsers = getattr(_parsers, 'by_encoding', None)
+    if parsers is None:
+        parsers = _parsers.by_encoding = {}
+    parser = parsers.get(encoding)
+    if parser is None:
+        parser = parsers[encoding] = etree.HTMLParser(encoding=encoding)
+    return parser
+
+def parse_html_bytes(content, encoding=None):
+    """直接解析原始字节，不先解码成str，内容为空时返回None"""
+    if not content:
+        return None
+    return etree.HTML(content, parser=get_html_parser(encoding or detect_charset(content)))
+
+def extract_result_items(html):
+    """从搜索结果页中提取前10条结果的标题、摘要、来源和链接
+
+    先一次性找出id为1~11的结果容器，再在每个容器内用预编译的相对XPath取值
+    """
+    containers = {}
+    for element in _RESULT_CONTAINERS(html):
+        result_id = _RESULT_IDS.get(element.get('id'))
+        if result_id is not None:
+            containers.setdefault(result_id, []).append(element)
+
+    contents = []
+
+    # 按结果ID顺序遍历
+    for result_id in sorted(containers):
+        try:
+            elements = containers[result_id]
+
+            # 获取标题
+            title = [text for element in elements for text in _RESULT_TITLE(element)]
+            if not title:
+                continue
+            temp_title = ''.join(title).strip()
+            if not is_chinese_text(temp_title):
+                continue
+
+            # 获取摘要
+            abstract = [text for element in elements for text in _RESULT_ABSTRACT(element)]
+            abstract_text = ''.join(abstract).strip()
+            if not abstract_text:
+                continue
+
+            # 获取来源和URL
+            source = [text for element in elements for text in _RESULT_SOURCE(element)]
+            url_element = [value for element in elements for value in _RESULT_URL(element)]
+
+            contents.append({
+                'title': temp_title,
+                'abstract': abstract_text,
+                'source': source[0].strip() if source else "",
+                'url': url_element[0] if url_element else ""
+            })
+
+        except Exception as e:
+            print(f"处理第 {result_id} 条搜索结果时出错: {str(e)}")
+            continue
+
+    return contents
+
+def extract_related_terms(html):
+    """提取详情页使用的相关搜索词（#rs_new 中的链接文字）"""
+    related_terms = _RELATED_TERMS(html)
+    return [term.strip() for term in related_terms if term.strip()]
+
+def extract_related_searches(html):
+    """提取关键词页使用的相关搜索词（#rs_new 表格中的全部文字）"""
+    related_searches = _RELATED_SEARCHES(html)
+    return [term.strip() for term in related_searches if term.strip()]
+
+def parse_serp_content(content, encoding=None):
+    """解析SERP原始字节并返回紧凑的结果元组，可在线程池或进程池中执行
+
+    返回 (items, related_terms, related_searches)，items中每项为 (title, abstract, source, url)
+    """
+    tree = parse_html_bytes(content, encoding)
+    if tree is None:
+        return (), (), ()
+    items = tuple(
+        (content_item['title'], content_item['abstract'], content_item['source'], content_item['url'])
+        for content_item in extract_result_items(tree)
+    )
+    return items, tuple(extract_related_terms(tree)), tuple(extract_related_searches(tree))
+
+def create_parse_executor(kind, max_workers=None):
+    """创建异步模式的解析执行器
+
+    'thread' 使用线程池，'process' 使用进程池（只传递原始字节和结果元组），
+    'inline' 返回None，表示直接在事件循环中解析
+    """
+    if kind == 'inline':
+        return None
+    if kind == 'thread':
+        return ThreadPoolExecutor(max_workers=max_workers)
+    if kind == 'process':
+        return ProcessPoolExecutor(max_workers=max_workers)
+    raise ValueError(f"未知的解析执行器类型: {kind}")
+
+class SerpDocument:
+    """一个搜索词的搜索结果页：只获取一次、只解析一次，供所有提取函数共享"""
+    def __init__(self, term, content, encoding=None):
+        self.term = term
+        self.url = build_serp_url(term)
+        self.content = content  # 原始响应字节
+        self.encoding = encoding or detect_charset(content)
+        self._tree = None
+        self._items = None
+        self._related_terms = None
+        self._related_searches = None
+        self._lock = threading.Lock()
+
+    def apply_parsed(self, parsed):
+        """填入parse_serp_content在其他线程/进程中得到的解析结果"""
+        items, related_terms, related_searches = parsed
+        self._items = [
+            {'title': title, 'abstract': abstract, 'source': source, 'url': url}
+            for title, abstract, source, url in items
+        ]
+        self._related_terms = list(related_terms)
+        self._related_searches = list(related_searches)
+
+    @property
+    def tree(self):
+        """解析后的lxml文档树，首次访问时解析"""
+        with self._lock:
+            if self._tree is None:
+                self._tree = parse_html_bytes(self.content, self.encoding)
+            return self._tree
+
+    @property
+    def items(self):
+        """搜索结果条目列表（title/abstract/source/url）"""
+        if self._items is None:
+            tree = self.tree
+            self._items = extract_result_items(tree) if tree is not None else []
+        return self._items
+
+    @property
+    def related_terms(self):
+        """详情页底部的相关搜索词"""
+        if self._related_terms is None:
+            tree = self.tree
+            self._related_terms = extract_related_terms(tree) if tree is not None else []
+        return self._related_terms
+
+    @property
+    def related_searches(self):
+        """关键词页使用的相关搜索词"""
+        if self._related_searches is None:
+            tree = self.tree
+            self._related_searches = extract_related_searches(tree) if tree is not None else []
+        return self._related_searches
+
+def remember_document(document):
+    """记录最近获取的SERP文档，供同一个词的后续调用复用"""
+    with _recent_lock:
+        _recent_documents[document.term] = document
+        _recent_documents.move_to_end(document.term)
+        while len(_recent_documents) > MAX_RECENT_DOCUMENTS:
+            _recent_documents.popitem(last=False)
+
+def get_recent_document(term):
+    """返回最近获取过的SERP文档，没有则返回None"""
+    with _recent_lock:
+        document = _recent_documents.get(term)
+        if document is not None:
+            _recent_documents.move_to_end(term)
+        return document
+
+def set_fetch_cache(cache):
+    """设置抓取缓存，传入None则关闭缓存"""
+    global _fetch_cache, _fetch_cache_disabled
+    with _fetch_cache_lock:
+        _fetch_cache = cache
+        _fetch_cache_disabled = cache is None
+
+def get_fetch_cache():
+    """返回抓取缓存，首次使用时在cache目录下创建；缓存已关闭时返回None"""
+    global _fetch_cache
+    with _fetch_cache_lock:
+        if _fetch_cache is None and not _fetch_cache_disabled:
+            _fetch_cache = FetchCache()
+        return _fetch_cache
+
+def fetch_cache_stats():
+    """抓取缓存统计，缓存已关闭时返回None；本次运行没有用到缓存时各项为0，不为统计而打开缓存"""
+    with _fetch_cache_lock:
+        if _fetch_cache_disabled:
+            return None
+        cache = _fetch_cache
+    return cache.stats() if cache is not None else empty_stats()
+
+def set_transport(transport):
+    """设置同步抓取使用的传输层"""
+    global _transport
+    _transport = transport
+
+def get_transport():
+    """返回同步抓取使用的传输层，首次使用时创建"""
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = SyncTransport(headers=headers)
+        return _transport
+
+def set_retry_policy(policy):
+    """替换全局重试策略，同步和异步抓取共用"""
+    global _retry_policy
+    with _retry_policy_lock:
+        _retry_policy = policy
+
+def get_retry_policy():
+    """返回全局重试策略，首次使用时按默认参数创建（带熔断器）"""
+    global _retry_policy
+    with _retry_policy_lock:
+        if _retry_policy is None:
+            _retry_policy = RetryPolicy(RETRYABLE_ERRORS, breaker=CircuitBreaker())
+        return _retry_policy
+
+def configure_archive(path, mode):
+    """开启响应归档，mode为'record'（录制）或'replay'（回放，不访问网络）"""
+    global _archive, _archive_mode
+    if mode not in ('record', 'replay'):
+        raise ValueError(f"未知的归档模式: {mode}")
+    close_archive()
+    _archive = ResponseArchive(path, writable=(mode == 'record'))
+    _archive_mode = mode
+    return _archive
+
+def close_archive():
+    """关闭响应归档并输出统计"""
+    global _archive, _archive_mode
+    if _archive is not None:
+        logging.info(f"响应归档统计({_archive_mode}): {_archive.stats()}")
+        _archive.close()
+    _archive = None
+    _archive_mode = None
+
+def is_replaying():
+    """是否处于回放模式（回放时不访问网络，也无需请求间隔）"""
+    return _archive_mode == 'replay'
+
+def _replay_content(url):
+    """从归档中取回响应体，非200或未录制时返回None"""
+    entry = _archive.lookup(url)
+    if entry is None:
+        logging.warning(f"归档中没有 {url} 的记录")
+        return None
+    status, content = entry
+    return (content, None) if status == 200 else None
+
+def fetch_serp_content(url):
+    """获取搜索结果页，返回 (原始字节, 响应头中的字符集)，优先读取缓存，失败返回None
+
+    缓存和归档只保存字节，命中时字符集为None，由页面meta标签识别
+    """
+    if is_replaying():
+        return _replay_content(url)
+
+    cache = get_fetch_cache()
+    content = cache.get(url) if cache else None
+    charset = None
+    if content is None:
+        transport = get_transport()
+        try:
+            result = get_retry_policy().call(lambda: check_status(transport.get(url)), description=url)
+        except RetryableStatusError as e:
+            result = e.result  # 重试用尽，按最后一次的响应处理
+        except CircuitOpenError as e:
+            logging.warning(f"跳过 {url}: {str(e)}")
+            return None
+        status, content = result.status, result.content
+        charset = detect_charset(content, result.headers.get('Content-Type'))
+        if status == 200 and cache:
+            cache.set(url, content)
+    else:
+        status = 200
+
+    if _archive_mode == 'record':
+        _archive.record(url, status, content)
+    return (content, charset) if status == 200 else None
+
+async def fetch_serp_content_async(transport, url):
+    """异步获取搜索结果页，返回值与fetch_serp_content相同，共用缓存和归档"""
+    if is_replaying():
+        return _replay_content(url)
+
+    cache = get_fetch_cache()
+    content = cache.get(url) if cache else None
+    charset = None
+    if content is None:
+        async def get_checked():
+            return check_status(await transport.get(url))
+        try:
+            result = await get_retry_policy().call_async(get_checked, description=url)
+        except RetryableStatusError as e:
+            result = e.result  # 重试用尽，按最后一次的响应处理
+        except CircuitOpenError as e:
+            logging.warning(f"跳过 {url}: {str(e)}")
+            return None
+        status, content = result.status, result.content
+        charset = detect_charset(content, result.headers.get('Content-Type'))
+        if status == 200 and cache:
+            cache.set(url, content)
+    else:
+        status = 200
+
+    if _archive_mode == 'record':
+        _archive.record(url, status, content)
+    return (content, charset) if status == 200 else None
+
+def get_serp_document(term):
+    """获取搜索词的SERP文档，最近获取过的词直接复用，不再重复请求"""
+    document = get_recent_document(term)
+    if document is not None:
+        return document
+
+    fetched = fetch_serp_content(build_serp_url(term))
+    if fetched is None:
+        return None
+
+    content, charset = fetched
+    document = SerpDocument(term, content, charset)
+    remember_document(document)
+    return document
+
+def get_cached_document(term):
+    """只从抓取缓存（回放模式下为归档）取搜索词的SERP文档，不访问网络，没有时返回None
+
+    返回的文档尚未解析，可以把原始字节交给其他进程解析
+    """
+    document = get_recent_document(term)
+    if document is not None:
+        return document
+
+    url = build_serp_url(term)
+    if is_replaying():
+        fetched = _replay_content(url)
+    else:
+        cache = get_fetch_cache()
+        content = cache.get(url) if cache else None
+        fetched = (content, None) if content is not None else None
+    if fetched is None:
+        return None
+    content, charset = fetched
+    return SerpDocument(term, content, charset)
+
+async def get_serp_document_async(transport, term, parse_executor=None):
+    """异步获取搜索词的SERP文档
+
+    传入parse_executor时在执行器中完成解析，事件循环只负责网络等待；
+    否则保持原来的方式，在首次访问结果时于调用线程中解析
+    """
+    document = get_recent_document(term)
+    if document is not None:
+        return document
+
+    fetched = await fetch_serp_content_async(transport, build_serp_url(term))
+    if fetched is None:
+        return None
+
+    content, charset = fetched
+    document = SerpDocument(term, content, charset)
+    if parse_executor is not None:
+        loop = asyncio.get_running_loop()
+        document.apply_parsed(await loop.run_in_executor(parse_executor, parse_serp_content, content, document.encoding))
+    remember_document(document)
+    return document
@@ -0,0 +1,139 @@
+import logging
+import mmap
+import os
+import shutil
+import struct
+import zipfile
+
+from output_manifest import temp_path_for
+
+# ZIP本地文件头（定长30字节，后面跟文件名和扩展字段），用来算出每个文件内容在打包文件中的位置
+_LOCAL_HEADER = struct.Struct('<4s5H3L2H')
+
+# 打包文件中的时间戳固定，相同内容打出的包逐字节相同
+_ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+# 追加写入后失效内容超过有效内容的这个倍数（且超过COMPACT_MIN_BYTES）时整体重写一次
+COMPACT_RATIO = 1.0
+COMPACT_MIN_BYTES = 16 * 1024 * 1024
+
+def bundle_name(path, root='.'):
+    """输出文件在打包文件中的路径（相对于站点根目录，用/分隔），不在站点根目录下时返回None"""
+    name = os.path.relpath(path, root).replace(os.sep, '/')
+    if name == '.' or name.startswith('../') or name == '..' or os.path.isabs(name):
+        return None
+    return name
+
+def _add_file(bundle, name, path, digest):
+    # 不压缩（ZIP_STORED）：内容在打包文件中连续存放，服务器可以直接从mmap中切片返回
+    info = zipfile.ZipInfo(name, date_time=_ZIP_DATE_TIME)
+    info.compress_type = zipfile.ZIP_STORED
+    info.external_attr = 0o644 << 16
+    info.comment = digest.encode('ascii')
+    with open(path, 'rb') as src, bundle.open(info, 'w') as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+    return info.file_size
+
+def _write_bundle(bundle_path, files):
+    # 按路径顺序写一个全新的打包文件，写完再替换旧文件
+    temp_path = temp_path_for(bundle_path)
+    size = 0
+    try:
+        with zipfile.ZipFile(temp_path, 'w', zipfile.ZIP_STORED) as bundle:
+            for name in sorted(files):
+                path, digest = files[name]
+                size += _add_file(bundle, name, path, digest)
+        os.replace(temp_path, bundle_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return size
+
+def pack_site(files, bundle_path, root='.'):
+    """把输出文件打包进bundle_path（ZIP格式，任何解压工具都能打开），返回统计
+
+    files为输出清单中的 路径 -> 内容哈希。打包文件已存在时只把新增和内容变化的文件追加到数据区末尾，
+    再重写按路径排序的索引（ZIP中央目录）；旧内容留在原处成为失效数据，失效数据太多或只有删除时整体重写一次。
+    """
+    wanted = {}
+    for path, digest in files.items():
+        name = bundle_name(path, root)
+        if name is not None and os.path.isfile(path):
+            wanted[name] = (path, digest)
+
+    existing = {}
+    if os.path.exists(bundle_path):
+        try:
+            with zipfile.ZipFile(bundle_path) as bundle:
+                existing = {info.filename: info for info in bundle.infolist()}
+        except (OSError, zipfile.BadZipFile) as e:
+            logging.warning(f"读取打包文件 {bundle_path} 失败，重新打包: {str(e)}")
+            existing = None
+
+    changed = [name for name, (_, digest) in wanted.items()
+               if existing is None or name not in existing or existing[name].comment.decode('ascii', 'replace') != digest]
+    removed = [name for name in existing or () if name not in wanted]
+    stats = {'files': len(wanted), 'added': len(changed), 'removed': len(removed), 'bytes_added': 0, 'rewritten': False}
+    if existing is not None and not changed and not removed:
+        stats['bundle_bytes'] = os.path.getsize(bundle_path)
+        return stats
+
+    live = sum(os.path.getsize(path) for path, _ in wanted.values())
+    total = (os.path.getsize(bundle_path) if existing else 0) + sum(os.path.getsize(wanted[name][0]) for name in changed)
+    if not existing or (removed and not changed) or (total - live > COMPACT_MIN_BYTES and total - live > live * COMPACT_RATIO):
+        stats['bytes_added'] = _write_bundle(bundle_path, wanted)
+        stats['rewritten'] = True
+    else:
+        with zipfile.ZipFile(bundle_path, 'a', zipfile.ZIP_STORED) as bundle:
+            # 变化和删除的文件先从索引中去掉，新内容追加在数据区末尾
+            dropped = set(changed) | set(removed)
+            bundle.filelist = [info for info in bundle.filelist if info.filename not in dropped]
+            for name in removed:
+                del bundle.NameToInfo[name]
+            for name in changed:
+                bundle.NameToInfo.pop(name, None)
+                path, digest = wanted[name]
+                stats['bytes_added'] += _add_file(bundle, name, path, digest)
+            bundle.filelist.sort(key=lambda info: info.filename)
+    stats['bundle_bytes'] = os.path.getsize(bundle_path)
+    return stats
+
+class SiteBundle:
+    """用mmap只读打开的打包文件：路径 -> 内容
+
+    get返回的是mmap上的memoryview切片，不复制页面内容。打开后打包文件被追加写入不影响已打开的索引
+    （追加只写在原数据区之后），重新打包后需要重新打开才能看到新内容。
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.map)
+        self.index = {}  # 路径 -> (内容起始位置, 字节数, 内容哈希)
+        with zipfile.ZipFile(path) as bundle:
+            for info in bundle.infolist():
+                if info.compress_type != zipfile.ZIP_STORED:
+                    logging.warning(f"{path} 中的 {info.filename} 是压缩存放的，跳过")
+                    continue
+                header = _LOCAL_HEADER.unpack_from(self.map, info.header_offset)
+                start = info.header_offset + _LOCAL_HEADER.size + header[-2] + header[-1]
+                self.index[info.filename] = (start, info.file_size, info.comment.decode('ascii', 'replace'))
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def get(self, name):
+        """返回 (内容, 内容哈希)，不存在时返回None"""
+        entry = self.index.get(name)
+        if entry is None:
+            return None
+        start, size, digest = entry
+        return self.view[start:start + size], digest
+
+    def close(self):
+        self.view.release()
+        self.map.close()
@@ -0,0 +1,63 @@
+import hashlib
+import os
+import threading
+
+# flat: 关键词站点直接放在根目录下（html/<目录名>/）
+# hashed: 按目录名的哈希分到两级子目录（html/ab/cd/<目录名>/），每级最多256个子目录
+LAYOUT_STRATEGIES = ('flat', 'hashed')
+
+class SiteLayout:
+    """关键词站点的目录布局
+
+    root为所有关键词站点的上级目录（1.py为html，2.py、3.py为当前目录）。
+    目录名只由关键词决定，分片也只由目录名决定，同一个关键词在每次构建中都落在同一个子目录。
+    关键词站点内部（主页与p/中的详细页面之间）都是相对链接，不受布局影响。
+    """
+    def __init__(self, strategy='flat', root='html', levels=2, width=2):
+        if strategy not in LAYOUT_STRATEGIES:
+            raise ValueError(f"未知的目录布局: {strategy}")
+        self.strategy = strategy
+        self.root = root
+        self.levels = levels
+        self.width = width
+
+    def shard(self, dir_name):
+        """目录名对应的分片子目录（如 ab/cd），flat布局为空字符串"""
+        if self.strategy == 'flat':
+            return ''
+        digest = hashlib.sha1(dir_name.encode('utf-8')).hexdigest()
+        return '/'.join(digest[i * self.width:(i + 1) * self.width] for i in range(self.levels))
+
+    def keyword_dir(self, dir_name):
+        """关键词站点目录（相对于站点根目录，用/分隔），同时用作链接地址
+
+        dir_name为folder_keywords.txt中记录的目录名（2.py、3.py中带s_前缀）
+        """
+        parts = [part for part in (self.root, self.shard(dir_name)) if part and part != '.']
+        return '/'.join(parts + [dir_name])
+
+    def keyword_path(self, dir_name):
+        """关键词站点目录在本地文件系统中的路径"""
+        return os.path.join(*self.keyword_dir(dir_name).split('/'))
+
+    def other_keyword_dirs(self, dir_name):
+        """同一个关键词站点在其他布局下的目录，切换布局后用来清理旧布局生成的文件"""
+        return [SiteLayout(strategy, self.root, self.levels, self.width).keyword_dir(dir_name)
+                for strategy in LAYOUT_STRATEGIES if strategy != self.strategy]
+
+_layout = None
+_layout_lock = threading.Lock()
+
+def set_site_layout(layout):
+    """设置全局目录布局"""
+    global _layout
+    with _layout_lock:
+        _layout = layout
+
+def get_site_layout():
+    """返回全局目录布局，没有设置时为flat布局（html/<目录名>/）"""
+    global _layout
+    with _layout_lock:
+        if _layout is None:
+            _layout = SiteLayout()
+        return _layout
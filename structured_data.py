@@ -0,0 +1,164 @@
+import json
+import threading
+from json.encoder import encode_basestring
+from collections import namedtuple
+from functools import lru_cache
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 详细页面中的单条搜索结果
+ResultRecord = namedtuple('ResultRecord', ['source', 'title', 'abstract', 'url'])
+
+def result_records(contents):
+    """把解析出的结果字典转换为ResultRecord"""
+    return [ResultRecord(content['source'], content['title'], content['abstract'], content['url'])
+            for content in contents]
+
+# 复用同一个编码器对象：json.dumps带参数时每次调用都会新建JSONEncoder
+_stdlib_encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+def stdlib_encoder(value):
+    """标准库json：紧凑格式，中文直接输出（与orjson的输出逐字节相同）"""
+    return _stdlib_encoder.encode(value)
+
+def orjson_encoder(value):
+    """orjson编码；orjson不接受的值（如单独的代理字符）交给标准库处理"""
+    try:
+        return orjson.dumps(value).decode('utf-8')
+    except TypeError:
+        return stdlib_encoder(value)
+
+# 可选的JSON编码器，输出必须逐字节相同，换编码器不影响生成的页面
+ENCODERS = {'json': stdlib_encoder}
+if orjson is not None:
+    ENCODERS['orjson'] = orjson_encoder
+
+# 只编码单个字符串时用的函数：两个编码器对字符串的输出相同，都直接用C实现的encode_basestring，
+# 省去每个字段一次编码器调用的开销（orjson要先生成bytes再解码，单个短字符串反而更慢）
+_STRING_ENCODERS = {stdlib_encoder: encode_basestring, orjson_encoder: encode_basestring}
+
+_encoder = None
+_string_encoder = None
+_encoder_lock = threading.Lock()
+
+def set_json_encoder(encoder=None):
+    """选择JSON编码器：ENCODERS中的名称或可调用对象，None时装了orjson就用orjson，否则用标准库"""
+    global _encoder, _string_encoder
+    if encoder is None:
+        encoder = 'orjson' if 'orjson' in ENCODERS else 'json'
+    if isinstance(encoder, str):
+        encoder = ENCODERS[encoder]
+    with _encoder_lock:
+        _encoder = encoder
+        _string_encoder = _STRING_ENCODERS.get(encoder, encoder)
+    _list_item_tail.cache_clear()
+
+def get_json_encoder():
+    """当前使用的JSON编码器，首次使用时自动选择"""
+    if _encoder is None:
+        set_json_encoder()
+    return _encoder
+
+def dumps(value):
+    """序列化结构化数据，'</'转义后可以直接放进<script>"""
+    return get_json_encoder()(value).replace('</', '<\\/')
+
+@lru_cache(maxsize=65536)
+def _list_item_tail(name, url):
+    # ListItem中与位置无关的部分，同一个词出现在多个关键词下只序列化一次
+    return dumps({'name': name, 'url': url})[1:]
+
+def list_item(position, name, url):
+    """单个ListItem的JSON"""
+    return '{"@type":"ListItem","position":%d,%s' % (position, _list_item_tail(name, url))
+
+def stream_item_list(items):
+    """逐项产出ListItem数组的JSON，items为 (名称, 链接) 序列"""
+    yield '['
+    for position, (name, url) in enumerate(items, 1):
+        item = list_item(position, name, url)
+        yield item if position == 1 else ',' + item
+    yield ']'
+
+def fragment_cache_stats():
+    """ListItem片段缓存的命中统计"""
+    info = _list_item_tail.cache_info()
+    return {'hits': info.hits, 'misses': info.misses, 'entries': info.currsize}
+
+def article(record, position, section, published_time):
+    """单条搜索结果的Article"""
+    return {
+        "@type": "Article",
+        "headline": f"{record.source}{record.title}",
+        "description": record.abstract,
+        "url": record.url,
+        "publisher": {
+            "@type": "Organization",
+            "name": record.source
+        },
+        "position": position,
+        "datePublished": published_time,
+        "inLanguage": "zh-CN",
+        "articleSection": section,
+        "keywords": record.title.split(),
+        "mainEntityOfPage": {
+            "@type": "WebPage",
+            "@id": record.url
+        }
+    }
+
+# Article的固定结构，字段顺序与article()相同
+_ARTICLE_JSON = ('{"@type":"Article","headline":%s,"description":%s,"url":%s,'
+                 '"publisher":{"@type":"Organization","name":%s},"position":%d,"datePublished":%s,'
+                 '"inLanguage":"zh-CN","articleSection":%s,"keywords":%s,'
+                 '"mainEntityOfPage":{"@type":"WebPage","@id":%s}}')
+
+def _article_json(encode, record, position, section, published_time):
+    # 按固定结构拼接，只对字符串字段调用编码器，不必先构建字典再整体遍历；'</'由调用方统一转义
+    url = encode(record.url)
+    keywords = '[%s]' % ','.join(map(encode, record.title.split()))
+    return _ARTICLE_JSON % (encode(f"{record.source}{record.title}"), encode(record.abstract), url, encode(record.source),
+                            position, encode(published_time), encode(section), keywords, url)
+
+def article_json(record, position, section, published_time):
+    """单条Article的JSON，与dumps(article(...))逐字节相同"""
+    get_json_encoder()
+    return _article_json(_string_encoder, record, position, section, published_time).replace('</', '<\\/')
+
+def article_list_json(section, records, published_time):
+    """Article数组的JSON，与dumps([article(...), ...])逐字节相同"""
+    get_json_encoder()
+    encode = _string_encoder
+    items = ','.join(_article_json(encode, record, i, section, published_time) for i, record in enumerate(records, 1))
+    return f'[{items}]'.replace('</', '<\\/')
+
+def detail_page_json(term, records, description, published_time):
+    """详细页面结构化数据的JSON，与dumps(detail_page_graph(...))逐字节相同"""
+    # itemListElement是第一个可变字段，前面只有固定的@context和@type，替换第一处即可
+    outline = dumps(detail_page_graph(term, (), description, published_time))
+    return outline.replace('"itemListElement":[]',
+                           '"itemListElement":' + article_list_json(term, records, published_time), 1)
+
+def detail_page_graph(term, records, description, published_time):
+    """详细页面的结构化数据：搜索结果列表和页面本身"""
+    return {
+        "@context": "https://schema.org",
+        "@type": "ItemList",
+        "itemListElement": [article(record, i, term, published_time) for i, record in enumerate(records, 1)],
+        "mainEntity": {
+            "@type": "WebPage",
+            "name": f"{term} - 相关内容详细信息",
+            "description": description,
+            "datePublished": published_time,
+            "dateModified": published_time,
+            "inLanguage": "zh-CN",
+            "isPartOf": {
+                "@type": "WebSite",
+                "name": "搜索结果聚合",
+                "url": "../index.html"
+            }
+        }
+    }
@@ -0,0 +1,190 @@
+import html
+import json
+import re
+import threading
+from string import Formatter
+
+from html_minify import minify_html
+
+def escape_html(value):
+    """HTML正文和属性值转义（大部分值不含特殊字符，先用in检查，省去五次replace）"""
+    if type(value) is not str:
+        value = str(value)
+    if '&' in value or '<' in value or '>' in value or '"' in value or "'" in value:
+        return html.escape(value, quote=True)
+    return value
+
+def escape_json(value):
+    """转义为JSON字符串的内容（不含两侧引号），可以放进<script>中的JSON字面量"""
+    return json.dumps(str(value), ensure_ascii=False)[1:-1].replace('</', '<\\/')
+
+def no_escape(value):
+    """已经是HTML片段（或可信的JSON）的值原样输出，分块生成的片段先拼接"""
+    if type(value) is str:
+        return value
+    if is_chunks(value):
+        return ''.join(value)
+    return str(value)
+
+def is_chunks(value):
+    """分块生成的HTML片段（生成器、列表等字符串的可迭代对象）"""
+    return not isinstance(value, (str, bytes)) and hasattr(value, '__iter__')
+
+# 插槽过滤器：模板中写作 {name}（默认HTML转义）、{name:raw}、{name:json}
+FILTERS = {
+    '': escape_html,
+    'raw': no_escape,
+    'json': escape_json
+}
+
+_SLOT_MARKER = re.compile(r'\x00\d+\x00')
+
+# 启用了压缩的模板，用于统计节省的字节数
+_minified_templates = []
+_minified_lock = threading.Lock()
+
+class Template:
+    """预编译模板
+
+    模板源码沿用str.format的写法（{{ }}表示字面的花括号），编译时一次性拆成静态片段和插槽，
+    渲染时只填插槽再''.join，不再每次重新解析整个模板。插槽的值默认做HTML转义。
+
+    constants中的插槽在编译时直接填入静态片段；minify=True时静态片段在编译时压缩
+    （见html_minify.minify_html），插槽的值原样填入，渲染时没有额外开销。
+    """
+    def __init__(self, source, name=None, minify=False, constants=None):
+        self.source = source
+        self.name = name or 'template'
+        self.minify = minify
+        self.constants = constants or {}
+        self.parts = []  # 静态片段和插槽占位交替排列
+        self.slots = []  # (在parts中的位置, 插槽名, 过滤器)
+        self.bytes_saved = 0  # 压缩后每次渲染少输出的字节数
+        self.renders = 0
+        self._lock = threading.Lock()
+        self._compile()
+        # 同一插槽可能出现多次（如页面描述），渲染时每个 (插槽名, 过滤器) 只计算一次
+        fields = {}
+        for index, name, apply_filter in self.slots:
+            fields.setdefault((name, apply_filter), []).append(index)
+        self._fields = [(name, apply_filter, tuple(indexes)) for (name, apply_filter), indexes in fields.items()]
+        self._sequence = self._build_sequence()
+        if minify:
+            with _minified_lock:
+                _minified_templates.append(self)
+
+    def _compile(self):
+        literals = ['']  # 插槽之间的静态文本，比插槽多一个
+        fields = []  # (插槽名, 过滤器)
+        for literal, field, spec, conversion in Formatter().parse(self.source):
+            literals[-1] += literal
+            if field is None:
+                continue
+            if not field.isidentifier() or conversion:
+                raise ValueError(f"模板 {self.name} 中的插槽 {{{field}}} 无效")
+            if spec not in FILTERS:
+                raise ValueError(f"模板 {self.name} 中的插槽 {{{field}}} 使用了未知过滤器 {spec!r}")
+            if field in self.constants:
+                literals[-1] += FILTERS[spec](self.constants[field])
+                continue
+            fields.append((field, FILTERS[spec]))
+            literals.append('')
+        if self.minify:
+            literals = self._minify(literals)
+        for literal, (field, apply_filter) in zip(literals, fields):
+            self.parts.append(literal)
+            self.slots.append((len(self.parts), field, apply_filter))
+            self.parts.append(None)
+        self.parts.append(literals[-1])
+
+    def _minify(self, literals):
+        # 插槽位置换成不含空白的标记，整页一起压缩后再按标记拆开
+        if any('\x00' in literal for literal in literals):
+            raise ValueError(f"模板 {self.name} 中包含保留字符\\x00")
+        marked = ''.join(literal if i == 0 else f'\x00{i}\x00{literal}' for i, literal in enumerate(literals))
+        minified = _SLOT_MARKER.split(minify_html(marked))
+        if len(minified) != len(literals):
+            raise ValueError(f"模板 {self.name} 压缩后插槽数量不一致")
+        self.bytes_saved = sum(len(literal.encode('utf-8')) for literal in literals) - \
+            sum(len(literal.encode('utf-8')) for literal in minified)
+        return minified
+
+    def _build_sequence(self):
+        # 流式渲染按顺序遍历：静态片段为字符串，插槽为 (插槽名, 过滤器)
+        slot_at = {index: (name, apply_filter) for index, name, apply_filter in self.slots}
+        return [slot_at.get(index, part) for index, part in enumerate(self.parts) if part != '']
+
+    def _count_render(self):
+        if self.minify:
+            with self._lock:
+                self.renders += 1
+
+    def bind(self, values):
+        """返回填好部分插槽的模板副本：values中的插槽在这里计算一次并填入静态片段
+
+        适合同一页面中逐条渲染时不变的值（如发布时间），每条只需再填其余插槽。
+        副本的渲染次数仍记在原模板上。
+        """
+        bound = object.__new__(type(self))
+        bound.__dict__.update(self.__dict__)
+        bound.parts = self.parts[:]
+        bound._fields = []
+        for name, apply_filter, indexes in self._fields:
+            if name not in values:
+                bound._fields.append((name, apply_filter, indexes))
+                continue
+            value = apply_filter(values[name])
+            for index in indexes:
+                bound.parts[index] = value
+        bound.slots = [slot for slot in self.slots if slot[1] not in values]
+        bound._sequence = bound._build_sequence()
+        bound._count_render = self._count_render
+        return bound
+
+    @property
+    def slot_names(self):
+        return {name for _, name, _ in self.slots}
+
+    def render(self, context):
+        """用context（插槽名 -> 值）渲染整个页面"""
+        self._count_render()
+        parts = self.parts[:]
+        for name, apply_filter, indexes in self._fields:
+            value = apply_filter(context[name])
+            for index in indexes:
+                parts[index] = value
+        return ''.join(parts)
+
+    def stream(self, context):
+        """逐块产出渲染结果，整页不在内存中拼接
+
+        raw插槽的值可以是分块的可迭代对象（如生成器），按原样逐块产出，只遍历一次；
+        其他插槽的值与render相同，同一插槽重复出现时只计算一次。
+        """
+        self._count_render()
+        values = {}
+        for item in self._sequence:
+            if type(item) is str:
+                yield item
+                continue
+            name, apply_filter = item
+            value = context[name]
+            if apply_filter is no_escape and is_chunks(value):
+                yield from value
+                continue
+            if item not in values:
+                values[item] = apply_filter(value)
+            yield values[item]
+
+def minify_stats():
+    """各压缩模板的渲染次数和累计少输出的字节数（按模板名汇总）"""
+    stats = {}
+    with _minified_lock:
+        templates = list(_minified_templates)
+    for template in templates:
+        with template._lock:
+            renders = template.renders
+        entry = stats.setdefault(template.name, {'renders': 0, 'bytes_saved': 0})
+        entry['renders'] += renders
+        entry['bytes_saved'] += renders * template.bytes_saved
+    return stats
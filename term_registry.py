@@ -0,0 +1,140 @@
+import json
+import logging
+import os
+import shutil
+import threading
+
+from output_manifest import get_output_manifest, temp_path_for
+from output_writer import ensure_dir
+
+DEFAULT_REGISTRY_PATH = 'term_registry.json'
+
+class TermRegistry:
+    """全局搜索词登记表：搜索词 -> 已生成的规范详细页面路径
+
+    不同关键词的相关搜索词大量重叠，同一个词的详细页面只抓取、渲染一次，
+    之后的关键词目录直接硬链接到这份页面（跨文件系统时退化为复制）。
+    登记表保存为JSON文件，下次运行时继续有效；页面文件被删除时自动失效。
+    """
+    def __init__(self, path=DEFAULT_REGISTRY_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.pages = {}  # 搜索词 -> 规范详细页面路径（相对于工作目录）
+        self.dirty = False
+        self.registered = 0
+        self.linked = 0
+        self.copied = 0
+        self.load()
+
+    def load(self):
+        """读取登记表文件，不存在或损坏时从空表开始"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                pages = json.load(f)
+            if isinstance(pages, dict):
+                self.pages = pages
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logging.warning(f"读取搜索词登记表 {self.path} 失败: {str(e)}")
+
+    def save(self):
+        """有变更时写回登记表文件"""
+        with self.lock:
+            if not self.dirty:
+                return
+            data = json.dumps(self.pages, ensure_ascii=False, indent=0)
+            self.dirty = False
+        try:
+            temp_path = f'{self.path}.{threading.get_ident()}.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            logging.warning(f"保存搜索词登记表 {self.path} 失败: {str(e)}")
+
+    def get(self, term):
+        """返回搜索词的规范页面路径，未登记或文件已不存在时返回None"""
+        with self.lock:
+            path = self.pages.get(term)
+        if path is not None:
+            # 页面可能还在后台写线程的队列中
+            get_output_manifest().wait(path)
+        with self.lock:
+            path = self.pages.get(term)
+            if path is not None and not os.path.isfile(path):
+                del self.pages[term]
+                self.dirty = True
+                path = None
+            return path
+
+    def register(self, term, path):
+        """登记新生成的详细页面
+
+        文件名由拼音截断生成，不同的词可能写到同一个文件；此时旧词的页面已被覆盖，一并从表中移除
+        """
+        with self.lock:
+            if self.pages.get(term) != path:
+                for other in [other for other, other_path in self.pages.items() if other_path == path]:
+                    del self.pages[other]
+                self.pages[term] = path
+                self.dirty = True
+            self.registered += 1
+
+    def link_into(self, term, detail_dir):
+        """把已登记的页面链接到detail_dir中（文件名不变），成功返回目标路径，未登记返回None"""
+        source = self.get(term)
+        if source is None:
+            return None
+
+        target = os.path.join(detail_dir, os.path.basename(source))
+        try:
+            if os.path.exists(target) and os.path.samefile(source, target):
+                return target
+            ensure_dir(detail_dir)
+            # 先链接到临时文件再替换，目标目录里的旧页面（上次运行留下的）会被原子地替换掉
+            temp_path = temp_path_for(target)
+            try:
+                os.link(source, temp_path)
+                copied = False
+            except OSError:
+                shutil.copyfile(source, temp_path)
+                copied = True
+            os.replace(temp_path, target)
+        except OSError as e:
+            logging.warning(f"链接 {source} 到 {target} 失败: {str(e)}")
+            return None
+
+        with self.lock:
+            if copied:
+                self.copied += 1
+            else:
+                self.linked += 1
+        return target
+
+    def stats(self):
+        """登记和复用统计"""
+        with self.lock:
+            return {
+                'terms': len(self.pages),
+                'registered': self.registered,
+                'linked': self.linked,
+                'copied': self.copied
+            }
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def set_term_registry(registry):
+    """替换全局登记表（传入None则在下次使用时按默认路径重新创建）"""
+    global _registry
+    with _registry_lock:
+        _registry = registry
+
+def get_term_registry():
+    """返回全局登记表，首次使用时按默认路径创建"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = TermRegistry()
+        return _registry
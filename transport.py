@@ -0,0 +1,180 @@
+import asyncio
+import threading
+import time
+from collections import namedtuple
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+
+# 默认连接/读取超时（秒）和连接池大小
+DEFAULT_CONNECT_TIMEOUT = 5
+DEFAULT_READ_TIMEOUT = 15
+DEFAULT_POOL_SIZE = 10
+
+# 默认每分钟请求数：与同步模式每个词之间等待2秒的节奏相同
+DEFAULT_REQUESTS_PER_MINUTE = 30
+
+# 一次请求的结果：状态码、响应头、原始响应体、耗时（秒）
+FetchResult = namedtuple('FetchResult', ['status', 'headers', 'content', 'elapsed'])
+
+# 值得重试的状态码：限流和服务端暂时性错误
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+
+class RetryableStatusError(Exception):
+    """响应状态码属于RETRYABLE_STATUS，result中保存最后一次的响应"""
+    def __init__(self, result):
+        super().__init__(f"HTTP {result.status}")
+        self.result = result
+
+def check_status(result):
+    """状态码值得重试时抛出RetryableStatusError，否则原样返回"""
+    if result.status in RETRYABLE_STATUS:
+        raise RetryableStatusError(result)
+    return result
+
+# 值得重试的异常：连接失败、超时和可重试的状态码（解析错误等其他异常不重试）
+RETRYABLE_ERRORS = (
+    requests.ConnectionError,
+    requests.Timeout,
+    aiohttp.ClientConnectionError,
+    aiohttp.ClientPayloadError,
+    asyncio.TimeoutError,
+    RetryableStatusError
+)
+
+class TransportStats:
+    """请求计时统计"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.status_counts = {}
+
+    def record(self, elapsed, status=None):
+        """记录一次请求，status为None表示请求异常"""
+        with self.lock:
+            self.requests += 1
+            self.total_seconds += elapsed
+            self.max_seconds = max(self.max_seconds, elapsed)
+            if status is None:
+                self.errors += 1
+            else:
+                self.status_counts[status] = self.status_counts.get(status, 0) + 1
+
+    def as_dict(self):
+        with self.lock:
+            return {
+                'requests': self.requests,
+                'errors': self.errors,
+                'avg_seconds': round(self.total_seconds / self.requests, 3) if self.requests else 0,
+                'max_seconds': round(self.max_seconds, 3),
+                'status': dict(self.status_counts)
+            }
+
+class RequestBudget:
+    """全局请求预算：把异步请求均匀地限制在每分钟requests_per_minute次以内"""
+    def __init__(self, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE):
+        self.interval = 60.0 / requests_per_minute
+        self.next_time = 0.0
+        self.waited_seconds = 0.0
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        """等待下一个可用的请求时隙"""
+        async with self.lock:
+            now = time.monotonic()
+            wait = self.next_time - now
+            if wait > 0:
+                self.waited_seconds += wait
+                await asyncio.sleep(wait)
+            self.next_time = max(now, self.next_time) + self.interval
+
+class Transport:
+    """HTTP传输层：统一的超时设置和请求计时，同步/异步实现共用
+
+    get（返回FetchResult）和close由SyncTransport、AsyncTransport各自实现（异步版本为协程）
+    """
+    def __init__(self, headers=None, connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout=DEFAULT_READ_TIMEOUT, pool_size=DEFAULT_POOL_SIZE):
+        self.headers = dict(headers or {})
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.pool_size = pool_size
+        self.stats = TransportStats()
+
+class SyncTransport(Transport):
+    """基于requests.Session的同步传输，连接池保持长连接复用"""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def get(self, url):
+        start = time.perf_counter()
+        try:
+            response = self.session.get(url, timeout=(self.connect_timeout, self.read_timeout))
+            content = response.content
+        except Exception:
+            self.stats.record(time.perf_counter() - start)
+            raise
+        elapsed = time.perf_counter() - start
+        self.stats.record(elapsed, response.status_code)
+        return FetchResult(response.status_code, response.headers, content, elapsed)
+
+    def close(self):
+        self.session.close()
+
+class AsyncTransport(Transport):
+    """基于aiohttp的异步传输，使用调优后的TCPConnector复用连接
+
+    传入budget时，每次真实的网络请求都先占用一个请求预算时隙（缓存和回放不占用）
+    """
+    def __init__(self, *args, budget=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.budget = budget
+        self.session = None
+
+    async def open(self):
+        if self.session is None:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                limit_per_host=self.pool_size,
+                ttl_dns_cache=300,
+                keepalive_timeout=60
+            )
+            timeout = aiohttp.ClientTimeout(sock_connect=self.connect_timeout, sock_read=self.read_timeout)
+            self.session = aiohttp.ClientSession(headers=self.headers, connector=connector, timeout=timeout)
+        return self
+
+    async def get(self, url):
+        if self.budget is not None:
+            await self.budget.acquire()
+        start = time.perf_counter()
+        try:
+            async with self.session.get(url) as response:
+                status = response.status
+                response_headers = response.headers
+                content = await response.read()
+        except Exception:
+            self.stats.record(time.perf_counter() - start)
+            raise
+        elapsed = time.perf_counter() - start
+        self.stats.record(elapsed, status)
+        return FetchResult(status, response_headers, content, elapsed)
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()